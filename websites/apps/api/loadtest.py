@@ -0,0 +1,406 @@
+# apps/api/loadtest.py
+"""
+Load generator replaying the SPA's traffic (`manage.py loadtest`).
+
+A page view is what static/js/app.js makes a browser do:
+
+    GET <page>                   the SPA shell (index.html)
+    GET its CSS / JS / images    once per session (browser cache)
+    GET the 22 /api/ lists       at most 6 in flight per visitor, retried
+                                 twice with 200/400 ms backoff like getJSON
+    GET image thumbnails         from the file lists, once per session
+
+followed by a think time before the next view. Each virtual visitor runs
+sessions of `pages` views back to back until the run ends. Latency is
+kept per route and per page view (shell through the last API response).
+
+The client is plain asyncio streams speaking HTTP/1.1 with keep-alive,
+so the tool needs nothing beyond the standard library.
+
+Everything arrives from one IP, so the per-IP API throttle answers 429
+long before the server is saturated. Either relax API_THROTTLE_BUCKETS on
+the target, or run it with DJANGO_NUM_PROXIES=1 and pass
+--forwarded-for so every visitor gets its own X-Forwarded-For address.
+"""
+import asyncio
+import gzip
+import json
+import math
+import random
+import re
+import ssl
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urljoin, urlsplit
+
+from django.urls import reverse
+
+# URL names of the lists app.js loads on every page, in its order: the
+# `endpoints` map, then the news/events carousel.
+SPA_ENDPOINTS = (
+    "api_file_list",
+    "top_reports_files",
+    "top_publications_files",
+    "top_resources_files",
+    "top_analysis_files",
+    "all_reports_files_by_slug",
+    "all_publications_files",
+    "all_resources_files",
+    "top_video_files",
+    "top_image_files",
+    "all_video_files",
+    "all_image_files",
+    "latest_news_events",
+    "department_contents",
+    "top_blogs_contents",
+    "top_projects_contents",
+    "all_news_contents",
+    "all_events_contents",
+    "all_blogs_contents",
+    "all_projects_contents",
+    "top_news_contents",
+    "top_events_contents",
+)
+ASSET_RE = re.compile(r"""<(?:link|script|img)\b[^>]*?\b(?:href|src)=["']([^"']+)["']""", re.I)
+ASSET_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".woff", ".woff2")
+IMAGE_RE = re.compile(r"\.(png|jpe?g|gif|webp|svg|avif)(\?|$)", re.I)
+PERCENTILES = (50, 90, 95, 99)
+USER_AGENT = "nascp-loadtest/1"
+
+
+def spa_paths():
+    return [reverse(name) for name in SPA_ENDPOINTS]
+
+
+class Target:
+    def __init__(self, url, verify=True):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError("Target must be an http(s):// URL, not %r." % url)
+        self.url = url.rstrip("/")
+        self.netloc = parts.netloc
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = None
+        if parts.scheme == "https":
+            self.ssl = ssl.create_default_context()
+            if not verify:
+                self.ssl.check_hostname = False
+                self.ssl.verify_mode = ssl.CERT_NONE
+
+    def local_path(self, url):
+        """Path of `url` if it is served by the target, else None."""
+        parts = urlsplit(urljoin(self.url + "/", url))
+        if parts.netloc != self.netloc:
+            return None
+        return parts.path + ("?" + parts.query if parts.query else "")
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status, self.headers, self.body = status, headers, body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.closed = False
+        self.received = 0
+
+    @classmethod
+    async def open(cls, target):
+        reader, writer = await asyncio.open_connection(target.host, target.port, ssl=target.ssl)
+        return cls(reader, writer)
+
+    async def get(self, target, path, headers):
+        lines = ["GET %s HTTP/1.1" % path, "Host: %s" % target.netloc]
+        lines += ["%s: %s" % item for item in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response.")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+        received = len(status_line)
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            received += len(line)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._chunked()
+        elif "content-length" in response_headers:
+            body = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif status.startswith(("1", "204", "304")):
+            body = b""
+        else:
+            body = await self.reader.read()
+            self.closed = True
+        self.received = received + len(body)
+        connection = response_headers.get("connection", "").lower()
+        if connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+            self.closed = True
+        if response_headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        return Response(int(status), response_headers, body)
+
+    async def _chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+
+class RouteStats:
+    __slots__ = ("latencies", "statuses", "errors", "bytes")
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes = 0
+
+
+class Stats:
+    """Samples completed between start() and stop(), grouped by route."""
+
+    def __init__(self):
+        self.routes = defaultdict(RouteStats)
+        self.recording = False
+        self.started = self.stopped = None
+
+    def start(self):
+        self.recording, self.started = True, time.monotonic()
+
+    def stop(self):
+        self.recording, self.stopped = False, time.monotonic()
+
+    def record(self, route, seconds, status=None, size=0, error=None):
+        if not self.recording:
+            return
+        stats = self.routes[route]
+        stats.latencies.append(seconds)
+        stats.bytes += size
+        if error:
+            stats.errors[error] += 1
+        else:
+            stats.statuses[status] += 1
+            if status >= 400:
+                stats.errors["HTTP %d" % status] += 1
+
+    def summary(self):
+        elapsed = max((self.stopped or time.monotonic()) - self.started, 1e-9)
+        routes = {
+            route: _summarize(stats, elapsed)
+            for route, stats in sorted(self.routes.items(), key=lambda item: _route_order(item[0]))
+        }
+        requests = [summary for route, summary in routes.items() if route != "page"]
+        pages = routes.get("page", {"requests": 0})
+        return {
+            "duration": elapsed,
+            "totals": {
+                "requests": sum(summary["requests"] for summary in requests),
+                "errors": sum(summary["errors"] for summary in requests),
+                "requests_per_second": sum(summary["requests"] for summary in requests) / elapsed,
+                "bytes": sum(summary["bytes"] for summary in requests),
+                "pages": pages["requests"],
+                "pages_per_second": pages["requests"] / elapsed,
+            },
+            "routes": routes,
+        }
+
+
+def _route_order(route):
+    return ({"page": 0, "shell": 1}.get(route, 2 if route.startswith("/") else 3), route)
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _summarize(stats, elapsed):
+    ordered = sorted(stats.latencies)
+    latency = {"mean": sum(ordered) / len(ordered) * 1000 if ordered else None}
+    latency.update(("p%d" % q, _ms(percentile(ordered, q))) for q in PERCENTILES)
+    latency["max"] = _ms(ordered[-1] if ordered else None)
+    return {
+        "requests": len(ordered),
+        "errors": sum(stats.errors.values()),
+        "requests_per_second": len(ordered) / elapsed,
+        "bytes": stats.bytes,
+        "statuses": {str(status): count for status, count in sorted(stats.statuses.items())},
+        "error_types": dict(stats.errors.most_common()),
+        "latency_ms": latency,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+class Visitor:
+    """One browser: a small connection pool, a cache of fetched assets."""
+
+    def __init__(self, target, stats, options, rng, address=None):
+        self.target, self.stats, self.options, self.rng = target, stats, options, rng
+        self.idle = []
+        self.slots = asyncio.Semaphore(options["connections"])
+        self.cached = set()
+        self.headers = {
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        if address:
+            self.headers["X-Forwarded-For"] = address
+
+    async def get(self, route, path, accept="*/*"):
+        headers = dict(self.headers, Accept=accept)
+        loop = asyncio.get_running_loop()
+        async with self.slots:
+            started = loop.time()
+            for reused in (True, False):
+                connection = self.idle.pop() if reused and self.idle else None
+                try:
+                    if connection is None:
+                        reused = False
+                        connection = await Connection.open(self.target)
+                    response = await asyncio.wait_for(
+                        connection.get(self.target, path, headers), self.options["timeout"],
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                    if connection is not None:
+                        connection.close()
+                    if reused:
+                        continue  # the server dropped an idle connection; browsers retry too
+                    return self._failed(route, loop.time() - started, exc)
+                except (OSError, asyncio.TimeoutError, ValueError) as exc:
+                    if connection is not None:
+                        connection.close()
+                    return self._failed(route, loop.time() - started, exc)
+                break
+            self.stats.record(route, loop.time() - started, response.status, connection.received)
+            if connection.closed:
+                connection.close()
+            else:
+                self.idle.append(connection)
+            return response
+
+    def _failed(self, route, seconds, exc):
+        self.stats.record(route, seconds, error=type(exc).__name__)
+        return None
+
+    async def get_json(self, path, retries=2):
+        for attempt in range(retries + 1):
+            response = await self.get(path, path, accept="application/json")
+            if response is not None and 200 <= response.status < 300:
+                try:
+                    return response.json()
+                except ValueError:
+                    self.stats.record(path, 0.0, error="InvalidJSON")
+            if attempt < retries:
+                await asyncio.sleep(0.2 * 2 ** attempt)
+        return None
+
+    async def view(self, page, api_paths):
+        """One page view; returns whether the shell and every list loaded."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        shell = await self.get("shell", page, accept="text/html")
+        if shell is None or shell.status != 200:
+            self.stats.record("page", loop.time() - started, error="shell")
+            return False
+
+        assets = self._uncached(ASSET_RE.findall(shell.body.decode("utf-8", "replace")), ASSET_EXTENSIONS)
+        static = asyncio.gather(*(self.get("static", path) for path in assets))
+        lists = await asyncio.gather(*(self.get_json(path) for path in api_paths))
+        failed = sum(data is None for data in lists)
+        self.stats.record(
+            "page", loop.time() - started, 200, error="%d lists failed" % failed if failed else None,
+        )
+
+        images = []
+        for data in lists:
+            if isinstance(data, list):
+                images += [
+                    item.get("thumbnail_url") or item.get("url") for item in data
+                    if isinstance(item, dict) and (
+                        item.get("thumbnail_url") or IMAGE_RE.search(item.get("url") or "")
+                    )
+                ]
+        images = self._uncached(images)[:self.options["media"]]
+        await asyncio.gather(static, *(self.get("media", path) for path in images))
+        return not failed
+
+    def _uncached(self, urls, extensions=None):
+        paths = []
+        for url in urls:
+            path = self.target.local_path(url)
+            if path is None or path in self.cached:
+                continue
+            if extensions and not path.split("?")[0].lower().endswith(extensions):
+                continue
+            self.cached.add(path)
+            paths.append(path)
+        return paths
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+        self.idle = []
+
+
+async def run(target, options, stats):
+    """Drive `options["users"]` visitors for warmup + duration seconds."""
+    loop = asyncio.get_running_loop()
+    api_paths = spa_paths()
+    deadline = loop.time() + options["warmup"] + options["duration"]
+    loop.call_later(options["warmup"], stats.start)
+    stop = loop.call_later(options["warmup"] + options["duration"], stats.stop)
+
+    async def visitor(index):
+        rng = random.Random(options["seed"] * 100003 + index)
+        await asyncio.sleep(options["ramp"] * index / options["users"])
+        while loop.time() < deadline:
+            address = "10.%d.%d.%d" % tuple(rng.randrange(1, 255) for _ in range(3))
+            browser = Visitor(target, stats, options, rng, address if options["forwarded_for"] else None)
+            try:
+                for _ in range(options["pages"]):
+                    if loop.time() >= deadline:
+                        break
+                    await browser.view(rng.choice(options["paths"]), api_paths)
+                    if options["think"]:
+                        pause = rng.expovariate(1 / options["think"])
+                        await asyncio.sleep(max(0.0, min(pause, deadline - loop.time())))
+            finally:
+                browser.close()
+
+    await asyncio.gather(*(visitor(index) for index in range(options["users"])))
+    if stats.recording:
+        stop.cancel()
+        stats.stop()
+    return stats.summary()
@@ -0,0 +1,87 @@
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from nascp_web.handlers import LightWSGIHandler, use_light_chain
+
+
+def _host():
+    return next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if "*" not in host), "localhost")
+
+
+def _environ(path, cookie=""):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": _host(),
+        "SERVER_PORT": "443",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_USER_AGENT": "bench_middleware",
+        "wsgi.url_scheme": "https",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": BytesIO(),
+    }
+    if cookie:
+        environ["HTTP_COOKIE"] = cookie
+    return environ
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request time, DB queries and response headers of the full "
+        "and the light middleware chain for an anonymous GET."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/top-news-contents/")
+        parser.add_argument("--requests", type=int, default=500)
+
+    def run(self, handler, path, count):
+        statuses = []
+
+        def start_response(status, headers):
+            statuses.append((status, dict(headers)))
+
+        # Warm-up: URL resolution, first-query setup, caches.
+        b"".join(handler(_environ(path), start_response))
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                b"".join(handler(_environ(path), start_response))
+            elapsed = time.perf_counter() - started
+        return elapsed / count * 1e6, len(queries) / count, statuses[-1]
+
+    def handle(self, *args, **options):
+        path, count = options["path"], options["requests"]
+        if not use_light_chain(path, ""):
+            self.stderr.write("Note: %s is not under LIGHT_MIDDLEWARE_PREFIXES." % path)
+        # Keep the throttle from answering 429 part-way through, and audit
+        # sampling from adding random writes; both chains still run them.
+        unlimited = {"ip": (10 ** 9, 10 ** 9), "global": (10 ** 9, 10 ** 9)}
+        settings.API_THROTTLE_BUCKETS = {"top": unlimited, "browse": unlimited, "all": unlimited}
+        settings.AUDIT_SAMPLE_RATES = {
+            traffic_class: 0.0 for traffic_class in ("human", "api", "asset", "feed", "bot", "monitor")
+        }
+
+        results = {}
+        for name, handler in (("full", WSGIHandler()), ("light", LightWSGIHandler())):
+            micros, queries, (status, headers) = self.run(handler, path, count)
+            results[name] = micros
+            self.stdout.write(
+                "%-5s %8.0f µs/request  %.2f queries/request  %s  Vary: %s" % (
+                    name, micros, queries, status, headers.get("Vary", "-"),
+                )
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "Light chain saves %.0f µs/request (%.0f%%) on %s." % (
+                results["full"] - results["light"],
+                100 * (1 - results["light"] / results["full"]),
+                path,
+            )
+        ))
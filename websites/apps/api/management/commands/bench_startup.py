@@ -0,0 +1,116 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PROFILES = {
+    "full": ("nascp_web.settings", "nascp_web.wsgi"),
+    "api": ("nascp_web.settings_api", "nascp_web.wsgi_api"),
+}
+
+# Runs in a fresh interpreter: build the WSGI app (settings, apps, URLconf,
+# middleware), resolve a few API URLs, then report wall time and RSS.
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+from django.urls import resolve
+for path in sys.argv[2:]:
+    resolve(path)
+seconds = time.perf_counter() - start
+rss_kb = None
+try:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "rss_kb": rss_kb}))
+"""
+
+PROBE_PATHS = ("/api/top-news-contents/", "/api/all-reports-files-by-slug/", "/api/files/")
+
+
+def parse_importtime(stderr):
+    """-X importtime output -> (total self µs, {top-level package: self µs})."""
+    by_package = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        total += int(self_us)
+        by_package[name.strip().split(".")[0]] += int(self_us)
+    return total, by_package
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker startup (-X importtime) and RSS for the full and the "
+        "lean API settings profiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per profile.")
+        parser.add_argument("--top", type=int, default=10, help="Packages to list per profile.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def run_probe(self, settings_module, wsgi_module):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, wsgi_module, *PROBE_PATHS],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["import_us"], result["packages"] = parse_importtime(completed.stderr)
+        return result
+
+    def handle(self, *args, **options):
+        report = {}
+        for name, (settings_module, wsgi_module) in PROFILES.items():
+            runs = [self.run_probe(settings_module, wsgi_module) for _ in range(options["repeat"])]
+            packages = defaultdict(list)
+            for run in runs:
+                for package, us in run["packages"].items():
+                    packages[package].append(us)
+            report[name] = {
+                "settings": settings_module,
+                "startup_ms": statistics.median(run["seconds"] for run in runs) * 1000,
+                "import_ms": statistics.median(run["import_us"] for run in runs) / 1000,
+                "rss_mb": statistics.median(run["rss_kb"] for run in runs) / 1024,
+                "modules_by_self_ms": {
+                    package: statistics.median(values) / 1000
+                    for package, values in sorted(
+                        packages.items(), key=lambda item: -statistics.median(item[1])
+                    )[:options["top"]]
+                },
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for name, row in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                "%s (%s): startup %.0f ms, imports %.0f ms, RSS %.1f MB" % (
+                    name, row["settings"], row["startup_ms"], row["import_ms"], row["rss_mb"],
+                )
+            ))
+            for package, ms in row["modules_by_self_ms"].items():
+                self.stdout.write("  %-28s %7.1f ms" % (package, ms))
+        full, api = report["full"], report["api"]
+        self.stdout.write(self.style.SUCCESS(
+            "API profile: %.0f ms (%.0f%%) faster startup, %.1f MB (%.0f%%) less RSS per worker." % (
+                full["startup_ms"] - api["startup_ms"],
+                100 * (1 - api["startup_ms"] / full["startup_ms"]),
+                full["rss_mb"] - api["rss_mb"],
+                100 * (1 - api["rss_mb"] / full["rss_mb"]),
+            )
+        ))
@@ -0,0 +1,149 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.loadtest import PERCENTILES, Stats, Target, run
+
+RESULT_VERSION = 1
+
+
+def _fmt(value, spec="%.1f"):
+    return "-" if value is None else spec % value
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return "-"
+    return "%+.0f%%" % (100 * (new / old - 1))
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the SPA's page-view traffic (shell, assets, the /api/ lists "
+        "static/js/app.js loads, thumbnails) against a running server with "
+        "asyncio visitors; report throughput and latency percentiles per route."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="?", default="http://127.0.0.1:8000",
+                            help="Base URL of the server under test.")
+        parser.add_argument("--users", type=int, default=20, help="Concurrent visitors.")
+        parser.add_argument("--duration", type=float, default=60, help="Measured seconds.")
+        parser.add_argument("--warmup", type=float, default=5,
+                            help="Seconds run before measuring (caches, connection pools).")
+        parser.add_argument("--ramp", type=float, default=5,
+                            help="Seconds over which visitors start.")
+        parser.add_argument("--pages", type=int, default=3, help="Page views per session.")
+        parser.add_argument("--think", type=float, default=5,
+                            help="Mean think time between page views (exponential); 0 for none.")
+        parser.add_argument("--path", dest="paths", action="append",
+                            help="SPA page to view (repeatable, picked at random). Default: /")
+        parser.add_argument("--media", type=int, default=12,
+                            help="Thumbnails fetched per page view at most (lazy loading).")
+        parser.add_argument("--connections", type=int, default=6,
+                            help="Connections per visitor, as a browser opens per host.")
+        parser.add_argument("--timeout", type=float, default=12,
+                            help="Per-request timeout in seconds (app.js uses 12).")
+        parser.add_argument("--forwarded-for", action="store_true",
+                            help="Send a distinct X-Forwarded-For per session (target needs DJANGO_NUM_PROXIES).")
+        parser.add_argument("--insecure", action="store_true", help="Skip TLS certificate checks.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--label", default="",
+                            help="Free text stored with the results, e.g. the deployed revision.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Results JSON of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        try:
+            target = Target(options["url"], verify=not options["insecure"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options["users"] < 1 or options["duration"] <= 0:
+            raise CommandError("--users and --duration must be positive.")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as handle:
+                baseline = json.load(handle)
+
+        settings = {
+            name: options[name] for name in (
+                "users", "duration", "warmup", "ramp", "pages", "think", "media",
+                "connections", "timeout", "forwarded_for", "seed",
+            )
+        }
+        settings["paths"] = options["paths"] or ["/"]
+        self.stdout.write("%d visitors against %s for %gs (+%gs warm-up)..." % (
+            settings["users"], target.url, settings["duration"], settings["warmup"]))
+        started_at = datetime.now(timezone.utc)
+        summary = asyncio.run(run(target, settings, Stats()))
+        result = {
+            "version": RESULT_VERSION,
+            "target": target.url,
+            "label": options["label"],
+            "started_at": started_at.isoformat(),
+            "options": settings,
+            **summary,
+        }
+
+        self.report(result, baseline)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(result, handle, indent=2)
+            self.stdout.write("Results written to %s." % options["output"])
+
+    def report(self, result, baseline):
+        columns = ["p%d" % q for q in PERCENTILES] + ["max"]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            "%-34s %8s %7s %8s %8s " % ("route", "requests", "errors", "req/s", "mean")
+            + " ".join("%8s" % column for column in columns) + "  (ms)"
+        ))
+        for route, row in result["routes"].items():
+            latency = row["latency_ms"]
+            self.stdout.write(
+                "%-34s %8d %7d %8.1f %8s " % (
+                    route[:34], row["requests"], row["errors"], row["requests_per_second"],
+                    _fmt(latency["mean"]),
+                ) + " ".join("%8s" % _fmt(latency[column]) for column in columns)
+            )
+            if row["error_types"]:
+                self.stdout.write("    " + ", ".join(
+                    "%s x%d" % item for item in row["error_types"].items()))
+
+        totals = result["totals"]
+        style = self.style.SUCCESS if not totals["errors"] else self.style.WARNING
+        self.stdout.write(style(
+            "%d requests (%.1f/s), %d errors, %.1f MB; %d page views (%.2f/s) in %.1fs." % (
+                totals["requests"], totals["requests_per_second"], totals["errors"],
+                totals["bytes"] / 1024 ** 2, totals["pages"], totals["pages_per_second"],
+                result["duration"],
+            )
+        ))
+        if baseline:
+            self.compare(result, baseline)
+
+    def compare(self, result, baseline):
+        if baseline.get("version") != RESULT_VERSION:
+            self.stderr.write("Baseline is not a version %d result; not comparing." % RESULT_VERSION)
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING("Against %s (%s, %s):" % (
+            baseline.get("label") or "baseline", baseline["target"], baseline["started_at"],
+        )))
+        self.stdout.write("%-34s %20s %20s %20s" % ("route", "req/s", "p50 ms", "p95 ms"))
+        for route, row in result["routes"].items():
+            old = baseline["routes"].get(route)
+            if old is None:
+                continue
+            cells = [(old["requests_per_second"], row["requests_per_second"])] + [
+                (old["latency_ms"][key], row["latency_ms"][key]) for key in ("p50", "p95")
+            ]
+            self.stdout.write("%-34s " % route[:34] + " ".join(
+                "%20s" % ("%s -> %s %5s" % (_fmt(before), _fmt(after), _change(before, after)))
+                for before, after in cells
+            ))
+        old, new = baseline["totals"], result["totals"]
+        self.stdout.write("Page views/s: %.2f -> %.2f (%s)." % (
+            old["pages_per_second"], new["pages_per_second"],
+            _change(old["pages_per_second"], new["pages_per_second"]),
+        ))
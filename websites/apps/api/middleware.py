@@ -0,0 +1,22 @@
+# apps/api/middleware.py
+import math
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Adds X-RateLimit-Limit / -Remaining / -Reset to throttled (429) API
+    responses from the outcome TokenBucketThrottle left on the request;
+    DRF adds Retry-After. Successful answers go without them: the edge
+    shares those with every visitor, who would all see one client's count.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit and response.status_code == 429:
+            response["X-RateLimit-Limit"] = str(rate_limit["limit"])
+            response["X-RateLimit-Remaining"] = str(rate_limit["remaining"])
+            response["X-RateLimit-Reset"] = str(math.ceil(rate_limit["reset"]))
+        return response
@@ -1,3 +1,335 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import boto3
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver, resolve
+from django.urls.exceptions import Resolver404
+from moto import mock_aws
+
+from apps.file_manager.models import File
+from . import loadtest
+from .management.commands.bench_startup import parse_importtime
+
+BUCKETS = {
+    "top": {"ip": (3, 0.001), "global": (1000, 1000.0)},
+    "browse": {"ip": (3, 0.001), "global": (1000, 1000.0)},
+    "all": {"ip": (3, 0.001), "global": (1000, 1000.0)},
+}
+
+
+@override_settings(API_THROTTLE_BUCKETS=BUCKETS)
+class TokenBucketThrottleTests(TestCase):
+    url = "/api/all-blogs-contents/"
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, forwarded_for=None):
+        headers = {"HTTP_X_FORWARDED_FOR": forwarded_for} if forwarded_for else {}
+        return self.client.get(self.url, **headers).status_code
+
+    def test_per_ip_bucket_runs_out(self):
+        self.assertEqual([self.get() for _ in range(4)], [200, 200, 200, 429])
+
+    def test_rate_limit_headers_only_on_throttled_responses(self):
+        responses = [self.client.get(self.url) for _ in range(4)]
+        self.assertFalse(any(r.has_header("X-RateLimit-Remaining") for r in responses[:3]))
+        self.assertEqual(responses[3].status_code, 429)
+        self.assertEqual(responses[3]["X-RateLimit-Remaining"], "0")
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        statuses = [self.get("203.0.113.%d" % n) for n in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_forwarded_for_is_used_behind_a_proxy(self):
+        with override_settings(REST_FRAMEWORK={
+            "DEFAULT_THROTTLE_CLASSES": ["apps.api.throttling.TokenBucketThrottle"],
+            "NUM_PROXIES": 1,
+        }):
+            statuses = [self.get("203.0.113.%d" % n) for n in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 200])
+
+
+class ThrottleScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def expand(self, parent):
+        response = self.client.get("/api/jstree/", {"parent": parent})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_browsing_the_folder_tree_is_not_throttled(self):
+        File.objects.create(title="Plan", file="uploads/2025/01/01/plan.pdf",
+                            file_type="document", category="reports")
+        # Twenty expands: twice what the "all" bucket would allow.
+        for _ in range(5):
+            category = self.expand("#")[0]
+            year = self.expand(category["id"])[0]
+            month = self.expand(year["id"])[0]
+            self.assertEqual([node["text"] for node in self.expand(month["id"])], ["Plan"])
+        # The whole-table endpoints still have their own, smaller bucket.
+        self.assertEqual(self.client.get("/api/all-blogs-contents/").status_code, 200)
+
+
+SIGNED_STORAGES = {
+    **settings.STORAGES,
+    "default": {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": "media", "region_name": "us-east-1", "querystring_auth": True,
+            "access_key": "testing", "secret_key": "testing", "file_overwrite": False,
+        },
+    },
+}
+
+
+@mock_aws
+@override_settings(STORAGES=SIGNED_STORAGES)
+class SignedStorageListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="media")
+        self.file = File.objects.create(title="Plan", file="uploads/2025/01/01/plan.pdf",
+                                        thumbnail="derivatives/plan-320w.webp",
+                                        file_type="document", category="reports")
+
+    def test_lists_link_through_the_stable_redirects(self):
+        response = self.client.get("/api/files/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("s-maxage=86400", response["Cache-Control"])
+        row = response.json()[0]
+        self.assertEqual(row["url"], "/api/files/%d/download/" % self.file.pk)
+        self.assertEqual(row["thumbnail_url"], "/api/files/%d/thumbnail/" % self.file.pk)
+        self.assertNotIn("Signature", response.content.decode())
+
+    def test_redirect_is_cached_for_less_than_the_signature(self):
+        response = self.client.get("/api/files/%d/download/" % self.file.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("Signature=", response["Location"])
+        self.assertIn("max-age=%d" % (settings.MEDIA_SIGNED_URL_EXPIRE // 4), response["Cache-Control"])
+        self.assertNotIn("s-maxage", response["Cache-Control"])
+
+
+# ---------------------------------------------------------------------
+# Lean API profile (nascp_web/settings_api.py)
+# ---------------------------------------------------------------------
+def sample_paths(urlconf):
+    """One concrete path per named route of `urlconf`, parameters filled in."""
+    resolver = get_resolver(urlconf)
+    for name, entries in resolver.reverse_dict.lists():
+        if not isinstance(name, str):
+            continue
+        for possibilities, _pattern, _defaults, converters in entries:
+            for template, params in possibilities:
+                if "format" in params:
+                    continue  # DRF's .json/.api suffix variants
+                yield "/" + template % {
+                    param: "7" if param == "pk" else "annual-report"
+                    for param in params
+                }
+
+
+class ApiProfileTests(SimpleTestCase):
+    def test_resolves_the_same_api_urls_as_the_full_profile(self):
+        api_settings = importlib.import_module("nascp_web.settings_api")
+        paths = sorted(set(sample_paths(api_settings.ROOT_URLCONF)))
+        self.assertIn("/api/files/7/thumbnail/", paths)
+        self.assertIn("/api/related/annual-report/", paths)
+        self.assertIn("/api/fileset/", paths)
+        for path in paths:
+            with self.subTest(path=path):
+                full = resolve(path, urlconf="nascp_web.urls")
+                lean = resolve(path, urlconf=api_settings.ROOT_URLCONF)
+                self.assertEqual((lean.func, lean.url_name, lean.kwargs), (full.func, full.url_name, full.kwargs))
+                # The lean profile must install the app that serves the view.
+                module = getattr(lean.func, "cls", lean.func).__module__
+                app = ".".join(module.split(".")[:2 if module.startswith("apps.") else 1])
+                self.assertTrue(
+                    any(name == app or name.startswith(app + ".") for name in api_settings.INSTALLED_APPS),
+                    "%s is served by %s, which settings_api does not install" % (path, app),
+                )
+
+    def test_serves_nothing_outside_the_api(self):
+        api_settings = importlib.import_module("nascp_web.settings_api")
+        for path in ("/", "/admin/", "/contents/"):
+            with self.assertRaises(Resolver404):
+                resolve(path, urlconf=api_settings.ROOT_URLCONF)
+
+
+class ParseImporttimeTests(SimpleTestCase):
+    def test_sums_self_time_per_top_level_package(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   _io",
+            "import time:       300 |        900 | django",
+            "import time:        50 |         50 |     django.utils.functional",
+            "import time:      1000 |       1000 |       rest_framework.serializers",
+            "Some other warning on stderr",
+            "import time:         7 |          7 | encodings.utf_8",
+        ])
+        total, packages = parse_importtime(stderr)
+        self.assertEqual(total, 1477)
+        self.assertEqual(dict(packages), {"_io": 120, "django": 350, "rest_framework": 1000, "encodings": 7})
+
+    def test_empty_output(self):
+        total, packages = parse_importtime("")
+        self.assertEqual((total, dict(packages)), (0, {}))
+
+
+# ---------------------------------------------------------------------
+# Load generator (apps/api/loadtest.py)
+# ---------------------------------------------------------------------
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers the SPA shell, the API lists and a few odd framings."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if not any(name.lower() == "transfer-encoding" for name, _value in headers):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path == "/":
+            self.send(200, b'<link href="/static/app.css"><script src="/static/app.js"></script>'
+                           b'<img src="https://elsewhere.example/x.png">')
+        elif self.path.startswith("/api/"):
+            data = [{"title": "Report", "thumbnail_url": "/media/thumbs/a.jpg"}]
+            self.send(200, json.dumps(data).encode(), [("Content-Type", "application/json")])
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hello ", b"chunked world"):
+                self.wfile.write(b"%x;ext=1\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\nX-Trailer: 1\r\n\r\n")
+        elif self.path == "/gzip":
+            self.send(200, gzip.compress(b"squeezed"), [("Content-Encoding", "gzip")])
+        elif self.path == "/close":
+            self.send(503, b"bye", [("Connection", "close")])
+            self.close_connection = True
+        elif self.path == "/until-eof":
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"no length")
+            self.close_connection = True
+        else:
+            self.send(200, b"static")
+
+
+class LoadTestTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.paths = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.target = loadtest.Target("http://127.0.0.1:%d" % cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def test_parses_lengths_chunks_gzip_and_closes(self):
+        async def fetch_all():
+            connection = await loadtest.Connection.open(self.target)
+            responses = {}
+            # One keep-alive connection until the server closes it.
+            for path in ("/api/files/", "/chunked", "/gzip", "/close"):
+                response = await connection.get(self.target, path, {"User-Agent": "test"})
+                responses[path] = (response, connection.closed)
+            connection.close()
+            eof = await loadtest.Connection.open(self.target)
+            responses["/until-eof"] = (await eof.get(self.target, "/until-eof", {}), eof.closed)
+            eof.close()
+            return responses
+
+        responses = asyncio.run(fetch_all())
+        api, closed = responses["/api/files/"]
+        self.assertEqual((api.status, api.headers["content-type"], closed), (200, "application/json", False))
+        self.assertEqual(api.json()[0]["title"], "Report")
+        chunked, closed = responses["/chunked"]
+        self.assertEqual((chunked.body, closed), (b"hello chunked world", False))
+        self.assertEqual(responses["/gzip"][0].body, b"squeezed")
+        closing, closed = responses["/close"]
+        self.assertEqual((closing.status, closing.body, closed), (503, b"bye", True))
+        until_eof, closed = responses["/until-eof"]
+        self.assertEqual((until_eof.body, closed), (b"no length", True))
+
+    def test_local_path(self):
+        self.assertEqual(self.target.local_path("/static/a.css?v=2"), "/static/a.css?v=2")
+        self.assertEqual(self.target.local_path(self.target.url + "/media/x.jpg"), "/media/x.jpg")
+        self.assertIsNone(self.target.local_path("https://elsewhere.example/x.png"))
+        with self.assertRaises(ValueError):
+            loadtest.Target("ftp://example.org/")
+
+    def test_percentiles_use_the_nearest_rank(self):
+        ordered = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+        self.assertEqual(loadtest.percentile(ordered, 50), 0.05)
+        self.assertEqual(loadtest.percentile(ordered, 99), 0.099)
+        self.assertEqual(loadtest.percentile(ordered, 100), 0.1)
+        self.assertEqual(loadtest.percentile([0.3, 0.7], 50), 0.3)
+        self.assertEqual(loadtest.percentile([0.3, 0.7], 51), 0.7)
+        self.assertEqual(loadtest.percentile([0.2], 1), 0.2)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_summary(self):
+        stats = loadtest.Stats()
+        stats.record("/api/files/", 0.5, 200)  # before start(): not counted
+        stats.start()
+        for ms in (10, 20, 30, 40):
+            stats.record("/api/files/", ms / 1000, 200, size=100)
+        stats.record("/api/files/", 0.05, 429, size=10)
+        stats.record("shell", 0.2, error="ConnectionResetError")
+        stats.record("page", 0.3, 200)
+        stats.stop()
+        summary = stats.summary()
+        route = summary["routes"]["/api/files/"]
+        self.assertEqual(route["requests"], 5)
+        self.assertEqual(route["statuses"], {"200": 4, "429": 1})
+        self.assertEqual(route["error_types"], {"HTTP 429": 1})
+        self.assertAlmostEqual(route["latency_ms"]["mean"], 30.0)
+        self.assertAlmostEqual(route["latency_ms"]["p50"], 30.0)
+        self.assertAlmostEqual(route["latency_ms"]["p90"], 50.0)
+        self.assertAlmostEqual(route["latency_ms"]["max"], 50.0)
+        self.assertEqual(list(summary["routes"]), ["page", "shell", "/api/files/"])
+        totals = summary["totals"]
+        # Page views are reported apart from the requests they are made of.
+        self.assertEqual((totals["requests"], totals["errors"], totals["bytes"], totals["pages"]), (6, 2, 410, 1))
+
+    def test_run_replays_page_views(self):
+        self.server.paths.clear()
+        options = {
+            "users": 2, "duration": 1.0, "warmup": 0, "ramp": 0, "pages": 2, "think": 0,
+            "media": 5, "connections": 6, "timeout": 5, "forwarded_for": False, "seed": 1,
+            "paths": ["/"],
+        }
+        summary = asyncio.run(loadtest.run(self.target, options, loadtest.Stats()))
+        totals = summary["totals"]
+        self.assertGreaterEqual(totals["pages"], 1)
+        self.assertEqual(totals["errors"], 0)
+        for path in loadtest.spa_paths():
+            self.assertIn(path, summary["routes"])
+        # The shell's assets and the lists' thumbnails are fetched; off-site images never.
+        self.assertIn("/static/app.css", self.server.paths)
+        self.assertIn("/media/thumbs/a.jpg", self.server.paths)
+        self.assertNotIn("/x.png", self.server.paths)
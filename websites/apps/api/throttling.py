@@ -0,0 +1,109 @@
+# apps/api/throttling.py
+"""
+Token-bucket throttling for the public API.
+
+Each request draws one token from two buckets of its scope: one per
+client IP and one shared by every client, so a single scraper hits its own
+limit first and a crowd cannot exceed what PostgreSQL can serve. Buckets
+refill continuously and live in the default cache (LocMem per process,
+Redis when shared), so a decision costs one get_many and one set_many and
+never touches the database.
+
+Scopes come from the URL name:
+
+    top     top_* / latest_* endpoints: small, bounded payloads
+    browse  one call per click or per list row, each an indexed lookup:
+            jstree expands, related items, download/thumbnail redirects
+    all     everything else (all_*, files/, fileset/...): whole tables
+
+API_THROTTLE_BUCKETS sets (capacity, refill per second) per scope. Staff
+users and in-process renders (prerender) are not throttled.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from apps.prerender.renderer import is_render_request
+
+CACHE_PREFIX = "throttle:"
+
+DEFAULT_BUCKETS = {
+    "top": {"ip": (60, 1.0), "global": (1200, 100.0)},
+    "browse": {"ip": (120, 4.0), "global": (2400, 200.0)},
+    "all": {"ip": (10, 0.2), "global": (100, 5.0)},
+}
+BROWSE_NAMES = frozenset(("jstree", "related_contents", "file_download", "file_thumbnail"))
+
+
+def throttle_scope(url_name):
+    if url_name in BROWSE_NAMES:
+        return "browse"
+    if url_name and url_name.startswith(("top_", "latest_")):
+        return "top"
+    return "all"
+
+
+def _refill(state, capacity, rate, now):
+    """Tokens in a bucket last seen as `state` = (tokens, timestamp)."""
+    if state is None:
+        return float(capacity)
+    tokens, last = state
+    return min(float(capacity), tokens + (now - last) * rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle over a per-IP and a global token bucket. The outcome is
+    left on the Django request for RateLimitHeadersMiddleware.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if is_render_request(request._request) or request.user.is_staff:
+            return True
+
+        match = request.resolver_match
+        scope = throttle_scope(match.url_name if match else None)
+        buckets = getattr(settings, "API_THROTTLE_BUCKETS", DEFAULT_BUCKETS)[scope]
+        keys = {
+            "ip": "%s%s:ip:%s" % (CACHE_PREFIX, scope, self.get_ident(request)),
+            "global": "%s%s:global" % (CACHE_PREFIX, scope),
+        }
+        now = time.time()
+        states = cache.get_many(list(keys.values()))
+        tokens = {
+            name: _refill(states.get(key), *buckets[name], now)
+            for name, key in keys.items()
+        }
+
+        ip_capacity, ip_rate = buckets["ip"]
+        short = [name for name in keys if tokens[name] < 1.0]
+        if short:
+            self.wait_seconds = max((1.0 - tokens[name]) / buckets[name][1] for name in short)
+            remaining = tokens["ip"]
+        else:
+            # The cache has no compare-and-set, so concurrent requests may
+            # both spend the same token; the overshoot is bounded by the
+            # number of workers.
+            cache.set_many(
+                {
+                    key: (tokens[name] - 1.0, now)
+                    for name, key in keys.items()
+                },
+                # Expire once the bucket would be full again anyway.
+                timeout=max(math.ceil(buckets[name][0] / buckets[name][1]) for name in keys) + 1,
+            )
+            remaining = tokens["ip"] - 1.0
+
+        request._request.rate_limit = {
+            "limit": ip_capacity,
+            "remaining": max(0, math.floor(remaining)),
+            "reset": math.ceil((ip_capacity - remaining) / ip_rate),
+        }
+        return not short
+
+    def wait(self):
+        return self.wait_seconds
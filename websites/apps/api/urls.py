@@ -1,7 +1,10 @@
 # apps/api/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from apps.file_manager.api_views import FileViewSet
+from apps.file_manager.api_views import (
+    FileViewSet, complete_upload, file_download, file_thumbnail, presign_upload,
+)
+from apps.live.views import events_unavailable
 from .views import FileListAPIView
 from . import views
 
@@ -10,11 +13,20 @@ router = DefaultRouter()
 # which your frontend expects to hit FileListAPIView (the flat JSON with url/thumbnail_url).
 router.register(r'fileset', FileViewSet, basename='fileset')
 
+# Direct-to-bucket uploads (staff only): presign, POST to the bucket, complete.
+upload_patterns = [
+    path('presign/', presign_upload, name='upload_presign'),
+    path('complete/', complete_upload, name='upload_complete'),
+]
+
 urlpatterns = [
     path('', include(router.urls)),
 
     # Function-based endpoints used by your frontend JS -----------------
     path('files/', FileListAPIView, name='api_file_list'),
+    path('files/<int:pk>/download/', file_download, name='file_download'),
+    path('files/<int:pk>/thumbnail/', file_thumbnail, name='file_thumbnail'),
+    path('uploads/', include(upload_patterns)),
 
     # Files (category/type filters)
     path('top-reports-files/', views.top_reports_files, name='top_reports_files'),
@@ -29,6 +41,7 @@ urlpatterns = [
     path('all-video-files/', views.all_video_files, name='all_video_files'),
     path('all-image-files/', views.all_image_files, name='all_image_files'),
     path('all-analysis-files/', views.all_analysis_files, name='all_analysis_files'),
+    path('jstree/', views.jstree, name='jstree'),   # folder tree, lazily by ?parent=
 
     # Content
     path('latest-news-events/', views.latest_news_events, name='latest_news_events'),
@@ -42,4 +55,10 @@ urlpatterns = [
     path('all-events-contents/', views.all_events_contents, name='all_events_contents'),
     path('all-blogs-contents/', views.all_blogs_contents, name='all_blogs_contents'),
     path('all-projects-contents/', views.all_projects_contents, name='all_projects_contents'),
+
+    # Related content (precomputed, apps.related)
+    path('related/<slug:slug>/', views.related_contents, name='related_contents'),
+
+    # Change events (apps.live); the ASGI app answers this path before Django.
+    path('events/', events_unavailable, name='live_events'),
 ]
@@ -1,13 +1,18 @@
 # apps/api/views.py
 from datetime import timedelta
 
-from django.db.models import Q
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dates import MONTHS
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from apps.content_creator.models import Content
-from apps.file_manager.models import File
+from apps.edge_cache.keys import add_surrogate_keys, surrogate_keys
+from apps.file_manager.models import File, FileStream, FolderNode
+from apps.related.models import RelatedItem
 
 
 def get_ordered_values(model, filter_kwargs, ordering, limit=None, values=None):
@@ -26,6 +31,21 @@ def get_ordered_values(model, filter_kwargs, ordering, limit=None, values=None):
     return list(qs)
 
 
+def content_values(qs, *fields):
+    """
+    .values() rows for Content where `body` is the save-time rewritten
+    body_html (lazy/responsive media) once it has been built.
+    """
+    if fields and "body" not in fields:
+        return list(qs.values(*fields))
+    rows = list(qs.values(*fields, "body_html") if fields else qs.values())
+    for row in rows:
+        body_html = row.pop("body_html")
+        if body_html:
+            row["body"] = body_html
+    return rows
+
+
 # -------------------------
 # File serialization helper
 # -------------------------
@@ -35,21 +55,25 @@ def serialize_files(qs):
     Turn File queryset into the exact shape your frontend expects:
     - title
     - file_type
-    - url            (computed from FileField .url)
-    - thumbnail_url  (computed if you have a thumbnail ImageField)
+    - url            (File.download_link: with signed storage the stable
+                      /api/files/<pk>/download/ redirect, because these
+                      lists are edge-cached far longer than a signature)
+    - thumbnail_url  (File.thumbnail_link, likewise)
+    - stream_url     (HLS master playlist of packaged videos, else "")
     - category
     - created_at / updated_at (ISO serialized by DRF)
     """
+    files = list(qs)
+    streams = stream_urls(f.pk for f in files if f.file_type == "video")
     out = []
-    for f in qs:
+    for f in files:
         out.append({
             "id": f.id,
             "title": getattr(f, "title", "") or "",
             "file_type": getattr(f, "file_type", "") or "",
-            "url": (f.file.url if getattr(f, "file", None) else ""),
-            "thumbnail_url": (
-                f.thumbnail.url if getattr(f, "thumbnail", None) else ""
-            ),
+            "url": f.download_link,
+            "thumbnail_url": f.thumbnail_link,
+            "stream_url": streams.get(f.pk, ""),
             "category": getattr(f, "category", "") or "",
             "created_at": f.created_at,
             "updated_at": f.updated_at,
@@ -57,16 +81,31 @@ def serialize_files(qs):
     return out
 
 
+def stream_urls(file_ids):
+    """{file pk: master playlist URL} for the ready streams among `file_ids`."""
+    file_ids = list(file_ids)
+    if not file_ids:
+        return {}
+    return {
+        stream.file_id: stream.url
+        for stream in FileStream.objects.filter(
+            file_id__in=file_ids, status=FileStream.READY
+        ).only("file_id", "status", "playlist")
+    }
+
+
 # -------------------------
 # File-related endpoints
 # -------------------------
 
+@surrogate_keys("files")
 @api_view(['GET'])
 def FileListAPIView(request):
     qs = File.objects.all().order_by("-created_at")
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:reports")
 @api_view(['GET'])
 def top_reports_files(request):
     qs = File.objects.filter(
@@ -75,6 +114,7 @@ def top_reports_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:publications")
 @api_view(['GET'])
 def top_publications_files(request):
     qs = File.objects.filter(
@@ -83,6 +123,7 @@ def top_publications_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:resources")
 @api_view(['GET'])
 def top_resources_files(request):
     qs = File.objects.filter(
@@ -91,6 +132,7 @@ def top_resources_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:analysis")
 @api_view(['GET'])
 def top_analysis_files(request):
     qs = File.objects.filter(
@@ -99,6 +141,7 @@ def top_analysis_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:reports")
 @api_view(['GET'])
 def all_reports_files_by_slug(request):
     qs = File.objects.filter(
@@ -107,6 +150,7 @@ def all_reports_files_by_slug(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:publications")
 @api_view(['GET'])
 def all_publications_files(request):
     qs = File.objects.filter(
@@ -115,6 +159,7 @@ def all_publications_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:category:resources")
 @api_view(['GET'])
 def all_resources_files(request):
     qs = File.objects.filter(
@@ -123,6 +168,7 @@ def all_resources_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:type:video")
 @api_view(['GET'])
 def top_video_files(request):
     qs = File.objects.filter(
@@ -131,6 +177,7 @@ def top_video_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:type:image")
 @api_view(['GET'])
 def top_image_files(request):
     qs = File.objects.filter(
@@ -139,6 +186,7 @@ def top_image_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:type:video")
 @api_view(['GET'])
 def all_video_files(request):
     qs = File.objects.filter(
@@ -147,6 +195,7 @@ def all_video_files(request):
     return Response(serialize_files(qs))
 
 
+@surrogate_keys("files:type:image")
 @api_view(['GET'])
 def all_image_files(request):
     qs = File.objects.filter(
@@ -159,6 +208,7 @@ def all_image_files(request):
 # Content-related endpoints
 # -------------------------
 
+@surrogate_keys("contents:type:news", "contents:type:event")
 @api_view(['GET'])
 def latest_news_events(request):
     """
@@ -167,27 +217,28 @@ def latest_news_events(request):
     """
     cutoff = timezone.now() - timedelta(days=30)
     qs = Content.objects.filter(
-        Q(content_type__in=["news", "event"]),
-        published=True
-    ).filter(
-        Q(published_at__gte=cutoff) | Q(created_at__gte=cutoff)
-    ).order_by("-published_at", "-created_at")
+        content_type__in=["news", "event"],
+        published=True,
+        effective_at__gte=cutoff,
+    ).order_by("-effective_at")
 
     # Keep payload tidy for your carousel:
-    data = list(qs.values("id", "title", "body", "created_at"))
+    data = content_values(qs, "id", "title", "body", "created_at")
     return Response(data)
 
 
+@surrogate_keys("contents:type:department")
 @api_view(['GET'])
 def department_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="department",
+        content_type="department",
         published=True
-    ).order_by("-published_at", "-created_at")
-    data = list(qs.values("id", "title", "slug"))
+    ).order_by("-effective_at")
+    data = content_values(qs, "id", "title", "slug")
     return Response(data)
 
 
+@surrogate_keys("contents:category:analysis")
 @api_view(['GET'])
 def all_analysis_contents(request):
     """
@@ -197,34 +248,38 @@ def all_analysis_contents(request):
     qs = Content.objects.filter(
         category__name__iexact="analysis",
         published=True
-    ).order_by("-published_at", "-created_at")
-    return Response(list(qs.values()))
+    ).order_by("-effective_at")
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:news")
 @api_view(['GET'])
 def top_news_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="news", published=True
-    ).order_by("-published_at", "-created_at")[:4]
-    return Response(list(qs.values()))
+        content_type="news", published=True
+    ).order_by("-effective_at")[:4]
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:event")
 @api_view(['GET'])
 def top_events_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="event", published=True
-    ).order_by("-published_at", "-created_at")[:4]
-    return Response(list(qs.values()))
+        content_type="event", published=True
+    ).order_by("-effective_at")[:4]
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:blog")
 @api_view(['GET'])
 def top_blogs_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="blog", published=True
-    ).order_by("-published_at", "-created_at")[:4]
-    return Response(list(qs.values()))
+        content_type="blog", published=True
+    ).order_by("-effective_at")[:4]
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:category:projects")
 @api_view(['GET'])
 def top_projects_contents(request):
     """
@@ -232,42 +287,47 @@ def top_projects_contents(request):
     """
     qs = Content.objects.filter(
         category__name__iexact="projects", published=True
-    ).order_by("-published_at", "-created_at")[:4]
-    return Response(list(qs.values()))
+    ).order_by("-effective_at")[:4]
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:news")
 @api_view(['GET'])
 def all_news_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="news", published=True
-    ).order_by("-published_at", "-created_at")
-    return Response(list(qs.values()))
+        content_type="news", published=True
+    ).order_by("-effective_at")
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:event")
 @api_view(['GET'])
 def all_events_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="event", published=True
-    ).order_by("-published_at", "-created_at")
-    return Response(list(qs.values()))
+        content_type="event", published=True
+    ).order_by("-effective_at")
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:type:blog")
 @api_view(['GET'])
 def all_blogs_contents(request):
     qs = Content.objects.filter(
-        content_type__iexact="blog", published=True
-    ).order_by("-published_at", "-created_at")
-    return Response(list(qs.values()))
+        content_type="blog", published=True
+    ).order_by("-effective_at")
+    return Response(content_values(qs))
 
 
+@surrogate_keys("contents:category:projects")
 @api_view(['GET'])
 def all_projects_contents(request):
     qs = Content.objects.filter(
         category__name__iexact="projects", published=True
-    ).order_by("-published_at", "-created_at")
-    return Response(list(qs.values()))
+    ).order_by("-effective_at")
+    return Response(content_values(qs))
 
 
+@surrogate_keys("files:category:analysis")
 @api_view(['GET'])
 def all_analysis_files(request):
     """
@@ -277,3 +337,99 @@ def all_analysis_files(request):
         category__iexact="analysis"
     ).order_by("-updated_at", "-created_at")
     return Response(serialize_files(qs))
+
+
+# -------------------------
+# Folder tree (jsTree)
+# -------------------------
+
+def folder_node(node):
+    if node.kind == FolderNode.MONTH:
+        label = MONTHS.get(int(node.name), node.name)
+    elif node.kind == FolderNode.CATEGORY:
+        label = node.name or getattr(settings, "FOLDER_TREE_UNCATEGORISED", "Uncategorised")
+    else:
+        label = node.name
+    return {
+        "id": "%s-%d" % (node.kind, node.pk),
+        "text": "%s (%d)" % (label, node.file_count),
+        "children": True,
+        "type": "default",
+        "data": {"kind": node.kind, "count": node.file_count},
+    }
+
+
+@surrogate_keys("files")
+@api_view(['GET'])
+def jstree(request):
+    """
+    jsTree lazy-loading endpoint (core.data.url, `parent` = node id, "#"
+    for the top level) over the folder tree (apps/file_manager/folders.py):
+    categories, then years, then months, then that month's Files. Each
+    call is one indexed query.
+    """
+    parent = request.GET.get("parent", "#")
+    if parent == "#":
+        nodes = FolderNode.objects.filter(parent__isnull=True, file_count__gt=0).order_by("name")
+        return Response([folder_node(node) for node in nodes])
+
+    kind, _, pk = parent.partition("-")
+    if not pk.isdigit() or kind not in (FolderNode.CATEGORY, FolderNode.YEAR, FolderNode.MONTH):
+        raise Http404("Unknown tree node.")
+    if kind != FolderNode.MONTH:
+        # Newest years and months first.
+        nodes = FolderNode.objects.filter(parent_id=pk, file_count__gt=0).order_by("-name")
+        return Response([folder_node(node) for node in nodes])
+
+    limit = getattr(settings, "FOLDER_TREE_MAX_FILES", 200)
+    files = list(
+        File.objects.filter(folder_id=pk).order_by("title", "id").only("title", "file_type")[:limit + 1]
+    )
+    out = [
+        {
+            "id": "file-%d" % f.pk,
+            "text": f.title,
+            "children": False,
+            "type": "file",
+            "a_attr": {"href": f.get_absolute_url()},
+            "data": {"file_type": f.file_type},
+        }
+        for f in files[:limit]
+    ]
+    if len(files) > limit:
+        out.append({
+            "id": "more-%s" % pk, "text": "More files in the file browser…", "children": False,
+            "type": "file", "a_attr": {"href": reverse("file_manager:file_list")},
+        })
+    return Response(out)
+
+
+# -------------------------
+# Related content
+# -------------------------
+
+@api_view(['GET'])
+def related_contents(request, slug):
+    """
+    Precomputed neighbours of a published Content (apps.related), best
+    first: one indexed query, no similarity work per request.
+    """
+    items = list(RelatedItem.objects.for_slug(slug))
+    if items:
+        content_id = items[0].content_id
+    else:
+        content_id = Content.objects.filter(slug=slug, published=True).values_list('pk', flat=True).first()
+        if content_id is None:
+            raise Http404('No published content with this slug.')
+    add_surrogate_keys(request, 'related', 'related:%s' % content_id)
+    return Response([
+        {
+            "kind": item.kind,
+            "id": item.target.pk,
+            "title": item.target.title,
+            "slug": item.related_content.slug if item.related_content_id else None,
+            "url": item.url,
+            "score": round(item.score, 4),
+        }
+        for item in items
+    ])
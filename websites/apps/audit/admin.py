@@ -1,12 +1,17 @@
 from django.contrib import admin
-from .models import AuditLog
+from nascp_web.changelist import AutocompleteFilter, ScalableAdminMixin
+from nascp_web.search import TrigramSearchAdminMixin
+from .models import AuditLog, AuditTrafficCount
 
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ('action', 'user', 'ip_address', 'path', 'timestamp')
-    list_filter = ('action', 'timestamp', 'user')
-    search_fields = ('user__username', 'ip_address', 'path')
-    readonly_fields = ('user', 'action', 'ip_address', 'path', 'user_agent', 'timestamp', 'additional_data')
+class AuditLogAdmin(ScalableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
+    list_display = ('action', 'user', 'ip_address', 'path', 'traffic_class', 'sample_rate', 'timestamp')
+    list_select_related = ('user', 'path')
+    # Pick the user through autocomplete rather than a link per user.
+    list_filter = ('action', 'traffic_class', 'timestamp', ('user', AutocompleteFilter))
+    # Each has a trigram index; ip_address on UPPER(HOST(ip_address)), the inet form.
+    search_fields = ('user__username', 'ip_address', 'path__value')
+    readonly_fields = ('user', 'action', 'ip_address', 'path', 'user_agent', 'traffic_class', 'sample_rate', 'timestamp', 'additional_data')
 
     # Disable adding new audit logs through admin.
     def has_add_permission(self, request):
@@ -19,3 +24,18 @@ class AuditLogAdmin(admin.ModelAdmin):
     # Disable deleting audit logs.
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(AuditTrafficCount)
+class AuditTrafficCountAdmin(admin.ModelAdmin):
+    list_display = ('day', 'traffic_class', 'requests', 'logged')
+    list_filter = ('traffic_class', 'day')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,176 @@
+# apps/audit/classify.py
+"""
+Request classification and sampling for AuditMiddleware.
+
+Every request gets a traffic class:
+
+    skip      never logged or counted (AUDIT_PATH_RULES, e.g. /static/)
+    bot       crawlers, scripts and empty user agents
+    monitor   uptime checks and load-balancer probes
+    <rule>    the class of the first matching AUDIT_PATH_RULES prefix
+              ('api', 'asset', 'feed', ...)
+    human     everything else
+
+Bot and monitor agents win over path rules: a crawler fetching /api/ is
+still a crawler. Each class is then logged with probability
+AUDIT_SAMPLE_RATES[class] and the applied rate is stored on the row, so a
+rollup weighting each row by 1 / sample_rate estimates the true volume.
+Every classified request is also counted exactly in AuditTrafficCount;
+counts are buffered per process and written once per
+AUDIT_COUNT_FLUSH_SECONDS, and once more when the process exits.
+"""
+import atexit
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH_RULES = (
+    ("/static/", "skip"),
+    ("/sitemap", "feed"),
+    ("/feeds/", "feed"),
+    ("/media/", "asset"),
+    ("/favicon.ico", "asset"),
+    ("/robots.txt", "bot"),
+    ("/api/", "api"),
+)
+DEFAULT_SAMPLE_RATES = {
+    "human": 1.0,
+    "api": 0.1,
+    "asset": 0.01,
+    "feed": 0.0,
+    "bot": 0.05,
+    "monitor": 0.0,
+}
+
+MONITOR_AGENTS = re.compile(
+    r"uptimerobot|pingdom|statuscake|site24x7|kube-probe|elb-healthchecker|"
+    r"googlehc|health.?check|nagios|zabbix|datadog|newrelicpinger",
+    re.IGNORECASE,
+)
+BOT_AGENTS = re.compile(
+    r"bot\b|bot/|crawl|spider|slurp|archiver|facebookexternalhit|embedly|"
+    r"preview|headless|phantomjs|lighthouse|curl/|wget/|python-|aiohttp|"
+    r"httpclient|okhttp|go-http-client|java/|libwww|scrapy|feedfetcher|"
+    r"feedly|rss|\+https?://",
+    re.IGNORECASE,
+)
+# Longer strings are cut before parsing; nothing we match sits past this.
+UA_PARSE_LENGTH = 512
+
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(user_agent):
+    """'bot', 'monitor' or 'human' for a (truncated) User-Agent string."""
+    if not user_agent:
+        return "bot"
+    if MONITOR_AGENTS.search(user_agent):
+        return "monitor"
+    if BOT_AGENTS.search(user_agent):
+        return "bot"
+    return "human"
+
+
+def path_rules():
+    return getattr(settings, "AUDIT_PATH_RULES", DEFAULT_PATH_RULES)
+
+
+def sample_rate(traffic_class):
+    rates = getattr(settings, "AUDIT_SAMPLE_RATES", DEFAULT_SAMPLE_RATES)
+    return float(rates.get(traffic_class, 1.0))
+
+
+def classify(path, user_agent):
+    """Traffic class for a request; see the module docstring."""
+    rule_class = next(
+        (traffic_class for prefix, traffic_class in path_rules() if path.startswith(prefix)),
+        None,
+    )
+    if rule_class == "skip":
+        return "skip"
+    agent_class = classify_user_agent((user_agent or "")[:UA_PARSE_LENGTH])
+    if agent_class != "human":
+        return agent_class
+    return rule_class or "human"
+
+
+def sample(traffic_class):
+    """The rate to record if this request should be logged, else None."""
+    rate = sample_rate(traffic_class)
+    if rate >= 1.0:
+        return 1.0
+    if rate > 0.0 and random.random() < rate:
+        return rate
+    return None
+
+
+# ---------------------------------------------------------------------
+# Exact per-class counts
+# ---------------------------------------------------------------------
+class TrafficCounter:
+    """Per-process buffer of (day, class) -> requests, flushed periodically."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.last_flush = time.monotonic()
+
+    def add(self, traffic_class, logged):
+        key = (timezone.localdate(), traffic_class)
+        with self.lock:
+            self.counts[key + ("requests",)] += 1
+            if logged:
+                self.counts[key + ("logged",)] += 1
+            due = time.monotonic() - self.last_flush >= getattr(
+                settings, "AUDIT_COUNT_FLUSH_SECONDS", 60
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        totals = {}
+        for (day, traffic_class, field), value in counts.items():
+            totals.setdefault((day, traffic_class), {"requests": 0, "logged": 0})[field] = value
+        for (day, traffic_class), values in totals.items():
+            _increment(day, traffic_class, **values)
+
+
+def _increment(day, traffic_class, requests, logged):
+    from .models import AuditTrafficCount
+
+    rows = AuditTrafficCount.objects.filter(day=day, traffic_class=traffic_class)
+    if rows.update(requests=F("requests") + requests, logged=F("logged") + logged):
+        return
+    try:
+        with transaction.atomic():
+            AuditTrafficCount.objects.create(
+                day=day, traffic_class=traffic_class, requests=requests, logged=logged
+            )
+    except IntegrityError:
+        # Another process created the row first.
+        rows.update(requests=F("requests") + requests, logged=F("logged") + logged)
+
+
+counter = TrafficCounter()
+
+
+@atexit.register
+def flush_at_exit():
+    """Write the last interval, which no later request would flush."""
+    try:
+        counter.flush()
+    except Exception:
+        logger.exception("Could not flush audit traffic counts at exit")
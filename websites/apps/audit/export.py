@@ -0,0 +1,120 @@
+# apps/audit/export.py
+"""
+Streaming AuditLog export for auditors.
+
+Rows are read through a server-side cursor (`QuerySet.iterator`) as plain
+tuples and encoded chunk by chunk, so memory use stays flat however many
+months are requested. Two formats:
+
+    csv        header row + one row per entry; text cells a spreadsheet
+               would read as a formula (=, +, -, @) get a leading '
+    jsonl.gz   one JSON object per line, gzip-compressed as it streams
+
+Used by the staff-only /audit/export/ view and `manage.py export_audit`.
+"""
+import csv
+import datetime
+import json
+import zlib
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import AuditLog
+
+COLUMNS = (
+    ("id", "id"),
+    ("timestamp", "timestamp"),
+    ("action", "action"),
+    ("user", "user__username"),
+    ("ip_address", "ip_address"),
+    ("path", "path__value"),
+    ("user_agent", "user_agent__value"),
+    ("traffic_class", "traffic_class"),
+    ("sample_rate", "sample_rate"),
+    ("additional_data", "additional_data"),
+)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl.gz": ("application/gzip", "jsonl.gz"),
+}
+# Rows fetched per round trip and encoded per yielded chunk.
+CHUNK_SIZE = 2000
+# Leading characters that make Excel/LibreOffice evaluate a cell.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_rows(start, end, actions=None):
+    """
+    (column values...) for entries from `start` through `end` (dates,
+    inclusive), oldest first, optionally limited to `actions`.
+    """
+    tz = timezone.get_current_timezone()
+    qs = AuditLog.objects.filter(
+        timestamp__gte=datetime.datetime.combine(start, datetime.time.min, tz),
+        timestamp__lt=datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tz),
+    )
+    if actions:
+        qs = qs.filter(action__in=actions)
+    return qs.order_by("timestamp", "id").values_list(
+        *(lookup for _name, lookup in COLUMNS)
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_cell(value):
+    """`value` as written to the CSV, defused if it could run as a formula."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _lookup in COLUMNS])
+    for batch in _batches(rows):
+        for row in batch:
+            writer.writerow(csv_cell(value) for value in row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def jsonl_gzip_chunks(rows):
+    names = [name for name, _lookup in COLUMNS]
+    # wbits=31: zlib writes a gzip header and trailer.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for batch in _batches(rows):
+        lines = "".join(
+            json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n" for row in batch
+        )
+        chunk = compressor.compress(lines.encode())
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def export_chunks(fmt, start, end, actions=None):
+    """Encoded byte chunks of the export in `fmt` (a FORMATS key)."""
+    rows = export_rows(start, end, actions)
+    return csv_chunks(rows) if fmt == "csv" else jsonl_gzip_chunks(rows)
+
+
+def export_filename(fmt, start, end):
+    return "audit-%s-%s.%s" % (start.isoformat(), end.isoformat(), FORMATS[fmt][1])
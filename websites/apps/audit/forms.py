@@ -0,0 +1,19 @@
+from django import forms
+
+from .export import FORMATS
+from .models import AuditLog
+
+class AuditExportForm(forms.Form):
+    """Query parameters of /audit/export/ (GET)."""
+    start = forms.DateField()
+    end = forms.DateField()
+    action = forms.MultipleChoiceField(choices=AuditLog.ACTION_CHOICES, required=False)
+    format = forms.ChoiceField(choices=[(fmt, fmt) for fmt in FORMATS], required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and start > end:
+            raise forms.ValidationError('start must not be after end.')
+        cleaned_data['format'] = cleaned_data.get('format') or 'csv'
+        return cleaned_data
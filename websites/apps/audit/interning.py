@@ -0,0 +1,69 @@
+# apps/audit/interning.py
+"""
+String -> id interning for AuditLog.path and AuditLog.user_agent.
+
+There are only a few thousand distinct paths and agents, so each process
+keeps a dict of the ids it has seen and an AuditLog insert normally costs
+no extra query. A miss does one indexed lookup and, for a new value, one
+insert.
+"""
+import threading
+
+from django.db import IntegrityError, transaction
+
+from .models import AuditPath, AuditUserAgent, user_agent_digest
+
+# Entries per process before the dict is dropped and refilled.
+MAX_CACHED = 20_000
+
+
+class Interner:
+    def __init__(self, model, key_field, key_for, max_length=None):
+        self.model = model
+        self.key_field = key_field
+        self.key_for = key_for
+        self.max_length = max_length
+        self.ids = {}
+        self.lock = threading.Lock()
+
+    def id_for(self, value):
+        """Id of the row holding `value`, creating it if needed. None for empty values."""
+        if not value:
+            return None
+        if self.max_length:
+            value = value[:self.max_length]
+        cached = self.ids.get(value)
+        if cached is not None:
+            return cached
+
+        lookup = {self.key_field: self.key_for(value)}
+        pk = self.model.objects.filter(**lookup).values_list('pk', flat=True).first()
+        if pk is not None:
+            self.remember(value, pk)
+            return pk
+        try:
+            with transaction.atomic():
+                pk = self.model.objects.create(value=value).pk
+        except IntegrityError:
+            # Another process inserted it between our lookup and insert.
+            return self.model.objects.filter(**lookup).values_list('pk', flat=True).get()
+        # Only cache ids of committed rows; a rolled-back insert must not stick.
+        transaction.on_commit(lambda: self.remember(value, pk))
+        return pk
+
+    def remember(self, value, pk):
+        with self.lock:
+            if len(self.ids) >= MAX_CACHED:
+                self.ids.clear()
+            self.ids[value] = pk
+
+    def clear(self):
+        with self.lock:
+            self.ids.clear()
+
+
+paths = Interner(
+    AuditPath, 'value', lambda value: value,
+    max_length=AuditPath._meta.get_field('value').max_length,
+)
+user_agents = Interner(AuditUserAgent, 'digest', user_agent_digest)
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.audit.export import FORMATS, export_chunks
+from apps.audit.forms import AuditExportForm
+
+
+class Command(BaseCommand):
+    help = "Stream AuditLog rows for a date range as CSV or gzip'd JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First day, YYYY-MM-DD.")
+        parser.add_argument("--end", required=True, help="Last day (inclusive), YYYY-MM-DD.")
+        parser.add_argument(
+            "--action", action="append", default=[],
+            help="Only this action; repeat for several (default: all).",
+        )
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument(
+            "--output", "-o", default="-",
+            help="File to write (default: stdout).",
+        )
+
+    def handle(self, *args, **options):
+        form = AuditExportForm({
+            "start": options["start"],
+            "end": options["end"],
+            "action": options["action"],
+            "format": options["format"],
+        })
+        if not form.is_valid():
+            raise CommandError(
+                "; ".join("%s: %s" % (field, " ".join(errors)) for field, errors in form.errors.items())
+            )
+        data = form.cleaned_data
+        chunks = export_chunks(data["format"], data["start"], data["end"], data["action"])
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+        written = 0
+        with open(options["output"], "wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                written += len(chunk)
+        self.stderr.write(self.style.SUCCESS("Wrote %d bytes to %s." % (written, options["output"])))
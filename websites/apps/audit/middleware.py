@@ -1,23 +1,36 @@
+from apps.prerender.renderer import is_render_request
+from .classify import classify, counter, sample
 from .models import AuditLog
 
 class AuditMiddleware:
     """
     Middleware to log page views for GET requests.
-    It skips static files to reduce noise.
+    Requests are classified (human, bot, api, asset, ...) and each class is
+    sampled at its AUDIT_SAMPLE_RATES rate; see apps/audit/classify.py.
     """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
-        
-        if request.method == "GET" and not request.path.startswith('/static/'):
-            # Log the page view after processing the response.
-            AuditLog.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                action='page_view',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                path=request.path,
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            )
+
+        if request.method == "GET" and not is_render_request(request):
+            user_agent = request.META.get('HTTP_USER_AGENT', '')
+            traffic_class = classify(request.path, user_agent)
+            if traffic_class != 'skip':
+                rate = sample(traffic_class)
+                if rate is not None:
+                    user = getattr(request, 'user', None)
+                    # Log the page view after processing the response.
+                    AuditLog.objects.log(
+                        # No request.user on the light chain (nascp_web/handlers.py).
+                        user=user if user is not None and user.is_authenticated else None,
+                        action='page_view',
+                        ip_address=request.META.get('REMOTE_ADDR'),
+                        path=request.path,
+                        user_agent=user_agent,
+                        traffic_class=traffic_class,
+                        sample_rate=rate,
+                    )
+                counter.add(traffic_class, logged=rate is not None)
         return response
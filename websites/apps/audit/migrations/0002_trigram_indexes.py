@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from nascp_web.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        trigram_indexes('audit_auditlog', 'path'),
+    ]
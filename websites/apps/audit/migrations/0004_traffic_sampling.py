@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='sample_rate',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='traffic_class',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.CreateModel(
+            name='AuditTrafficCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('traffic_class', models.CharField(max_length=16)),
+                ('requests', models.PositiveBigIntegerField(default=0)),
+                ('logged', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-day', 'traffic_class'),
+                'constraints': [models.UniqueConstraint(fields=('day', 'traffic_class'), name='audit_traffic_day_class_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,109 @@
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from nascp_web.search import trigram_indexes
+
+
+BATCH_SIZE = 5000
+JOIN_UPDATE = 'UPDATE {log} SET {target} = {lookup}.{source} FROM {lookup} WHERE {log}.{match} = {lookup}.{key}'
+
+
+def _join_update(schema_editor, **names):
+    """One UPDATE ... FROM over the whole log instead of one UPDATE per value."""
+    quote = schema_editor.quote_name
+    schema_editor.execute(JOIN_UPDATE.format(**{part: quote(name) for part, name in names.items()}))
+
+
+def intern_strings(apps, schema_editor):
+    """Point every AuditLog at its AuditPath / AuditUserAgent row."""
+    AuditLog = apps.get_model('audit', 'AuditLog')
+    AuditPath = apps.get_model('audit', 'AuditPath')
+    AuditUserAgent = apps.get_model('audit', 'AuditUserAgent')
+    log = AuditLog._meta.db_table
+    quote = schema_editor.quote_name
+
+    schema_editor.execute(
+        'INSERT INTO %s (value) SELECT DISTINCT path FROM %s WHERE path IS NOT NULL AND path <> %%s'
+        % (quote(AuditPath._meta.db_table), quote(log)),
+        [''],
+    )
+    _join_update(
+        schema_editor, log=log, lookup=AuditPath._meta.db_table,
+        target='path_ref_id', source='id', match='path', key='value',
+    )
+
+    # The digest is computed here, so agents go in through bulk_create.
+    agents = (
+        AuditLog.objects.exclude(user_agent__isnull=True).exclude(user_agent='')
+        .order_by().values_list('user_agent', flat=True).distinct()
+    )
+    batch = []
+    for value in agents.iterator(chunk_size=BATCH_SIZE):
+        batch.append(AuditUserAgent(value=value, digest=hashlib.sha1(value.encode()).hexdigest()))
+        if len(batch) >= BATCH_SIZE:
+            AuditUserAgent.objects.bulk_create(batch)
+            batch = []
+    AuditUserAgent.objects.bulk_create(batch)
+    _join_update(
+        schema_editor, log=log, lookup=AuditUserAgent._meta.db_table,
+        target='user_agent_ref_id', source='id', match='user_agent', key='value',
+    )
+
+
+def restore_strings(apps, schema_editor):
+    AuditLog = apps.get_model('audit', 'AuditLog')
+    AuditPath = apps.get_model('audit', 'AuditPath')
+    AuditUserAgent = apps.get_model('audit', 'AuditUserAgent')
+    log = AuditLog._meta.db_table
+    _join_update(
+        schema_editor, log=log, lookup=AuditPath._meta.db_table,
+        target='path', source='value', match='path_ref_id', key='id',
+    )
+    _join_update(
+        schema_editor, log=log, lookup=AuditUserAgent._meta.db_table,
+        target='user_agent', source='value', match='user_agent_ref_id', key='id',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_traffic_sampling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditUserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.TextField()),
+                ('digest', models.CharField(editable=False, max_length=40, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='path_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='audit.auditpath'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='user_agent_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='audit.audituseragent'),
+        ),
+        migrations.RunPython(intern_strings, restore_strings),
+        # Dropping the column also drops its trigram index (0002).
+        migrations.RemoveField(model_name='auditlog', name='path'),
+        migrations.RemoveField(model_name='auditlog', name='user_agent'),
+        migrations.RenameField(model_name='auditlog', old_name='path_ref', new_name='path'),
+        migrations.RenameField(model_name='auditlog', old_name='user_agent_ref', new_name='user_agent'),
+        trigram_indexes('audit_auditpath', 'value'),
+    ]
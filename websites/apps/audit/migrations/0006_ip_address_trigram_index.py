@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from nascp_web.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_intern_path_user_agent'),
+    ]
+
+    operations = [
+        # icontains on an inet column compares UPPER(HOST(ip_address)).
+        trigram_indexes('audit_auditlog', 'ip_address', cast='HOST("%s")'),
+    ]
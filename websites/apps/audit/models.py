@@ -1,8 +1,52 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def user_agent_digest(value):
+    """Unique key for a User-Agent; the text itself is too long to index."""
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+class AuditPath(models.Model):
+    """Distinct request paths, referenced by AuditLog.path."""
+    value = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.value
+
+
+class AuditUserAgent(models.Model):
+    """Distinct User-Agent strings, referenced by AuditLog.user_agent."""
+    value = models.TextField()
+    digest = models.CharField(max_length=40, unique=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.digest = user_agent_digest(self.value)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.value
+
+
+class AuditLogManager(models.Manager):
+    def log(self, path=None, user_agent=None, **fields):
+        """
+        Create an AuditLog from plain `path` / `user_agent` strings, which
+        are interned into AuditPath / AuditUserAgent (apps/audit/interning.py).
+        """
+        from .interning import paths, user_agents
+
+        return self.create(
+            path_id=paths.id_for(path),
+            user_agent_id=user_agents.id_for(user_agent),
+            **fields,
+        )
+
+
 class AuditLog(models.Model):
     ACTION_CHOICES = (
         ('login', 'Login'),
@@ -21,13 +65,38 @@ class AuditLog(models.Model):
     )
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    path = models.CharField(max_length=255, null=True, blank=True)
-    user_agent = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Interned strings: rows carry small integer keys, not repeated text.
+    path = models.ForeignKey(AuditPath, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    user_agent = models.ForeignKey(AuditUserAgent, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
+    # Indexed: the admin changelist and dashboards read newest-first.
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     additional_data = models.JSONField(null=True, blank=True)
+    # Set by AuditMiddleware (apps/audit/classify.py). Page views are
+    # sampled per class, so each row stands for 1 / sample_rate requests.
+    traffic_class = models.CharField(max_length=16, blank=True, default='')
+    sample_rate = models.FloatField(default=1.0)
+
+    objects = AuditLogManager()
 
     class Meta:
         ordering = ('-timestamp',)
 
     def __str__(self):
         return f"{self.get_action_display()} by {self.user or 'Anonymous'} at {self.timestamp}"
+
+
+class AuditTrafficCount(models.Model):
+    """Exact request totals per day and traffic class, sampled or not."""
+    day = models.DateField()
+    traffic_class = models.CharField(max_length=16)
+    requests = models.PositiveBigIntegerField(default=0)
+    logged = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-day', 'traffic_class')
+        constraints = [
+            models.UniqueConstraint(fields=('day', 'traffic_class'), name='audit_traffic_day_class_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.traffic_class}: {self.requests}"
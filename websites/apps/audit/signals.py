@@ -5,7 +5,7 @@ from .models import AuditLog
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     ip = request.META.get('REMOTE_ADDR')
-    AuditLog.objects.create(
+    AuditLog.objects.log(
         user=user,
         action='login',
         ip_address=ip,
@@ -16,7 +16,7 @@ def log_user_login(sender, request, user, **kwargs):
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
     ip = request.META.get('REMOTE_ADDR')
-    AuditLog.objects.create(
+    AuditLog.objects.log(
         user=user,
         action='logout',
         ip_address=ip,
@@ -27,7 +27,7 @@ def log_user_logout(sender, request, user, **kwargs):
 @receiver(user_login_failed)
 def log_user_login_failed(sender, credentials, request, **kwargs):
     ip = request.META.get('REMOTE_ADDR')
-    AuditLog.objects.create(
+    AuditLog.objects.log(
         user=None,
         action='failed_login',
         ip_address=ip,
@@ -1,3 +1,55 @@
-from django.test import TestCase
+from django.contrib import admin
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from . import classify, export
+from .models import AuditLog, AuditPath, AuditTrafficCount
+
+
+@override_settings(AUDIT_COUNT_FLUSH_SECONDS=3600)
+class TrafficCounterTests(TestCase):
+    def test_counts_wait_for_the_interval(self):
+        counter = classify.TrafficCounter()
+        counter.add("human", logged=True)
+        counter.add("human", logged=False)
+        self.assertFalse(AuditTrafficCount.objects.exists())
+
+        counter.flush()
+        row = AuditTrafficCount.objects.get(day=timezone.localdate(), traffic_class="human")
+        self.assertEqual((row.requests, row.logged), (2, 1))
+
+    def test_exit_flushes_the_last_interval(self):
+        # Drop what earlier tests' requests left in the process-wide buffer.
+        classify.counter.flush()
+        AuditTrafficCount.objects.all().delete()
+        classify.counter.add("bot", logged=False)
+        classify.flush_at_exit()
+        self.assertEqual(AuditTrafficCount.objects.get(traffic_class="bot").requests, 1)
+
+
+class CsvExportTests(TestCase):
+    def test_formula_cells_are_defused(self):
+        rows = [(1, "=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "/ok", {"a": 1}, -0.5)]
+        body = b"".join(export.csv_chunks(rows)).decode()
+        self.assertEqual(
+            body.splitlines()[1],
+            '1,"\'=HYPERLINK(""http://x"")",\'+1,\'-2,\'@SUM(A1),/ok,"{""a"": 1}",-0.5',
+        )
+
+
+class AuditLogSearchTests(TestCase):
+    def test_matches_addresses_and_paths_by_substring(self):
+        downloads = AuditPath.objects.create(value="/files/42/download/")
+        first = AuditLog.objects.create(action="page_view", ip_address="10.1.2.3", path=downloads)
+        AuditLog.objects.create(action="page_view", ip_address="192.168.1.20")
+        AuditLog.objects.create(action="page_view", ip_address="2001:db8::1")
+        model_admin = admin.site._registry[AuditLog]
+
+        def search(term):
+            queryset, _duplicates = model_admin.get_search_results(None, AuditLog.objects.all(), term)
+            return sorted(queryset.values_list("ip_address", flat=True))
+
+        self.assertEqual(search("10.1.2"), ["10.1.2.3"])
+        self.assertEqual(search("168.1"), ["192.168.1.20"])
+        self.assertEqual(search("DB8::"), ["2001:db8::1"])
+        self.assertEqual(search("download"), [first.ip_address])
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import AuditDashboardView
+from .views import AuditDashboardView, AuditExportView
 
 app_name = 'audit'
 
 urlpatterns = [
     path('dashboard/', AuditDashboardView.as_view(), name='dashboard'),
+    path('export/', AuditExportView.as_view(), name='export'),
 ]
@@ -1,16 +1,22 @@
-from django.views.generic import TemplateView
-from django.db.models import Count
-from .models import AuditLog
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.generic import TemplateView, View
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Round
+from apps.users.views import AdminRequiredMixin
+from .export import FORMATS, export_chunks, export_filename
+from .forms import AuditExportForm
+from .models import AuditLog, AuditTrafficCount
 
 class AuditDashboardView(TemplateView):
     template_name = 'audit/dashboard.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Aggregate page views grouped by path
+        # Aggregate page views grouped by path; sampled rows are weighted
+        # by 1 / sample_rate so the totals estimate every request.
         page_views = AuditLog.objects.filter(action='page_view') \
-            .values('path') \
-            .annotate(count=Count('id')) \
+            .values('path__value') \
+            .annotate(count=Round(Sum(1.0 / F('sample_rate'), output_field=FloatField()))) \
             .order_by('-count')
         # Count unique visitor IPs for page views
         total_visitors = AuditLog.objects.filter(action='page_view') \
@@ -18,5 +24,29 @@ class AuditDashboardView(TemplateView):
             .distinct() \
             .count()
         context['page_views'] = page_views
+        context['traffic'] = AuditTrafficCount.objects.values('traffic_class') \
+            .annotate(requests=Sum('requests'), logged=Sum('logged')) \
+            .order_by('-requests')
         context['total_visitors'] = total_visitors
         return context
+
+
+class AuditExportView(AdminRequiredMixin, View):
+    """
+    Staff-only streaming export:
+    /audit/export/?start=2025-01-01&end=2025-03-31&action=login&format=jsonl.gz
+    """
+    def get(self, request):
+        form = AuditExportForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        data = form.cleaned_data
+        fmt = data['format']
+        response = StreamingHttpResponse(
+            export_chunks(fmt, data['start'], data['end'], data['action']),
+            content_type=FORMATS[fmt][0],
+        )
+        response['Content-Disposition'] = 'attachment; filename="%s"' % export_filename(
+            fmt, data['start'], data['end']
+        )
+        return response
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from nascp_web.changelist import AutocompleteFilter, ScalableAdminMixin
+from nascp_web.search import TrigramSearchAdminMixin
 from .models import Category, Content
 from .forms import ContentForm, CategoryForm
 
@@ -10,10 +12,11 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 @admin.register(Content)
-class ContentAdmin(admin.ModelAdmin):
+class ContentAdmin(ScalableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     form = ContentForm
     list_display  = ("title", "content_type", "category", "published", "published_at", "created_at")
-    list_filter   = ("content_type", "published", "category")
+    list_select_related = ("category",)
+    list_filter   = ("content_type", "published", ("category", AutocompleteFilter))
     search_fields = ("title", "body")
     prepopulated_fields = {"slug": ("title",)}
     date_hierarchy = "published_at"
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ContentCreatorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.content_creator'
+
+    def ready(self):
+        import apps.content_creator.signals  # noqa
@@ -0,0 +1,49 @@
+# apps/content_creator/cache.py
+"""
+Version counter for content_creator fragment caches.
+
+Every cached list/detail fragment includes `content_version()` in its key.
+Saving or deleting a Content or Category bumps the counter (see signals.py),
+so all stale fragments miss at once without enumerating their keys.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+VERSION_KEY = "content_creator:version"
+
+
+def fragment_timeout():
+    return getattr(settings, "CONTENT_FRAGMENT_CACHE_TIMEOUT", 600)
+
+
+def content_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def bump_content_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that remembers COUNT(*) until the content version changes.
+    Pass `count_key` identifying the queryset (e.g. the view name).
+    """
+
+    def __init__(self, *args, count_key, **kwargs):
+        self.count_key = count_key
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        key = "content_creator:count:%s:%s" % (self.count_key, content_version())
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, fragment_timeout())
+        return count
@@ -0,0 +1,289 @@
+# apps/content_creator/images.py
+"""
+Post-upload image processing for CKEditor uploads.
+
+For an upload saved at  uploads/2025/03/01/photo.jpg  we keep:
+
+    uploads/2025/03/01/photo.jpg            fallback the editor embeds: EXIF
+                                            stripped, capped at
+                                            CKEDITOR_IMAGE_MAX_DIMENSION,
+                                            JPEG (PNG if it has transparency)
+    originals/uploads/2025/03/01/photo.jpg  the untouched upload
+    derivatives/uploads/2025/03/01/photo.webp
+    derivatives/uploads/2025/03/01/photo.avif
+    derivatives/uploads/2025/03/01/photo-480w.jpg
+    derivatives/uploads/2025/03/01/photo.json
+                                            width-capped copies behind
+                                            `srcset` and their manifest,
+                                            made by a background job
+
+Enabled through CKEDITOR_IMAGE_BACKEND; `manage.py optimize_uploads`
+applies the same processing to files uploaded before it existed.
+"""
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageCms, ImageOps, features
+
+from ckeditor_uploader.backends import PillowBackend
+
+# Formats we re-encode in place when reprocessing existing uploads.
+REPROCESSABLE = {"JPEG", "PNG", "WEBP"}
+ALPHA_MODES = {"RGBA", "LA", "PA"}
+# File extension -> encoder for the width variants behind `srcset`.
+RESPONSIVE_EXTENSIONS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+# What every output is converted to before its ICC profile is dropped.
+SRGB_PROFILE = ImageCms.createProfile("sRGB")
+
+
+def max_dimension():
+    return getattr(settings, "CKEDITOR_IMAGE_MAX_DIMENSION", 1920)
+
+
+def quality():
+    return getattr(settings, "CKEDITOR_IMAGE_QUALITY", 80)
+
+
+def responsive_widths():
+    return getattr(settings, "CONTENT_IMAGE_WIDTHS", (480, 960, 1440))
+
+
+def derivative_formats():
+    """Configured modern formats this Pillow build can actually encode."""
+    wanted = getattr(settings, "CKEDITOR_IMAGE_FORMATS", ("webp", "avif"))
+    return [fmt for fmt in wanted if features.check(fmt)]
+
+
+def original_name(path):
+    return getattr(settings, "CKEDITOR_ORIGINALS_PATH", "originals/") + path
+
+
+def derivative_name(path, fmt, width=None):
+    stem = os.path.splitext(path)[0]
+    suffix = "-%dw" % width if width else ""
+    return "%s%s%s.%s" % (
+        getattr(settings, "CKEDITOR_DERIVATIVES_PATH", "derivatives/"), stem, suffix, fmt
+    )
+
+
+def normalize_mode(image):
+    """Convert palette/CMYK/16-bit images to a mode every encoder accepts."""
+    if image.mode == "P":
+        return image.convert("RGBA" if "transparency" in image.info else "RGB")
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        return image.convert("RGB")
+    return image
+
+
+def to_srgb(image):
+    """
+    Convert an image carrying an ICC profile (Display P3, Adobe RGB, CMYK,
+    ...) to sRGB, so its colours survive dropping the profile. Images
+    without one, or with one LittleCMS cannot use, are returned as is.
+    """
+    icc = image.info.get("icc_profile")
+    if not icc:
+        return image
+    if image.mode == "P":
+        image = normalize_mode(image)
+    mode = "RGBA" if has_alpha(image) else "RGB"
+    try:
+        return ImageCms.profileToProfile(
+            image, ImageCms.ImageCmsProfile(BytesIO(icc)), SRGB_PROFILE, outputMode=mode
+        )
+    except (ImageCms.PyCMSError, OSError, ValueError):
+        return image
+
+
+def prepare(image):
+    """Apply EXIF orientation, convert to sRGB, drop metadata and cap the longest side."""
+    image = normalize_mode(to_srgb(ImageOps.exif_transpose(image)))
+    image.thumbnail((max_dimension(), max_dimension()), Image.Resampling.LANCZOS)
+    # A fresh image carries no EXIF/XMP/ICC blocks from the phone camera.
+    clean = Image.new(image.mode, image.size)
+    clean.paste(image)
+    return clean
+
+
+def has_alpha(image):
+    return image.mode in ALPHA_MODES
+
+
+def encode(image, fmt):
+    """Encode `image` as `fmt` ('jpeg', 'png', 'webp', 'avif')."""
+    buffer = BytesIO()
+    if fmt == "jpeg":
+        image.convert("RGB").save(
+            buffer, format="JPEG", quality=quality(), optimize=True, progressive=True
+        )
+    elif fmt == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format=fmt.upper(), quality=quality())
+    return ContentFile(buffer.getvalue())
+
+
+def replace(storage, name, content):
+    """Write `content` at exactly `name`, overwriting what is there."""
+    if storage.exists(name):
+        storage.delete(name)
+    saved = storage.save(name, content)
+    if saved != name:
+        raise RuntimeError("Storage renamed %s to %s" % (name, saved))
+    return saved
+
+
+def save_derivatives(storage, path, image):
+    for fmt in derivative_formats():
+        replace(storage, derivative_name(path, fmt), encode(image, fmt))
+
+
+def is_processed(storage, path):
+    if storage.exists(original_name(path)):
+        return True
+    return any(storage.exists(derivative_name(path, fmt)) for fmt in derivative_formats())
+
+
+def reprocess(path, storage=None):
+    """
+    Optimise an already-stored upload in place, keeping its URL valid.
+    Returns False when the file is not an image we re-encode.
+    """
+    from ckeditor_uploader.utils import storage as default_storage
+
+    storage = storage or default_storage
+    # Re-running starts from the kept original, so quality never compounds.
+    source = original_name(path) if storage.exists(original_name(path)) else path
+    with storage.open(source, "rb") as handle:
+        data = handle.read()
+    try:
+        source = Image.open(BytesIO(data))
+        source_format = source.format
+        if source_format not in REPROCESSABLE or getattr(source, "is_animated", False):
+            return False
+        has_metadata = bool(source.getexif()) or "icc_profile" in source.info
+        image = prepare(source)
+    except OSError:
+        return False
+
+    if not storage.exists(original_name(path)):
+        storage.save(original_name(path), ContentFile(data))
+    # Same container format as before, so the existing URL's extension holds.
+    fmt = {"JPEG": "jpeg", "PNG": "png", "WEBP": "webp"}[source_format]
+    content = encode(image, fmt)
+    if content.size >= len(data) and image.size == source.size and not has_metadata:
+        # Already lean: re-encoding would only add bytes and generation loss.
+        content = ContentFile(data)
+    replace(storage, path, content)
+    save_derivatives(storage, path, image)
+    return True
+
+
+def manifest_name(path):
+    return derivative_name(path, "json")
+
+
+def stored_variants(storage, path):
+    """
+    The responsive copies recorded for the stored image `path`, read from
+    the manifest `make_variants` writes: (width, height, variants) where
+    `variants` maps an extension ('jpg', 'webp', 'avif', ...) to
+    [(storage name, width), ...] in ascending width, ending with the
+    full-size file. Returns None when no manifest exists yet. Costs one
+    read, never an encode, so it is safe to call while saving a page.
+    """
+    if os.path.splitext(path)[1].lower() not in RESPONSIVE_EXTENSIONS:
+        return None
+    try:
+        with storage.open(manifest_name(path), "rb") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    variants = {
+        ext: [(name, width) for name, width in names]
+        for ext, names in manifest["variants"].items()
+    }
+    return manifest["width"], manifest["height"], variants
+
+
+def make_variants(storage, path):
+    """
+    Create the width-capped copies of the stored image `path` and record
+    them for `stored_variants`. Returns what `stored_variants` will, or
+    None when `path` is not a readable still image. Existing copies are
+    reused, so calling this again is cheap.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in RESPONSIVE_EXTENSIONS or not storage.exists(path):
+        return None
+    try:
+        with storage.open(path, "rb") as handle:
+            image = Image.open(BytesIO(handle.read()))
+        image = normalize_mode(to_srgb(ImageOps.exif_transpose(image)))
+    except OSError:
+        return None
+    width, height = image.size
+    widths = [w for w in responsive_widths() if w < width]
+
+    fallback = extension.lstrip(".")
+    outputs = {fallback: RESPONSIVE_EXTENSIONS[extension]}
+    outputs.update((fmt, fmt) for fmt in derivative_formats())
+
+    variants = {}
+    for ext, fmt in outputs.items():
+        names = []
+        for target_width in widths + [None]:
+            if target_width is None and ext == fallback:
+                names.append((path, width))
+                continue
+            name = derivative_name(path, ext, target_width)
+            if not storage.exists(name):
+                copy = image.copy()
+                if target_width:
+                    copy.thumbnail((target_width, height), Image.Resampling.LANCZOS)
+                replace(storage, name, encode(copy, fmt))
+            names.append((name, target_width or width))
+        variants[ext] = names
+    manifest = {"width": width, "height": height, "variants": variants}
+    replace(storage, manifest_name(path), ContentFile(json.dumps(manifest).encode()))
+    return width, height, variants
+
+
+class OptimizingImageBackend(PillowBackend):
+    """
+    ckeditor_uploader backend: stores the original separately and embeds an
+    optimised JPEG/PNG fallback with WebP/AVIF siblings.
+    """
+
+    def save_as(self, filepath):
+        if not self.is_image:
+            return super().save_as(filepath)
+        image = Image.open(self.file_object)
+        if getattr(image, "is_animated", False):
+            self.file_object.seek(0)
+            return super().save_as(filepath)
+
+        image = prepare(image)
+        fmt = "png" if has_alpha(image) else "jpeg"
+        stem, original_ext = os.path.splitext(filepath)
+        content = encode(image, fmt)
+        saved_path = self.storage_engine.save(
+            stem + (".png" if fmt == "png" else ".jpg"), content
+        )
+        save_derivatives(self.storage_engine, saved_path, image)
+
+        # Keep the upload as sent, next to the name we actually serve.
+        self.file_object.seek(0)
+        self.storage_engine.save(
+            original_name(os.path.splitext(saved_path)[0] + original_ext), self.file_object
+        )
+        content.seek(0)
+        self.create_thumbnail(content, saved_path)
+        # Ready (usually) before the page embedding it is first saved.
+        from .tasks import make_media_variants
+
+        make_media_variants.delay([saved_path])
+        return saved_path
@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ckeditor_uploader.utils import is_valid_image_extension, storage
+
+from apps.content_creator import images
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+def walk(directory):
+    """Yield every stored file under `directory` (works for remote storages too)."""
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for name in directories:
+        yield from walk(os.path.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = "Strip EXIF, resize and add WebP/AVIF derivatives for existing CKEditor uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (default: one per CPU).")
+        parser.add_argument("--force", action="store_true",
+                            help="Reprocess uploads that already have derivatives.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only list the files that would be processed.")
+
+    def handle(self, *args, **options):
+        paths = [
+            path for path in walk(settings.CKEDITOR_UPLOAD_PATH.rstrip("/"))
+            if is_valid_image_extension(path)
+            and not os.path.splitext(path)[0].endswith("_thumb")
+            and (options["force"] or not images.is_processed(storage, path))
+        ]
+        if options["dry_run"]:
+            for path in paths:
+                self.stdout.write(path)
+            self.stdout.write("%d uploads would be processed." % len(paths))
+            return
+
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            done = sum(pool.map(images.reprocess, paths, chunksize=8))
+        self.stdout.write(self.style.SUCCESS(
+            "Optimised %d of %d uploads in %.1fs." % (done, len(paths), time.monotonic() - started)
+        ))
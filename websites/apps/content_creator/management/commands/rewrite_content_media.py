@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.content_creator.models import Content
+from apps.content_creator.richtext import rewrite_media
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+def rewrite(pk):
+    """Rebuild one row's body_html; True if it changed."""
+    row = Content.objects.filter(pk=pk).values("body", "body_html").first()
+    if row is None:
+        return False
+    # Offline, so encode missing variants here instead of queueing them.
+    body_html = rewrite_media(row["body"], generate=True)
+    if body_html == row["body_html"]:
+        return False
+    # update() leaves updated_at and the save signals alone.
+    Content.objects.filter(pk=pk).update(body_html=body_html)
+    return True
+
+
+class Command(BaseCommand):
+    help = "Rebuild Content.body_html (lazy/responsive media) for existing content. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        pks = list(Content.objects.values_list("pk", flat=True))
+        started = time.monotonic()
+        # Forked workers must not share the parent's database socket.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            changed = sum(pool.map(rewrite, pks, chunksize=16))
+        self.stdout.write(self.style.SUCCESS(
+            "Rewrote %d of %d contents in %.1fs." % (changed, len(pks), time.monotonic() - started)
+        ))
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from nascp_web.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_creator', '0002_alter_content_body'),
+    ]
+
+    operations = [
+        trigram_indexes('content_creator_content', 'title', 'body'),
+    ]
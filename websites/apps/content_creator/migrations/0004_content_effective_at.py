@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_creator', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        # A stored generated column: existing rows are filled by the database.
+        migrations.AddField(
+            model_name='content',
+            name='effective_at',
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=Coalesce('published_at', 'created_at'),
+                output_field=models.DateTimeField(),
+            ),
+        ),
+        migrations.AlterModelOptions(
+            name='content',
+            options={'ordering': ['-effective_at']},
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['published', '-effective_at'], name='content_published_eff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['content_type', 'published', '-effective_at'], name='content_type_pub_eff_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_creator', '0004_content_effective_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
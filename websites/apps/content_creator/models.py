@@ -1,8 +1,11 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.urls import reverse
 from ckeditor_uploader.fields import RichTextUploadingField
 
+from .richtext import rewrite_media
+
 
 class Category(models.Model):
     """
@@ -54,18 +57,52 @@ class Content(models.Model):
     )
     # CKEditor rich text with upload support
     body = RichTextUploadingField(blank=True)  # stores HTML
+    # `body` with lazy/responsive <img>/<iframe> markup, rebuilt on save.
+    # This is what pages and the API render.
+    body_html = models.TextField(blank=True, editable=False)
     published = models.BooleanField(default=False)
     published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # published_at, else created_at – computed by the database, so
+    # queryset.update() and bulk writes keep it current too. Every feed sorts
+    # and date-filters on this one column so it can use a single index.
+    effective_at = models.GeneratedField(
+        expression=Coalesce("published_at", "created_at"),
+        output_field=models.DateTimeField(),
+        db_persist=True,
+    )
 
     class Meta:
-        ordering = ["-published_at", "-created_at"]
+        ordering = ["-effective_at"]
+        indexes = [
+            models.Index(fields=["published", "-effective_at"], name="content_published_eff_idx"),
+            models.Index(fields=["content_type", "published", "-effective_at"], name="content_type_pub_eff_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get("update_fields")
+        missing = []
+        if update_fields is None or "body" in update_fields:
+            self.body_html = self.render_body(missing)
+        if update_fields is not None:
+            derived = {"body": "body_html"}
+            kwargs["update_fields"] = {*update_fields, *(
+                derived[name] for name in update_fields if name in derived
+            )}
         super().save(*args, **kwargs)
+        if missing:
+            # Encoding images takes seconds; the page gets its srcset
+            # once the job has made the copies.
+            from .tasks import make_media_variants
+
+            make_media_variants.delay(missing, self.pk)
+
+    def render_body(self, missing=None):
+        """`body` with lazy/responsive media markup, from existing variants only."""
+        return rewrite_media(self.body, missing=missing)
 
     def __str__(self):
         return self.title
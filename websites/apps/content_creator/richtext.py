@@ -0,0 +1,174 @@
+# apps/content_creator/richtext.py
+"""
+Save-time rewrite of Content.body HTML into Content.body_html.
+
+- <img>: loading="lazy", decoding="async", intrinsic width/height, a
+  `srcset` of width-capped copies and, when WebP/AVIF derivatives exist,
+  a wrapping <picture> with one <source> per format.
+- <iframe>: loading="lazy".
+
+Everything else is copied through byte for byte. The output depends only
+on `body` and the stored derivatives, so re-running it is safe
+(`manage.py rewrite_content_media`). Images are looked up in the CKEditor
+upload storage (CKEDITOR_STORAGE_BACKEND), which may be a bucket.
+
+Saving a page only reads the variant manifests; an image without one is
+left as a plain lazy <img> and reported through `missing`, for the job
+that encodes its copies (content_creator.tasks.make_media_variants).
+"""
+import os
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from django.conf import settings
+
+SOURCE_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def default_sizes():
+    return getattr(settings, "CONTENT_IMAGE_SIZES", "(max-width: 960px) 100vw, 960px")
+
+
+def media_path(src, base_url):
+    """Storage name for a src under `base_url`, or None for external images."""
+    if not src or not src.startswith(base_url):
+        return None
+    return unquote(src[len(base_url):].split("?", 1)[0])
+
+
+def _render_tag(tag, attrs, self_closing=False):
+    parts = [tag]
+    for name, value in attrs:
+        parts.append(name if value is None else '%s="%s"' % (name, escape(value, quote=True)))
+    return "<%s%s>" % (" ".join(parts), " /" if self_closing else "")
+
+
+class MediaRewriter(HTMLParser):
+    """Streams HTML through unchanged except for <img> and <iframe> tags."""
+
+    def __init__(self, storage=None, generate=False):
+        from ckeditor_uploader.utils import storage as upload_storage
+
+        super().__init__(convert_charrefs=False)
+        self.storage = storage or upload_storage
+        # True: encode missing variants now (offline commands only).
+        self.generate = generate
+        self.missing = []
+        # MEDIA_URL locally; the bucket or CDN origin with object storage.
+        self.base_url = self.storage.url("")
+        self.out = []
+        self.picture_depth = 0
+
+    # -- pass-through ---------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        if tag == "picture":
+            self.picture_depth += 1
+        if tag == "img":
+            self.out.append(self.rewrite_img(attrs, False))
+        elif tag == "iframe":
+            self.out.append(_render_tag(tag, self.lazy(attrs)))
+        else:
+            self.out.append(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "img":
+            self.out.append(self.rewrite_img(attrs, True))
+        else:
+            self.out.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag == "picture":
+            self.picture_depth = max(0, self.picture_depth - 1)
+        self.out.append("</%s>" % tag)
+
+    def handle_data(self, data):
+        self.out.append(data)
+
+    def handle_entityref(self, name):
+        self.out.append("&%s;" % name)
+
+    def handle_charref(self, name):
+        self.out.append("&#%s;" % name)
+
+    def handle_comment(self, data):
+        self.out.append("<!--%s-->" % data)
+
+    def handle_decl(self, decl):
+        self.out.append("<!%s>" % decl)
+
+    def handle_pi(self, data):
+        self.out.append("<?%s>" % data)
+
+    def unknown_decl(self, data):
+        self.out.append("<![%s]>" % data)
+
+    # -- rewriting ------------------------------------------------------
+    @staticmethod
+    def lazy(attrs):
+        present = {name for name, _value in attrs}
+        attrs = list(attrs)
+        if "loading" not in present:
+            attrs.append(("loading", "lazy"))
+        return attrs
+
+    def rewrite_img(self, attrs, self_closing):
+        attrs = self.lazy(attrs)
+        present = {name for name, _value in attrs}
+        if "decoding" not in present:
+            attrs.append(("decoding", "async"))
+
+        # Pillow and the CKEditor backends load on the first save, not at startup.
+        from .images import make_variants, stored_variants
+
+        path = media_path(dict(attrs).get("src"), self.base_url)
+        variants = stored_variants(self.storage, path) if path else None
+        if variants is None and path:
+            if self.generate:
+                variants = make_variants(self.storage, path)
+            elif path not in self.missing:
+                self.missing.append(path)
+        if variants is None:
+            return _render_tag("img", attrs, self_closing)
+
+        width, height, by_format = variants
+        if "width" not in present and "height" not in present:
+            attrs += [("width", str(width)), ("height", str(height))]
+        own_ext = os.path.splitext(path)[1].lower().lstrip(".")
+        if "srcset" not in present and len(by_format[own_ext]) > 1:
+            attrs += [("srcset", self.srcset(by_format[own_ext])), ("sizes", default_sizes())]
+        img = _render_tag("img", attrs, self_closing)
+
+        sources = [
+            _render_tag("source", [
+                ("type", SOURCE_TYPES[ext]),
+                ("srcset", self.srcset(by_format[ext])),
+                ("sizes", default_sizes()),
+            ])
+            for ext in ("avif", "webp") if ext in by_format and ext != own_ext
+        ]
+        if not sources or self.picture_depth:
+            return img
+        return "<picture>%s%s</picture>" % ("".join(sources), img)
+
+    def srcset(self, names):
+        return ", ".join("%s %dw" % (self.storage.url(name), width) for name, width in names)
+
+    def result(self):
+        return "".join(self.out)
+
+
+def rewrite_media(html, storage=None, *, generate=False, missing=None):
+    """
+    Return `html` with lazy, responsive <img>/<iframe> markup. Uploads
+    whose variants do not exist yet are appended to `missing`, unless
+    `generate` encodes them first.
+    """
+    if not html:
+        return html or ""
+    rewriter = MediaRewriter(storage, generate)
+    rewriter.feed(html)
+    rewriter.close()
+    if missing is not None:
+        missing.extend(rewriter.missing)
+    return rewriter.result()
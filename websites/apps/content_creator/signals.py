@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_content_version
+from .models import Category, Content
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_content_fragments(sender, **kwargs):
+    bump_content_version()
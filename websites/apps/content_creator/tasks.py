@@ -0,0 +1,27 @@
+from apps.jobs.queue import task
+
+
+@task(max_attempts=3, priority=5)
+def make_media_variants(paths, content_id=None):
+    """
+    Encode the responsive copies of the uploads at `paths`, then rebuild
+    `content_id`'s body_html so it picks them up.
+    """
+    from ckeditor_uploader.utils import storage
+
+    from .images import make_variants
+    from .models import Content
+
+    for path in paths:
+        make_variants(storage, path)
+    if content_id is None:
+        return
+    content = Content.objects.filter(pk=content_id).first()
+    if content is None:
+        return
+    body_html = content.render_body()
+    if body_html != content.body_html:
+        content.body_html = body_html
+        # Without "body", save() keeps this body_html; the save signals
+        # still purge and re-publish the page.
+        content.save(update_fields=["body_html"])
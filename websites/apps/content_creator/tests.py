@@ -1,3 +1,383 @@
-from django.test import TestCase
+import shutil
+import struct
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image, ImageChops
+
+from apps.file_manager.models import File
+from apps.jobs.models import Job
+from apps.related.models import RelatedItem
+from . import images
+from .models import Category, Content
+from .richtext import rewrite_media
+from .tasks import make_media_variants
+
+
+class EffectiveAtTests(TestCase):
+    def test_follows_published_at_through_queryset_updates(self):
+        content = Content.objects.create(title="Launch", content_type="news", published=True)
+        content.refresh_from_db()
+        self.assertEqual(content.effective_at, content.created_at)
+
+        published_at = timezone.now() - timedelta(days=3)
+        Content.objects.filter(pk=content.pk).update(published_at=published_at)
+        content.refresh_from_db()
+        self.assertEqual(content.effective_at, published_at)
+
+    def test_bulk_create_fills_it(self):
+        published_at = timezone.now() - timedelta(days=1)
+        Content.objects.bulk_create([
+            Content(title="One", slug="one", content_type="blog", published_at=published_at),
+        ])
+        self.assertEqual(Content.objects.get(slug="one").effective_at, published_at)
+
+
+def png_bytes(size, color=(200, 40, 40)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@override_settings(CONTENT_IMAGE_WIDTHS=(480, 960), CKEDITOR_IMAGE_FORMATS=("webp",))
+class MediaRewriterTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.storage = FileSystemStorage(location=root, base_url="/media/")
+        self.storage.save("uploads/photo.png", ContentFile(png_bytes((1200, 600))))
+
+    def rewrite(self, html, **kwargs):
+        return rewrite_media(html, self.storage, **kwargs)
+
+    def test_passes_other_markup_through_unchanged(self):
+        html = (
+            "<!DOCTYPE html><p class=\"lead\">Fish &amp; chips &#8212; <b>today</b></p>"
+            "<!-- note --><ul><li>one<li>two</ul><br/><a href='/x?a=1&b=2'>x</a>"
+        )
+        self.assertEqual(self.rewrite(html), html)
+
+    def test_iframes_load_lazily(self):
+        self.assertEqual(
+            self.rewrite('<iframe src="https://video.example/1"></iframe>'),
+            '<iframe src="https://video.example/1" loading="lazy"></iframe>',
+        )
+        html = '<iframe src="/map" loading="eager"></iframe>'
+        self.assertEqual(self.rewrite(html), html)
+
+    def test_external_images_are_only_made_lazy(self):
+        missing = []
+        html = self.rewrite('<img src="https://cdn.example/a.png" alt="A">', missing=missing)
+        self.assertEqual(html, '<img src="https://cdn.example/a.png" alt="A" loading="lazy" decoding="async">')
+        self.assertEqual(missing, [])
+
+    def test_reports_uploads_without_variants_instead_of_encoding(self):
+        missing = []
+        html = self.rewrite('<img src="/media/uploads/photo.png">', missing=missing)
+        self.assertEqual(html, '<img src="/media/uploads/photo.png" loading="lazy" decoding="async">')
+        self.assertEqual(missing, ["uploads/photo.png"])
+        self.assertFalse(self.storage.exists(images.derivative_name("uploads/photo.png", "png", 480)))
+
+    def test_uses_stored_variants(self):
+        images.make_variants(self.storage, "uploads/photo.png")
+        missing = []
+        html = self.rewrite('<p><img src="/media/uploads/photo.png" alt=""></p>', missing=missing)
+        self.assertEqual(missing, [])
+        self.assertIn('width="1200" height="600"', html)
+        self.assertIn(
+            'srcset="/media/derivatives/uploads/photo-480w.png 480w, '
+            '/media/derivatives/uploads/photo-960w.png 960w, /media/uploads/photo.png 1200w"',
+            html,
+        )
+        if images.derivative_formats():
+            self.assertTrue(html.startswith('<p><picture><source type="image/webp"'))
+            self.assertIn("/media/derivatives/uploads/photo.webp 1200w", html)
+            self.assertTrue(html.endswith("</picture></p>"))
+
+    def test_keeps_author_dimensions_and_srcset(self):
+        images.make_variants(self.storage, "uploads/photo.png")
+        html = self.rewrite('<img src="/media/uploads/photo.png" width="300" srcset="/a.png 1x">')
+        self.assertNotIn('height="600"', html)
+        self.assertIn('srcset="/a.png 1x"', html)
+        self.assertNotIn("photo-480w.png", html.split("<img", 1)[1])
+
+    def test_rewriting_its_own_output_changes_nothing(self):
+        images.make_variants(self.storage, "uploads/photo.png")
+        html = '<p><img src="/media/uploads/photo.png"></p><iframe src="/v"></iframe>'
+        once = self.rewrite(html)
+        self.assertEqual(self.rewrite(once), once)
+        self.assertEqual(self.rewrite(html), once)
+
+    def test_generate_encodes_missing_variants(self):
+        html = self.rewrite('<img src="/media/uploads/photo.png">', generate=True)
+        self.assertIn("photo-480w.png 480w", html)
+        self.assertIsNotNone(images.stored_variants(self.storage, "uploads/photo.png"))
+
+
+@override_settings(JOBS_INLINE=False, CONTENT_IMAGE_WIDTHS=(480,), CKEDITOR_IMAGE_FORMATS=())
+class ContentMediaTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.storage = FileSystemStorage(location=root, base_url="/media/")
+        self.storage.save("uploads/photo.png", ContentFile(png_bytes((800, 400))))
+        patcher = mock.patch("ckeditor_uploader.utils.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_queues_variants_and_the_job_rewrites_the_body(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title="Photo", content_type="news", body='<img src="/media/uploads/photo.png">'
+            )
+        self.assertNotIn("srcset", content.body_html)
+        job = Job.objects.get(task=make_media_variants.task_name)
+        self.assertEqual(job.args, [["uploads/photo.png"], content.pk])
+
+        make_media_variants(*job.args)
+        content.refresh_from_db()
+        self.assertIn("photo-480w.png 480w", content.body_html)
+
+        Job.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+        self.assertFalse(Job.objects.filter(task=make_media_variants.task_name).exists())
+
+
+def _s15(value):
+    return struct.pack(">i", round(value * 65536))
+
+
+def _xyz(x, y, z):
+    return b"XYZ \0\0\0\0" + _s15(x) + _s15(y) + _s15(z)
+
+
+def swapped_rgb_profile():
+    """
+    A minimal ICC v2 RGB profile whose red and blue colorants are swapped
+    relative to sRGB: pure (255, 0, 0) in it is sRGB blue. Dropping the
+    profile instead of converting leaves it red.
+    """
+    curve = b"curv\0\0\0\0" + struct.pack(">IH", 1, 563) + b"\0\0"  # gamma 2.2
+    tags = [
+        (b"desc", b"desc\0\0\0\0" + struct.pack(">I", 5) + b"test\0" + b"\0" * 79),
+        (b"wtpt", _xyz(0.9642, 1.0, 0.8249)),
+        (b"rXYZ", _xyz(0.1431, 0.0606, 0.7141)),
+        (b"gXYZ", _xyz(0.3851, 0.7169, 0.0971)),
+        (b"bXYZ", _xyz(0.4361, 0.2225, 0.0139)),
+        (b"rTRC", curve), (b"gTRC", curve), (b"bTRC", curve),
+    ]
+    offset = 128 + 4 + 12 * len(tags)
+    table = data = b""
+    for signature, body in tags:
+        body += b"\0" * (-len(body) % 4)
+        table += signature + struct.pack(">II", offset + len(data), len(body))
+        data += body
+    header = (
+        struct.pack(">I", offset + len(data)) + b"\0" * 4 + struct.pack(">I", 0x02100000)
+        + b"mntrRGB XYZ " + b"\0" * 12 + b"acsp" + b"\0" * 28
+        + _s15(0.9642) + _s15(1.0) + _s15(0.8249) + b"\0" * 48
+    )
+    return header + struct.pack(">I", len(tags)) + table + data
+
+
+def jpeg_bytes(size, color=(200, 40, 40), orientation=None, icc_profile=None):
+    image = Image.new("RGB", size, color)
+    # Mark the left half so orientation is observable after a rotation.
+    image.paste((0, 0, 0), (0, 0, size[0] // 2, size[1]))
+    options = {"quality": 95}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        options["exif"] = exif
+    if icc_profile:
+        options["icc_profile"] = icc_profile
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", **options)
+    return buffer.getvalue()
+
+
+def assertColorNear(test, actual, expected, tolerance=12):
+    test.assertTrue(
+        all(abs(a - e) <= tolerance for a, e in zip(actual, expected)),
+        "%r is not close to %r" % (actual, expected),
+    )
+
+
+@override_settings(
+    JOBS_INLINE=False, CKEDITOR_IMAGE_MAX_DIMENSION=64, CKEDITOR_IMAGE_FORMATS=("webp",),
+)
+class ImageProcessingTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.storage = FileSystemStorage(location=root, base_url="/media/")
+
+    def upload(self, name, data):
+        backend = images.OptimizingImageBackend(self.storage, SimpleUploadedFile(name, data))
+        with self.captureOnCommitCallbacks(execute=True):
+            return backend.save_as("uploads/" + name)
+
+    def open(self, name):
+        with self.storage.open(name, "rb") as handle:
+            image = Image.open(BytesIO(handle.read()))
+            image.load()
+        return image
+
+    def test_upload_applies_orientation_and_strips_metadata(self):
+        saved = self.upload("photo.jpg", jpeg_bytes((80, 40), orientation=6))
+        self.assertEqual(saved, "uploads/photo.jpg")
+        image = self.open(saved)
+        # Rotated upright, then capped at 64px on the long side.
+        self.assertEqual(image.size, (32, 64))
+        self.assertFalse(image.getexif())
+        # The black half was on the left; after a 90° turn it is on top.
+        assertColorNear(self, image.getpixel((16, 4)), (0, 0, 0))
+        self.assertTrue(self.storage.exists("originals/uploads/photo.jpg"))
+        self.assertEqual(self.open("originals/uploads/photo.jpg").getexif()[0x0112], 6)
+        self.assertTrue(self.storage.exists("derivatives/uploads/photo.webp"))
+        self.assertEqual(
+            Job.objects.get(task=make_media_variants.task_name).args, [["uploads/photo.jpg"]]
+        )
+
+    def test_transparent_uploads_stay_png_and_others_become_jpeg(self):
+        buffer = BytesIO()
+        Image.new("RGBA", (20, 20), (0, 128, 0, 100)).save(buffer, format="PNG")
+        saved = self.upload("logo.png", buffer.getvalue())
+        self.assertEqual(saved, "uploads/logo.png")
+        self.assertEqual(self.open(saved).getpixel((5, 5)), (0, 128, 0, 100))
+
+        saved = self.upload("flat.png", png_bytes((20, 20)))
+        self.assertEqual(saved, "uploads/flat.jpg")
+        self.assertEqual(self.open(saved).format, "JPEG")
+        self.assertTrue(self.storage.exists("originals/uploads/flat.png"))
+
+    def test_wide_gamut_colours_are_converted_not_dropped(self):
+        data = jpeg_bytes((20, 20), color=(255, 0, 0), icc_profile=swapped_rgb_profile())
+        saved = self.upload("p3.jpg", data)
+        image = self.open(saved)
+        self.assertNotIn("icc_profile", image.info)
+        assertColorNear(self, image.getpixel((15, 10)), (0, 0, 255), tolerance=20)
+
+        variants = images.make_variants(self.storage, "uploads/p3.jpg")
+        self.assertIsNotNone(variants)
+        webp = self.open("derivatives/uploads/p3.webp")
+        assertColorNear(self, webp.convert("RGB").getpixel((15, 10)), (0, 0, 255), tolerance=20)
+
+    def test_reprocess_keeps_the_url_and_is_repeatable(self):
+        self.storage.save("uploads/old.jpg", ContentFile(jpeg_bytes((120, 60), orientation=6)))
+        self.assertFalse(images.is_processed(self.storage, "uploads/old.jpg"))
+
+        self.assertTrue(images.reprocess("uploads/old.jpg", self.storage))
+        first = self.open("uploads/old.jpg")
+        self.assertEqual(first.size, (32, 64))
+        self.assertFalse(first.getexif())
+        self.assertTrue(images.is_processed(self.storage, "uploads/old.jpg"))
+        self.assertEqual(self.open("originals/uploads/old.jpg").size, (120, 60))
+
+        # A second run starts again from the kept original, so nothing compounds.
+        self.assertTrue(images.reprocess("uploads/old.jpg", self.storage))
+        second = self.open("uploads/old.jpg")
+        self.assertIsNone(ImageChops.difference(first, second).getbbox())
+        self.assertEqual(self.storage.listdir("originals/uploads")[1], ["old.jpg"])
+
+    def test_reprocess_skips_what_it_does_not_re_encode(self):
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, format="GIF")
+        self.storage.save("uploads/anim.gif", ContentFile(buffer.getvalue()))
+        self.storage.save("uploads/notes.jpg", ContentFile(b"not an image"))
+        self.assertFalse(images.reprocess("uploads/anim.gif", self.storage))
+        self.assertFalse(images.reprocess("uploads/notes.jpg", self.storage))
+        self.assertFalse(self.storage.exists("originals/uploads/notes.jpg"))
+
+    def test_optimize_uploads_only_touches_unprocessed_files(self):
+        self.storage.save("uploads/2025/a.jpg", ContentFile(jpeg_bytes((120, 60))))
+        self.storage.save("uploads/2025/a_thumb.jpg", ContentFile(jpeg_bytes((10, 10))))
+        self.storage.save("uploads/b.png", ContentFile(png_bytes((30, 30))))
+        self.upload("done.jpg", jpeg_bytes((20, 20)))
+
+        def run(*args):
+            out = StringIO()
+            with mock.patch("ckeditor_uploader.utils.storage", self.storage), \
+                    mock.patch("apps.content_creator.management.commands.optimize_uploads.storage",
+                               self.storage):
+                call_command("optimize_uploads", "--workers=1", *args, stdout=out)
+            return out.getvalue()
+
+        listed = run("--dry-run").splitlines()
+        self.assertEqual(sorted(listed[:-1]), ["uploads/2025/a.jpg", "uploads/b.png"])
+        self.assertEqual(listed[-1], "2 uploads would be processed.")
+
+        self.assertIn("Optimised 2 of 2 uploads", run())
+        self.assertEqual(self.open("uploads/2025/a.jpg").size, (64, 32))
+        self.assertTrue(self.storage.exists("derivatives/uploads/b.webp"))
+        self.assertIn("Optimised 0 of 0 uploads", run())
+        self.assertIn("Optimised 3 of 3 uploads", run("--force"))
+
+
+# Logged page views and count flushes would add writes to the count.
+@override_settings(
+    AUDIT_SAMPLE_RATES=dict.fromkeys(("human", "api", "asset", "feed", "bot", "monitor"), 0.0),
+    AUDIT_COUNT_FLUSH_SECONDS=3600,
+)
+class ViewQueryCountTests(TestCase):
+    """Each page costs the same number of queries for N and 2N rows."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Health")
+        self.main = Content.objects.create(
+            title="Main", content_type="news", published=True, category=self.category,
+        )
+        self.added = 0
+
+    def add_rows(self, n):
+        for _ in range(n):
+            self.added += 1
+            other = Content.objects.create(
+                title="Item %d" % self.added, content_type="news", published=True,
+                category=self.category,
+            )
+            file = File.objects.create(title="File %d" % self.added, file="docs/%d.pdf" % self.added)
+            Category.objects.create(name="Topic %d" % self.added)
+            RelatedItem.objects.create(
+                content=self.main, rank=2 * self.added - 1, score=0.5, related_content=other,
+            )
+            RelatedItem.objects.create(
+                content=self.main, rank=2 * self.added, score=0.4, related_file=file,
+            )
+
+    def assertQueriesFlat(self, url, queries, n=3):
+        for total in (n, 2 * n):
+            self.add_rows(total - self.added)
+            # Cold fragment and count caches: the worst case, every time.
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_content_list(self):
+        response = self.assertQueriesFlat("/contents/", 2)
+        self.assertContains(response, "Item 6")
+
+    def test_content_detail(self):
+        response = self.assertQueriesFlat(self.main.get_absolute_url(), 2)
+        self.assertContains(response, "File 6")
+        self.assertContains(response, "Item 6")
+
+    def test_category_list(self):
+        response = self.assertQueriesFlat("/categories/", 1)
+        self.assertContains(response, "Topic 6")
+
+    def test_category_detail(self):
+        response = self.assertQueriesFlat(self.category.get_absolute_url(), 2)
+        self.assertContains(response, "Item 6")
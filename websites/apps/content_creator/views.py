@@ -1,22 +1,66 @@
+from django.db.models import Prefetch
 from django.urls import reverse_lazy
 from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView
 )
+from apps.edge_cache.keys import SurrogateKeyMixin
+from apps.related.models import RelatedItem
+from .cache import CachedCountPaginator, content_version, fragment_timeout
 from .models import Content, Category
 from .forms import ContentForm, CategoryForm
 
+
+class FragmentCacheMixin:
+    """
+    Expose the fragment cache key parts to templates ({% cache %} blocks).
+    """
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cache_version'] = content_version()
+        context['cache_timeout'] = fragment_timeout()
+        return context
+
+
 # Content Views
-class ContentListView(ListView):
+class ContentListView(SurrogateKeyMixin, FragmentCacheMixin, ListView):
     model = Content
+    surrogate_keys = ('contents',)
     template_name = 'content_creator/content_list.html'
     context_object_name = 'contents'
     paginate_by = 10
 
-class ContentDetailView(DetailView):
+    def get_queryset(self):
+        # Lists never show the body; join the category shown on each row.
+        return Content.objects.select_related('category').defer('body')
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return CachedCountPaginator(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            count_key='content_list', **kwargs
+        )
+
+class ContentDetailView(SurrogateKeyMixin, DetailView):
     model = Content
     template_name = 'content_creator/content_detail.html'
     context_object_name = 'content'
 
+    def get_queryset(self):
+        return Content.objects.select_related('category')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['related_items'] = RelatedItem.objects.for_content(self.object.pk)
+        return context
+
+    def get_surrogate_keys(self):
+        keys = ['content:%s' % self.object.pk, 'related', 'related:%s' % self.object.pk]
+        if self.object.category_id:
+            # The page also shows the category's name and link.
+            keys.append('category:%s' % self.object.category_id)
+        return keys
+
 class ContentCreateView(CreateView):
     model = Content
     form_class = ContentForm
@@ -36,16 +80,30 @@ class ContentDeleteView(DeleteView):
 
 
 # Category Views
-class CategoryListView(ListView):
+class CategoryListView(SurrogateKeyMixin, FragmentCacheMixin, ListView):
     model = Category
+    surrogate_keys = ('categories',)
     template_name = 'content_creator/category_list.html'
     context_object_name = 'categories'
 
-class CategoryDetailView(DetailView):
+class CategoryDetailView(SurrogateKeyMixin, FragmentCacheMixin, DetailView):
     model = Category
     template_name = 'content_creator/category_detail.html'
     context_object_name = 'category'
 
+    def get_surrogate_keys(self):
+        # Content saves purge category:<pk> of their category, old and new.
+        return ('category:%s' % self.object.pk,)
+
+    def get_queryset(self):
+        # One extra query for the whole listing, exposed as
+        # `category.published_contents`.
+        return Category.objects.prefetch_related(Prefetch(
+            'contents',
+            queryset=Content.objects.filter(published=True).defer('body'),
+            to_attr='published_contents',
+        ))
+
 class CategoryCreateView(CreateView):
     model = Category
     form_class = CategoryForm
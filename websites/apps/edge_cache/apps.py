@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class EdgeCacheConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.edge_cache'
+
+    def ready(self):
+        import apps.edge_cache.signals  # noqa
@@ -0,0 +1,74 @@
+# apps/edge_cache/keys.py
+"""
+Surrogate keys: tags on cacheable responses naming the rows they were
+built from, so a save can purge exactly those pages from the edge.
+
+    content:<pk>                 one Content (detail page)
+    contents                     lists of every Content (HTML list page)
+    contents:type:<type>         API lists filtered by content_type
+    contents:category:<name>     lists filtered by category name
+    category:<pk>, categories    category pages
+    file:<pk>, files             one File / every File
+    files:category:<category>    API lists filtered by File.category
+    files:type:<file_type>       API lists filtered by File.file_type
+    feed:<artifact key>          sitemaps and feeds (apps.feeds)
+
+Views add keys with `add_surrogate_keys` (or the decorator/mixin below);
+EdgeCacheMiddleware turns them into Surrogate-Key / Cache-Tag headers.
+"""
+from functools import wraps
+
+
+def add_surrogate_keys(request, *keys):
+    # DRF passes its own Request; the middleware sees the Django one.
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "surrogate_keys"):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(key for key in keys if key)
+
+
+def surrogate_keys(*keys):
+    """Decorator for function views: tag every response with `keys`."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            add_surrogate_keys(request, *keys)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SurrogateKeyMixin:
+    """Class-based views: tag the response with get_surrogate_keys()."""
+    surrogate_keys = ()
+
+    def get_surrogate_keys(self):
+        return self.surrogate_keys
+
+    def render_to_response(self, context, **response_kwargs):
+        add_surrogate_keys(self.request, *self.get_surrogate_keys())
+        return super().render_to_response(context, **response_kwargs)
+
+
+def _slug(value):
+    return (value or "").strip().lower().replace(" ", "-")
+
+
+def content_keys(pk, content_type, category_name, category_id=None):
+    keys = ["content:%s" % pk, "contents", "contents:type:%s" % content_type]
+    if category_name:
+        keys.append("contents:category:%s" % _slug(category_name))
+    if category_id:
+        keys.append("category:%s" % category_id)
+    return keys
+
+
+def category_keys(pk, name):
+    return ["category:%s" % pk, "categories", "contents:category:%s" % _slug(name)]
+
+
+def file_keys(pk, category, file_type):
+    keys = ["file:%s" % pk, "files", "files:type:%s" % _slug(file_type)]
+    if category:
+        keys.append("files:category:%s" % _slug(category))
+    return keys
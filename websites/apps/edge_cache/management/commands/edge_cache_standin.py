@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for an edge cache purge API: accepts the JSON "
+        "POSTs of HTTPPurger and prints (or appends to --log) every purge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--log", help="Also append each purge as a JSON line to this file.")
+        parser.add_argument("--fail", action="store_true",
+                            help="Answer 503 to every purge, to exercise job retries.")
+
+    def handle(self, *args, **options):
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_error(400, "Body is not JSON")
+                    return
+                keys = payload.get("keys") or payload.get("surrogate_keys") or payload.get("tags") or []
+                record = {"at": datetime.now().isoformat(), "path": self.path, "keys": keys}
+                command.stdout.write("PURGE %s %s" % (self.path, " ".join(keys)))
+                if options["log"]:
+                    with open(options["log"], "a") as log:
+                        log.write(json.dumps(record) + "\n")
+                status = 503 if options["fail"] else 200
+                answer = json.dumps({"status": "ok" if status == 200 else "unavailable",
+                                     "purged": len(keys)}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(answer)))
+                self.end_headers()
+                self.wfile.write(answer)
+
+            def log_message(self, format, *args):
+                pass  # one PURGE line per request is enough
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write("Purge stand-in listening on http://%s:%d/ (Ctrl-C to stop)." % (
+            options["host"], options["port"]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.edge_cache.purgers import get_purger
+
+
+class Command(BaseCommand):
+    help = "Purge surrogate keys (e.g. contents files content:42) from the edge cache now."
+
+    def add_arguments(self, parser):
+        parser.add_argument("keys", nargs="+")
+
+    def handle(self, *args, **options):
+        purger = get_purger()
+        purger.purge(options["keys"])
+        self.stdout.write(self.style.SUCCESS("Purged %d key(s) via %s." % (
+            len(set(options["keys"])), type(purger).__name__)))
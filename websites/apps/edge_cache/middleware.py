@@ -0,0 +1,62 @@
+# apps/edge_cache/middleware.py
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+# Only complete, successful answers are shared; errors and redirects keep
+# Django's defaults.
+CACHEABLE_STATUS = frozenset((200, 203, 304))
+
+
+def route_policy(path):
+    """First EDGE_CACHE_ROUTES entry whose prefix matches `path` (None = not cached)."""
+    for prefix, policy in getattr(settings, "EDGE_CACHE_ROUTES", ()):
+        if path.startswith(prefix):
+            return policy
+    return None
+
+
+def is_personal(request, response):
+    """Anything tied to a visitor: a session, a new cookie or a CSRF token."""
+    return (
+        settings.SESSION_COOKIE_NAME in request.COOKIES
+        or bool(response.cookies)
+        or request.META.get("CSRF_COOKIE_USED", False)
+    )
+
+
+class EdgeCacheMiddleware:
+    """
+    Adds Cache-Control from EDGE_CACHE_ROUTES to anonymous GET/HEAD
+    responses, plus Surrogate-Key (Fastly, Varnish) and Cache-Tag
+    (Cloudflare) headers from the keys the view added (apps/edge_cache/keys.py).
+
+    Responses that already set Cache-Control keep it. Personal responses
+    become `private, no-cache` so no shared cache stores them. List this
+    before SessionMiddleware so the session cookie is visible here.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ("GET", "HEAD") or response.status_code not in CACHEABLE_STATUS:
+            return response
+        if response.has_header("Cache-Control"):
+            if "private" not in response["Cache-Control"] and "no-store" not in response["Cache-Control"]:
+                self.add_key_headers(request, response)
+            return response
+        policy = route_policy(request.path_info)
+        if policy is None:
+            return response
+        if is_personal(request, response):
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        patch_cache_control(response, public=True, **policy)
+        self.add_key_headers(request, response)
+        return response
+
+    def add_key_headers(self, request, response):
+        keys = sorted(getattr(request, "surrogate_keys", ()))
+        if keys:
+            response["Surrogate-Key"] = " ".join(keys)
+            response["Cache-Tag"] = ",".join(keys)
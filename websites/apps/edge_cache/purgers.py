@@ -0,0 +1,102 @@
+# apps/edge_cache/purgers.py
+"""
+Edge cache purgers, chosen by settings:
+
+    EDGE_CACHE_PURGER = {
+        "BACKEND": "apps.edge_cache.purgers.FastlyPurger",
+        "OPTIONS": {"service_id": "...", "token": "..."},
+    }
+
+NullPurger (the default) does nothing; HTTPPurger POSTs {"keys": [...]}
+to any URL, e.g. `manage.py edge_cache_standin` locally. A purge that
+fails raises, so the purge job is retried with backoff.
+"""
+import json
+import logging
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BasePurger:
+    batch_size = 256
+
+    def purge(self, keys):
+        keys = sorted(set(keys))
+        for start in range(0, len(keys), self.batch_size):
+            self.purge_batch(keys[start:start + self.batch_size])
+
+    def purge_batch(self, keys):
+        raise NotImplementedError
+
+
+class NullPurger(BasePurger):
+    def purge_batch(self, keys):
+        logger.debug("Edge purge skipped (no purger configured): %s", keys)
+
+
+class HTTPPurger(BasePurger):
+    """POST {"keys": [...]} as JSON to `url`, with an optional bearer token."""
+
+    def __init__(self, url, token=None, timeout=10, batch_size=None):
+        self.url, self.token, self.timeout = url, token, timeout
+        if batch_size:
+            self.batch_size = batch_size
+
+    def headers(self):
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = "Bearer %s" % self.token
+        return headers
+
+    def payload(self, keys):
+        return {"keys": keys}
+
+    def purge_batch(self, keys):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(self.payload(keys)).encode(),
+            headers=self.headers(), method="POST",
+        )
+        # urlopen raises HTTPError for 4xx/5xx answers.
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+        logger.info("Purged %d surrogate key(s) via %s", len(keys), self.url)
+
+
+class FastlyPurger(HTTPPurger):
+    def __init__(self, service_id, token, soft=True, **kwargs):
+        super().__init__("https://api.fastly.com/service/%s/purge" % service_id, token, **kwargs)
+        self.soft = soft
+
+    def headers(self):
+        headers = {"Content-Type": "application/json", "Fastly-Key": self.token}
+        if self.soft:
+            # Mark stale instead of evicting: stale-while-revalidate keeps working.
+            headers["Fastly-Soft-Purge"] = "1"
+        return headers
+
+    def payload(self, keys):
+        return {"surrogate_keys": keys}
+
+
+class CloudflarePurger(HTTPPurger):
+    batch_size = 30  # tags per purge_cache call
+
+    def __init__(self, zone_id, token, **kwargs):
+        super().__init__(
+            "https://api.cloudflare.com/client/v4/zones/%s/purge_cache" % zone_id, token, **kwargs
+        )
+
+    def payload(self, keys):
+        return {"tags": keys}
+
+
+@lru_cache(maxsize=1)
+def get_purger():
+    config = getattr(settings, "EDGE_CACHE_PURGER", None) or {}
+    backend = import_string(config.get("BACKEND", "apps.edge_cache.purgers.NullPurger"))
+    return backend(**config.get("OPTIONS", {}))
@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.content_creator.models import Category, Content
+from apps.file_manager.models import File
+from .keys import category_keys, content_keys, file_keys
+from .tasks import purge_surrogate_keys
+
+
+# What the post_save receivers here, in feeds and in prerender compare
+# against: one SELECT per save instead of one per app.
+PREVIOUS_FIELDS = {
+    Content: ("published", "slug", "content_type", "category_id", "category__name", "category__slug"),
+    Category: ("name", "slug"),
+    File: ("category", "file_type"),
+}
+
+
+def _purge(keys):
+    # Queued on commit: the edge refetches only once the new rows are visible.
+    purge_surrogate_keys.delay(sorted(set(keys)))
+
+
+@receiver(pre_save, sender=Content)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=File)
+def remember_previous_row(sender, instance, **kwargs):
+    instance._previous_row = None
+    if instance.pk:
+        instance._previous_row = sender.objects.filter(pk=instance.pk).values(
+            *PREVIOUS_FIELDS[sender]
+        ).first()
+
+
+def previous_row(instance):
+    """The row as stored before this save (a dict of PREVIOUS_FIELDS), or None."""
+    return getattr(instance, "_previous_row", None)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def purge_content(sender, instance, **kwargs):
+    keys = content_keys(
+        instance.pk, instance.content_type,
+        instance.category.name if instance.category_id else None, instance.category_id,
+    )
+    previous = previous_row(instance)
+    if previous:
+        keys += content_keys(
+            instance.pk, previous["content_type"], previous["category__name"], previous["category_id"],
+        )
+    _purge(keys)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category(sender, instance, **kwargs):
+    keys = category_keys(instance.pk, instance.name)
+    previous = previous_row(instance)
+    if previous and previous["name"] != instance.name:
+        keys += category_keys(instance.pk, previous["name"])
+    _purge(keys)
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def purge_file(sender, instance, **kwargs):
+    keys = file_keys(instance.pk, instance.category, instance.file_type)
+    previous = previous_row(instance)
+    if previous:
+        keys += file_keys(instance.pk, previous["category"], previous["file_type"])
+    _purge(keys)
@@ -0,0 +1,14 @@
+from django.dispatch import Signal
+
+from apps.jobs.queue import task
+from .purgers import get_purger
+
+# Sent with `keys` once the edge no longer serves responses tagged with
+# them (apps.live turns it into a change event).
+keys_purged = Signal()
+
+
+@task(max_attempts=8)
+def purge_surrogate_keys(keys):
+    get_purger().purge(keys)
+    keys_purged.send(sender=purge_surrogate_keys, keys=list(keys))
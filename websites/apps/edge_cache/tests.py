@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.content_creator.models import Category, Content
+
+
+@override_settings(STATIC_PUBLISH_ENABLED=True)
+class PreviousRowTests(TestCase):
+    def setUp(self):
+        self.old = Category.objects.create(name="Old Reports")
+        self.new = Category.objects.create(name="New Reports")
+        self.content = Content.objects.create(
+            title="Plan", content_type="news", category=self.old, published=True,
+        )
+
+    def test_one_select_of_the_previous_row_per_save(self):
+        self.content.category = self.new
+        with CaptureQueriesContext(connection) as queries:
+            self.content.save()
+        lookups = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and 'FROM "content_creator_content"' in query["sql"]
+        ]
+        self.assertEqual(len(lookups), 1, lookups)
+
+    def test_keys_of_the_previous_listing_are_purged(self):
+        self.content.category = self.new
+        self.content.content_type = "event"
+        with mock.patch("apps.edge_cache.signals.purge_surrogate_keys") as purge:
+            self.content.save()
+        keys = purge.delay.call_args.args[0]
+        for key in ("contents:type:news", "contents:category:old-reports", "category:%d" % self.old.pk,
+                    "contents:type:event", "contents:category:new-reports"):
+            self.assertIn(key, keys)
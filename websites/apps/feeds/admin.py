@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import FeedArtifact
+
+@admin.register(FeedArtifact)
+class FeedArtifactAdmin(admin.ModelAdmin):
+    list_display = ('key', 'content_type', 'last_modified')
+    search_fields = ('key',)
+    readonly_fields = ('key', 'content_type', 'body', 'last_modified')
+
+    # Artifacts are generated; rebuild them with `manage.py build_feeds`.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
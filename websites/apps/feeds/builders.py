@@ -0,0 +1,259 @@
+# apps/feeds/builders.py
+"""
+Renderers for every feed artifact, addressed by key:
+
+    sitemap:index                 sitemap index listing the sections below
+    sitemap:content:<type>        published Content of one content_type
+    sitemap:categories            Category pages
+    sitemap:files                 uploaded File URLs
+    <rss|atom>:contents           latest published Content
+    <rss|atom>:contents:<type>    latest published Content of one content_type
+    <rss|atom>:category:<slug>    latest published Content in one Category
+    <rss|atom>:files              latest File uploads
+
+Feeds are bounded by FEED_ITEM_LIMIT, so rebuilding one is a single
+LIMIT query. `build(key)` returns (body, mimetype) or None for unknown keys;
+`is_known(key)` answers the same without rendering.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.utils import feedgenerator
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from apps.content_creator.models import Category, Content
+from apps.file_manager.models import File
+from .models import FeedArtifact
+
+FEED_FORMATS = {
+    "rss": feedgenerator.Rss201rev2Feed,
+    "atom": feedgenerator.Atom1Feed,
+}
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+# The sitemap protocol caps a single file at 50,000 URLs.
+SITEMAP_MAX_URLS = 50_000
+
+
+def feed_item_limit():
+    return getattr(settings, "FEED_ITEM_LIMIT", 50)
+
+
+def absolute_url(path):
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def file_url(f):
+    """Absolute, non-expiring link to a File (see File.download_link)."""
+    url = f.download_link
+    return url if "://" in url else absolute_url(url)
+
+
+def content_types():
+    return [value for value, _label in Content.CONTENT_TYPE_CHOICES]
+
+
+def sitemap_section_keys():
+    keys = ["sitemap:content:%s" % content_type for content_type in content_types()]
+    return keys + ["sitemap:categories", "sitemap:files"]
+
+
+def published_contents():
+    return Content.objects.filter(published=True).order_by("-effective_at")
+
+
+# ---------------------------------------------------------------------
+# Sitemaps
+# ---------------------------------------------------------------------
+def _render_urlset(entries):
+    stream = StringIO()
+    xml = SimplerXMLGenerator(stream, "utf-8")
+    xml.startDocument()
+    xml.startElement("urlset", {"xmlns": SITEMAP_NS})
+    for loc, lastmod in entries:
+        xml.startElement("url", {})
+        xml.addQuickElement("loc", loc)
+        if lastmod:
+            xml.addQuickElement("lastmod", lastmod.date().isoformat())
+        xml.endElement("url")
+    xml.endElement("urlset")
+    xml.endDocument()
+    return stream.getvalue()
+
+
+def sitemap_section_path(key):
+    """'sitemap:content:news' -> '/sitemap-content-news.xml'"""
+    return "/sitemap-%s.xml" % key.split(":", 1)[1].replace(":", "-")
+
+
+def build_sitemap_index():
+    keys = sitemap_section_keys()
+    lastmods = dict(
+        FeedArtifact.objects.filter(key__in=keys).values_list("key", "last_modified")
+    )
+    stream = StringIO()
+    xml = SimplerXMLGenerator(stream, "utf-8")
+    xml.startDocument()
+    xml.startElement("sitemapindex", {"xmlns": SITEMAP_NS})
+    for key in keys:
+        xml.startElement("sitemap", {})
+        xml.addQuickElement("loc", absolute_url(sitemap_section_path(key)))
+        if key in lastmods:
+            xml.addQuickElement("lastmod", lastmods[key].isoformat())
+        xml.endElement("sitemap")
+    xml.endElement("sitemapindex")
+    xml.endDocument()
+    return stream.getvalue()
+
+
+def build_content_sitemap(content_type):
+    rows = published_contents().filter(
+        content_type=content_type
+    ).values_list("slug", "updated_at")[:SITEMAP_MAX_URLS]
+    return _render_urlset(
+        (absolute_url(Content(slug=slug).get_absolute_url()), updated_at)
+        for slug, updated_at in rows
+    )
+
+
+def build_category_sitemap():
+    slugs = Category.objects.values_list("slug", flat=True)[:SITEMAP_MAX_URLS]
+    return _render_urlset(
+        (absolute_url(Category(slug=slug).get_absolute_url()), None) for slug in slugs
+    )
+
+
+def build_file_sitemap():
+    files = File.objects.only("file", "updated_at").order_by("-created_at")[:SITEMAP_MAX_URLS]
+    return _render_urlset((file_url(f), f.updated_at) for f in files if f.file)
+
+
+# ---------------------------------------------------------------------
+# RSS / Atom
+# ---------------------------------------------------------------------
+def _content_feed(feed_class, title, link, feed_url, queryset):
+    feed = feed_class(
+        title=title,
+        link=absolute_url(link),
+        description=title,
+        language=settings.LANGUAGE_CODE,
+        feed_url=absolute_url(feed_url),
+    )
+    for content in queryset.select_related("category")[:feed_item_limit()]:
+        feed.add_item(
+            title=content.title,
+            link=absolute_url(content.get_absolute_url()),
+            description=Truncator(strip_tags(content.body)).words(60),
+            pubdate=content.effective_at,
+            updateddate=content.updated_at,
+            unique_id=absolute_url(content.get_absolute_url()),
+            categories=[content.category.name] if content.category else (),
+        )
+    return feed
+
+
+def build_content_feed(fmt, content_type=None, category_slug=None):
+    feed_class = FEED_FORMATS[fmt]
+    queryset = published_contents()
+    if category_slug is not None:
+        category = Category.objects.filter(slug=category_slug).first()
+        if category is None:
+            return None
+        feed = _content_feed(
+            feed_class,
+            "NASCP – %s" % category.name,
+            category.get_absolute_url(),
+            "/feeds/categories/%s/%s.xml" % (category.slug, fmt),
+            queryset.filter(category=category),
+        )
+    elif content_type is not None:
+        feed = _content_feed(
+            feed_class,
+            "NASCP – %s" % dict(Content.CONTENT_TYPE_CHOICES)[content_type],
+            "/",
+            "/feeds/contents/%s/%s.xml" % (content_type, fmt),
+            queryset.filter(content_type=content_type),
+        )
+    else:
+        feed = _content_feed(
+            feed_class, "NASCP – Latest", "/", "/feeds/contents/%s.xml" % fmt, queryset
+        )
+    return feed.writeString("utf-8")
+
+
+def build_file_feed(fmt):
+    feed = FEED_FORMATS[fmt](
+        title="NASCP – Documents & Media",
+        link=absolute_url("/"),
+        description="Latest reports, publications and media uploads.",
+        language=settings.LANGUAGE_CODE,
+        feed_url=absolute_url("/feeds/files/%s.xml" % fmt),
+    )
+    for f in File.objects.order_by("-created_at")[:feed_item_limit()]:
+        if not f.file:
+            continue
+        feed.add_item(
+            title=f.title,
+            link=file_url(f),
+            description=f.description,
+            pubdate=f.created_at,
+            updateddate=f.updated_at,
+            unique_id=file_url(f),
+            categories=[f.category] if f.category else (),
+        )
+    return feed.writeString("utf-8")
+
+
+# ---------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------
+def is_known(key):
+    """Whether `key` names an artifact build() can render (at most one query)."""
+    kind, _, rest = key.partition(":")
+    if kind == "sitemap":
+        return key == "sitemap:index" or key in sitemap_section_keys()
+    if kind not in FEED_FORMATS:
+        return False
+    section, _, name = rest.partition(":")
+    if not name:
+        return section in ("contents", "files")
+    if section == "contents":
+        return name in content_types()
+    if section == "category":
+        return Category.objects.filter(slug=name).exists()
+    return False
+
+
+def build(key):
+    """Render the artifact `key`. Returns (body, mimetype) or None."""
+    parts = key.split(":")
+    kind, rest = parts[0], parts[1:]
+
+    if kind == "sitemap":
+        body = None
+        if rest == ["index"]:
+            body = build_sitemap_index()
+        elif rest == ["categories"]:
+            body = build_category_sitemap()
+        elif rest == ["files"]:
+            body = build_file_sitemap()
+        elif len(rest) == 2 and rest[0] == "content" and rest[1] in content_types():
+            body = build_content_sitemap(rest[1])
+        return (body, "application/xml; charset=utf-8") if body is not None else None
+
+    if kind in FEED_FORMATS:
+        body = None
+        if rest == ["contents"]:
+            body = build_content_feed(kind)
+        elif rest == ["files"]:
+            body = build_file_feed(kind)
+        elif len(rest) == 2 and rest[0] == "contents" and rest[1] in content_types():
+            body = build_content_feed(kind, content_type=rest[1])
+        elif len(rest) == 2 and rest[0] == "category":
+            body = build_content_feed(kind, category_slug=rest[1])
+        if body is None:
+            return None
+        return body, FEED_FORMATS[kind].content_type
+
+    return None
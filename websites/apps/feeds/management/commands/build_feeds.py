@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.content_creator.models import Category
+from apps.feeds.builders import FEED_FORMATS
+from apps.feeds.publish import all_keys, rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild every sitemap and RSS/Atom artifact (saves keep them current afterwards)."
+
+    def handle(self, *args, **options):
+        keys = all_keys()
+        for slug in Category.objects.values_list("slug", flat=True):
+            keys += ["%s:category:%s" % (fmt, slug) for fmt in FEED_FORMATS]
+        rebuild(keys)
+        self.stdout.write(self.style.SUCCESS("Rebuilt %d feed artifacts." % len(set(keys))))
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class FeedArtifact(models.Model):
+    """
+    A pre-rendered sitemap or RSS/Atom document.
+    Rebuilt when the content it lists changes; read by key on every request.
+    """
+    key = models.CharField(max_length=200, unique=True)
+    content_type = models.CharField(max_length=100)
+    body = models.TextField()
+    # Only moves forward when the rendered body actually changes.
+    last_modified = models.DateTimeField()
+
+    def __str__(self):
+        return self.key
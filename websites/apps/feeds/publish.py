@@ -0,0 +1,108 @@
+# apps/feeds/publish.py
+"""
+Read and (re)build feed artifacts.
+
+Readers call `get_artifact(key)`: cache first, then one unique-key lookup
+on FeedArtifact; a missing artifact is built once if its key names a real
+section or category. Writers call `rebuild(keys)` with the keys a change
+touches (see `content_keys` / `file_keys`), so a save re-renders only the
+feeds and sitemap sections that list the changed row.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import builders
+from .models import FeedArtifact
+
+Artifact = namedtuple("Artifact", "body content_type last_modified")
+
+CACHE_PREFIX = "feeds:"
+
+
+def _cache_timeout():
+    # Bounded so per-process caches (LocMem) pick up rebuilds made elsewhere.
+    return getattr(settings, "FEEDS_CACHE_TIMEOUT", 60)
+
+
+def _remember(key, artifact):
+    cache.set(CACHE_PREFIX + key, artifact, _cache_timeout())
+    return artifact
+
+
+def rebuild(keys):
+    """Re-render `keys`, storing only artifacts whose body changed."""
+    keys = list(dict.fromkeys(keys))
+    if "sitemap:index" in keys:
+        # The index lists the sections' timestamps, so it is rendered last.
+        keys.remove("sitemap:index")
+        keys.append("sitemap:index")
+    for key in keys:
+        built = builders.build(key)
+        if built is None:
+            FeedArtifact.objects.filter(key=key).delete()
+            cache.delete(CACHE_PREFIX + key)
+            continue
+        body, content_type = built
+        row = FeedArtifact.objects.filter(key=key).first()
+        if row is None or row.body != body:
+            # update_or_create: concurrent first builds of a key both succeed.
+            row, _created = FeedArtifact.objects.update_or_create(key=key, defaults={
+                "body": body, "content_type": content_type, "last_modified": timezone.now(),
+            })
+        _remember(key, Artifact(row.body, row.content_type, row.last_modified))
+
+
+def get_artifact(key):
+    """Return the Artifact for `key`, building it once if it never was."""
+    artifact = cache.get(CACHE_PREFIX + key)
+    if artifact is not None:
+        return artifact
+    row = FeedArtifact.objects.filter(key=key).first()
+    if row is None:
+        if not builders.is_known(key):
+            # Unknown sections and categories: no build, no write.
+            return None
+        rebuild([key])
+        row = FeedArtifact.objects.filter(key=key).first()
+        if row is None:
+            return None
+    return _remember(key, Artifact(row.body, row.content_type, row.last_modified))
+
+
+def all_keys():
+    keys = builders.sitemap_section_keys()
+    for fmt in builders.FEED_FORMATS:
+        keys.append("%s:contents" % fmt)
+        keys.append("%s:files" % fmt)
+        keys += ["%s:contents:%s" % (fmt, t) for t in builders.content_types()]
+    return keys + ["sitemap:index"]
+
+
+def content_keys(content_type=None, category_slug=None):
+    """Artifacts listing Content of `content_type` in `category_slug`."""
+    keys = []
+    if content_type:
+        keys.append("sitemap:content:%s" % content_type)
+    for fmt in builders.FEED_FORMATS:
+        keys.append("%s:contents" % fmt)
+        if content_type:
+            keys.append("%s:contents:%s" % (fmt, content_type))
+        if category_slug:
+            keys.append("%s:category:%s" % (fmt, category_slug))
+    return keys + ["sitemap:index"]
+
+
+def category_keys(category_slug):
+    """A category change relabels items in every content feed."""
+    keys = [key for key in all_keys() if "files" not in key]
+    keys += ["%s:category:%s" % (fmt, category_slug) for fmt in builders.FEED_FORMATS]
+    return keys + ["sitemap:index"]
+
+
+def file_keys():
+    keys = ["sitemap:files"]
+    keys += ["%s:files" % fmt for fmt in builders.FEED_FORMATS]
+    return keys + ["sitemap:index"]
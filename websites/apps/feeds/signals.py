@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.content_creator.models import Category, Content
+from apps.edge_cache.signals import previous_row
+from apps.file_manager.models import File
+from .publish import category_keys, content_keys, file_keys
+from .tasks import rebuild_feeds
+
+
+def _rebuild_on_commit(keys):
+    rebuild_feeds.delay(list(dict.fromkeys(keys)))
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def rebuild_content_feeds(sender, instance, **kwargs):
+    listings = [(instance.published, instance.content_type,
+                 instance.category.slug if instance.category_id else None)]
+    # Where the row was listed before this save, so old feeds drop it.
+    previous = previous_row(instance)
+    if previous:
+        listings.append((previous["published"], previous["content_type"], previous["category__slug"]))
+    keys = []
+    for published, content_type, category_slug in listings:
+        # Drafts never appear in a feed, before or after.
+        if published:
+            keys += content_keys(content_type, category_slug)
+    if keys:
+        _rebuild_on_commit(keys)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def rebuild_category_feeds(sender, instance, **kwargs):
+    keys = category_keys(instance.slug)
+    previous = previous_row(instance)
+    if previous and previous["slug"] != instance.slug:
+        keys += category_keys(previous["slug"])
+    _rebuild_on_commit(keys)
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def rebuild_file_feeds(sender, instance, **kwargs):
+    _rebuild_on_commit(file_keys())
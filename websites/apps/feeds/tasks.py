@@ -0,0 +1,10 @@
+from apps.edge_cache.tasks import purge_surrogate_keys
+from apps.jobs.queue import task
+from .publish import rebuild
+
+
+@task(max_attempts=3)
+def rebuild_feeds(keys):
+    rebuild(keys)
+    # Only now do the new artifacts exist for the edge to refetch.
+    purge_surrogate_keys.delay(["feed:" + key for key in keys])
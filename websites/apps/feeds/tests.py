@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.content_creator.models import Category
+from . import publish
+from .models import FeedArtifact
+
+
+class ArtifactTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown_keys_are_not_built(self):
+        for key in ("rss:category:nope", "sitemap:content:nope", "sitemap:bogus"):
+            # The artifact lookup, plus the category check for category feeds.
+            with self.assertNumQueries(2 if "category" in key else 1):
+                self.assertIsNone(publish.get_artifact(key))
+        self.assertEqual(self.client.get("/feeds/categories/nope/rss.xml").status_code, 404)
+        self.assertFalse(FeedArtifact.objects.exists())
+
+    def test_known_category_is_built_once(self):
+        Category.objects.create(name="Reports", slug="reports")
+        response = self.client.get("/feeds/categories/reports/atom.xml")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(FeedArtifact.objects.values_list("key", flat=True)), ["atom:category:reports"])
+
+    def test_unchanged_body_keeps_last_modified(self):
+        publish.rebuild(["rss:files"])
+        first = FeedArtifact.objects.get(key="rss:files").last_modified
+        publish.rebuild(["rss:files"])
+        self.assertEqual(FeedArtifact.objects.get(key="rss:files").last_modified, first)
@@ -0,0 +1,14 @@
+from django.urls import path, re_path
+from . import views
+
+app_name = 'feeds'
+
+urlpatterns = [
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    re_path(r'^sitemap-(?P<section>[\w-]+)\.xml$', views.sitemap_section, name='sitemap_section'),
+
+    re_path(r'^feeds/contents/(?P<fmt>rss|atom)\.xml$', views.content_feed, name='content_feed'),
+    re_path(r'^feeds/contents/(?P<content_type>[\w-]+)/(?P<fmt>rss|atom)\.xml$', views.content_feed, name='content_type_feed'),
+    re_path(r'^feeds/categories/(?P<slug>[-\w]+)/(?P<fmt>rss|atom)\.xml$', views.category_feed, name='category_feed'),
+    re_path(r'^feeds/files/(?P<fmt>rss|atom)\.xml$', views.file_feed, name='file_feed'),
+]
@@ -0,0 +1,51 @@
+# apps/feeds/views.py
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition, require_safe
+
+from apps.edge_cache.keys import add_surrogate_keys
+from .publish import get_artifact
+
+
+def serve_artifact(request, key):
+    """
+    Serve a pre-built artifact with Last-Modified / If-Modified-Since
+    support. No content table is queried here.
+    """
+    artifact = get_artifact(key)
+    if artifact is None:
+        raise Http404("No such feed.")
+    add_surrogate_keys(request, "feed:" + key)
+
+    @condition(last_modified_func=lambda request: artifact.last_modified)
+    def respond(request):
+        return HttpResponse(artifact.body, content_type=artifact.content_type)
+
+    return respond(request)
+
+
+@require_safe
+def sitemap_index(request):
+    return serve_artifact(request, "sitemap:index")
+
+
+@require_safe
+def sitemap_section(request, section):
+    # /sitemap-content-news.xml -> sitemap:content:news
+    return serve_artifact(request, "sitemap:" + section.replace("-", ":", 1))
+
+
+@require_safe
+def content_feed(request, fmt, content_type=None):
+    if content_type:
+        return serve_artifact(request, "%s:contents:%s" % (fmt, content_type))
+    return serve_artifact(request, "%s:contents" % fmt)
+
+
+@require_safe
+def category_feed(request, slug, fmt):
+    return serve_artifact(request, "%s:category:%s" % (fmt, slug))
+
+
+@require_safe
+def file_feed(request, fmt):
+    return serve_artifact(request, "%s:files" % fmt)
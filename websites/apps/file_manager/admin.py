@@ -1,11 +1,41 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import File
+from nascp_web.changelist import ScalableAdminMixin
+from nascp_web.search import TrigramSearchAdminMixin
+from .models import File, FileStream, FileText
+
+
+class FileTextInline(admin.StackedInline):
+    """Extraction status only; the compressed text itself is not loaded."""
+    model = FileText
+    fields = ('status', 'chars', 'source_name', 'sha256', 'error', 'extracted_at')
+    readonly_fields = fields
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('data', 'search')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class FileStreamInline(admin.StackedInline):
+    """HLS packaging status of video Files."""
+    model = FileStream
+    fields = ('status', 'playlist', 'renditions', 'duration', 'source_name', 'error', 'packaged_at')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(File)
-class FileAdmin(admin.ModelAdmin):
+class FileAdmin(ScalableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     # Display key fields in the admin list view
     list_display = ('title', 'file_type', 'category', 'uploaded_by', 'created_at', 'updated_at', 'preview')
+    # Join the uploader in the changelist query instead of one query per row
+    list_select_related = ('uploaded_by',)
     # Allow filtering by file type, category, and creation date
     list_filter = ('file_type', 'category', 'created_at')
     # Enable searching by title, description, and category
@@ -14,6 +44,7 @@ class FileAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     # Make certain fields read-only in the admin
     readonly_fields = ('created_at', 'updated_at', 'preview')
+    inlines = (FileTextInline, FileStreamInline)
 
     def preview(self, obj):
         """
@@ -21,7 +52,8 @@ class FileAdmin(admin.ModelAdmin):
         For other file types, display a simple message.
         """
         if obj.file_type == 'image' and obj.file:
-            return format_html('<img src="{}" style="max-height: 50px;" />', obj.file.url)
+            source = obj.thumbnail or obj.file
+            return format_html('<img src="{}" style="max-height: 50px;" />', source.url)
         return "No preview"
 
     preview.short_description = "Preview"
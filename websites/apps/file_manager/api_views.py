@@ -1,8 +1,87 @@
 # apps/file_manager/api_views.py
-from rest_framework import viewsets
+import mimetypes
+
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from django.shortcuts import get_object_or_404, redirect
+from rest_framework import status, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from apps.edge_cache.keys import add_surrogate_keys
+from nascp_web.storage import (
+    direct_uploads_enabled, download_url, presigned_upload, signed_url_expire, signs_urls,
+)
 from .models import File
-from .serializers import FileSerializer
+from .serializers import DirectUploadSerializer, FileSerializer
 
 class FileViewSet(viewsets.ModelViewSet):
     queryset = File.objects.all()
     serializer_class = FileSerializer
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        add_surrogate_keys(request, 'files')
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def presign_upload(request):
+    """
+    Step 1 of a direct upload: {"filename", "content_type"?} ->
+    {"key", "url", "fields"} for a multipart POST straight to the bucket.
+    """
+    if not direct_uploads_enabled():
+        return Response(
+            {'detail': 'Direct uploads need object storage (DJANGO_S3_BUCKET).'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    filename = (request.data.get('filename') or '').strip()
+    if not filename:
+        return Response({'filename': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    content_type = (
+        request.data.get('content_type')
+        or mimetypes.guess_type(filename)[0]
+        or 'application/octet-stream'
+    )
+    return Response(presigned_upload(File.new_upload_name(filename), content_type))
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def complete_upload(request):
+    """Step 2: {"key", "title", "file_type", ...} -> the new File."""
+    serializer = DirectUploadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    instance = serializer.save(uploaded_by=request.user)
+    return Response(
+        FileSerializer(instance, context={'request': request}).data,
+        status=status.HTTP_201_CREATED,
+    )
+
+
+def file_download(request, pk):
+    """
+    Stable link to a File (feeds, sitemaps, lists, shared links): redirects
+    to a freshly signed URL, since signed URLs themselves expire.
+    """
+    return _redirect_to_stored(request, pk, 'file')
+
+
+def file_thumbnail(request, pk):
+    """Stable link to a File's list thumbnail; see file_download."""
+    return _redirect_to_stored(request, pk, 'thumbnail')
+
+
+def _redirect_to_stored(request, pk, field):
+    name = get_object_or_404(File.objects.values_list(field, flat=True), pk=pk)
+    if not name:
+        raise Http404('File has no stored object.')
+    add_surrogate_keys(request, 'file:%s' % pk)
+    response = redirect(download_url(name))
+    if signs_urls():
+        # A cached redirect must not outlive the signature it points at
+        # (signed URLs are themselves reused for half their lifetime).
+        patch_cache_control(response, public=True, max_age=signed_url_expire() // 4)
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FileManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.file_manager'
+
+    def ready(self):
+        import apps.file_manager.signals  # noqa
@@ -0,0 +1,145 @@
+# apps/file_manager/browse.py
+"""
+Paging and totals for the file browser (views.FileBrowserView).
+
+    ?sort=-created_at    title, created_at or updated_at, either direction
+    ?after=<cursor>      the page after the row the cursor names
+    ?before=<cursor>     the page before it
+
+A cursor is the signed (sort, value, pk) of a row. The next page is
+
+    WHERE col <= value AND (col < value OR (col = value AND id < pk))
+    ORDER BY col DESC, id DESC LIMIT n + 1
+
+which the (col, id) index (File.Meta.indexes) answers by seeking, at any
+depth; OFFSET would read and discard every earlier row. Ranked full-text
+results (FileFilter's `q` on PostgreSQL) have no such key and page by
+number; ranking has to score every match whatever the offset anyway.
+
+Totals are the planner's estimate above FILE_BROWSER_ESTIMATED_COUNT_THRESHOLD
+rows and COUNT(*) below it, cached per filter until a File changes.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+
+from nascp_web.changelist import estimated_count
+
+from .cache import files_version
+
+ORDERINGS = ("title", "created_at", "updated_at")
+DEFAULT_ORDERING = "-created_at"
+CURSOR_SALT = "file_manager.browse"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def page_size():
+    return _setting("FILE_BROWSER_PAGE_SIZE", 50)
+
+
+def parse_ordering(value):
+    """The requested sort if it is one we have an index for, else the default."""
+    if value and value.lstrip("-") in ORDERINGS:
+        return value
+    return DEFAULT_ORDERING
+
+
+def make_cursor(ordering, row):
+    value = getattr(row, ordering.lstrip("-"))
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return signing.dumps([ordering, value, row.pk], salt=CURSOR_SALT, compress=True)
+
+
+def read_cursor(ordering, token):
+    """(value, pk) from `token`, or None if it is invalid or made for another sort."""
+    if not token:
+        return None
+    try:
+        sort, value, pk = signing.loads(token, salt=CURSOR_SALT)
+        if sort != ordering or not isinstance(pk, int):
+            return None
+        if ordering.lstrip("-") != "title":
+            value = datetime.fromisoformat(value)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    return value, pk
+
+
+class Page:
+    """One page of rows; `next`/`previous` are query parameters, or None."""
+
+    def __init__(self, rows, next=None, previous=None, number=None):
+        self.rows = rows
+        self.next = next
+        self.previous = previous
+        self.number = number
+
+
+def keyset_page(queryset, ordering, per_page, after=None, before=None):
+    field = ordering.lstrip("-")
+    backwards = before is not None
+    # Going back reads the index the other way and flips the rows afterwards.
+    descending = ordering.startswith("-") != backwards
+    cursor = before if backwards else after
+    if cursor is not None:
+        value, pk = cursor
+        op = "lt" if descending else "gt"
+        # The redundant bound is what the index seeks on; the OR alone is a filter.
+        queryset = queryset.filter(
+            Q(**{"%s__%se" % (field, op): value}),
+            Q(**{"%s__%s" % (field, op): value}) | Q(**{field: value, "pk__%s" % op: pk}),
+        )
+    prefix = "-" if descending else ""
+    rows = list(queryset.order_by(prefix + field, prefix + "pk")[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return Page(rows)
+    has_next = True if backwards else more
+    has_previous = more if backwards else cursor is not None
+    return Page(
+        rows,
+        next={"after": make_cursor(ordering, rows[-1])} if has_next else None,
+        previous={"before": make_cursor(ordering, rows[0])} if has_previous else None,
+    )
+
+
+def numbered_page(queryset, number, per_page):
+    try:
+        number = max(int(number), 1)
+    except (TypeError, ValueError):
+        number = 1
+    offset = (number - 1) * per_page
+    rows = list(queryset[offset:offset + per_page + 1])
+    return Page(
+        rows[:per_page],
+        next={"page": number + 1} if len(rows) > per_page else None,
+        previous={"page": number - 1} if number > 1 else None,
+        number=number,
+    )
+
+
+def cached_count(queryset, filter_key):
+    """(total, estimated) for `queryset`; `filter_key` identifies its filters."""
+    key = "file_manager:count:%s:%s" % (
+        files_version(), hashlib.md5(filter_key.encode()).hexdigest(),
+    )
+    result = cache.get(key)
+    if result is None:
+        estimate = estimated_count(queryset)
+        if estimate is not None and estimate > _setting("FILE_BROWSER_ESTIMATED_COUNT_THRESHOLD", 10_000):
+            result = (estimate, True)
+        else:
+            result = (queryset.count(), False)
+        cache.set(key, result, _setting("FILE_BROWSER_COUNT_TIMEOUT", 600))
+    return result
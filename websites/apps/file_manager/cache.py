@@ -0,0 +1,21 @@
+# apps/file_manager/cache.py
+"""
+Version counter for cached File counts (the file browser's totals).
+
+Saving or deleting a File, or a bulk import, bumps the counter (see
+signals.py and ingest.announce), so every cached count misses at once.
+"""
+from django.core.cache import cache
+
+VERSION_KEY = "file_manager:version"
+
+
+def files_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def bump_files_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
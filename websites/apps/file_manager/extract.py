@@ -0,0 +1,162 @@
+# apps/file_manager/extract.py
+"""
+Text extraction for document Files.
+
+    process(file_id)  ->  "extracted" | "unchanged" | "reindexed" | "skipped" | FileText status
+
+reads the stored object once, hashing it while it is spooled to a local
+temporary file, and skips parsing when the SHA-256 matches the stored
+FileText. PDFs go through pypdf, DOCX through the standard library (it is
+a zip of WordprocessingML), plain text is decoded as is. The result is
+stored zlib-compressed in FileText, and on PostgreSQL a weighted tsvector
+(title A, description B, text C) is written alongside for the file list's
+`q` filter (filter.DocumentSearchFilter).
+
+CPU-bound: `manage.py extract_file_text` runs it in a process pool, and
+saves queue it as a job (`run_worker --pool process`).
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Value
+
+from .models import File, FileText
+
+logger = logging.getLogger(__name__)
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCX_PARTS = re.compile(r"word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def extract_pdf(path):
+    from pypdf import PdfReader  # optional dependency, only needed here
+
+    reader = PdfReader(path)
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_docx(path):
+    paragraphs = []
+    with zipfile.ZipFile(path) as archive:
+        for name in sorted(archive.namelist()):
+            if not DOCX_PARTS.match(name):
+                continue
+            root = ElementTree.fromstring(archive.read(name))
+            for paragraph in root.iter(WORD_NS + "p"):
+                parts = []
+                for node in paragraph.iter():
+                    if node.tag == WORD_NS + "t" and node.text:
+                        parts.append(node.text)
+                    elif node.tag == WORD_NS + "tab":
+                        parts.append("\t")
+                    elif node.tag in (WORD_NS + "br", WORD_NS + "cr"):
+                        parts.append("\n")
+                paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def extract_txt(path):
+    with open(path, "rb") as handle:
+        return handle.read().decode("utf-8", errors="replace")
+
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+    ".txt": extract_txt,
+}
+
+
+def supported(name):
+    return os.path.splitext(name)[1].lower() in EXTRACTORS
+
+
+def normalize(text):
+    text = SPACE_RE.sub(" ", text.replace("\x00", ""))
+    return BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def spool(file_field):
+    """Copy the stored object to a temporary file; return (path, sha256)."""
+    digest = hashlib.sha256()
+    handle = tempfile.NamedTemporaryFile(suffix=os.path.splitext(file_field.name)[1], delete=False)
+    try:
+        with handle, file_field.storage.open(file_field.name, "rb") as source:
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                digest.update(chunk)
+                handle.write(chunk)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    return handle.name, digest.hexdigest()
+
+
+def update_search_vector(file_id, title, description, text):
+    if connection.vendor != "postgresql":
+        return
+    from django.contrib.postgres.search import SearchVector
+
+    config = _setting("FILE_TEXT_SEARCH_CONFIG", "english")
+    FileText.objects.filter(pk=file_id).update(search=(
+        SearchVector(Value(title), weight="A", config=config)
+        + SearchVector(Value(description or ""), weight="B", config=config)
+        + SearchVector(Value(text[:_setting("FILE_TEXT_INDEX_CHARS", 500_000)]), weight="C", config=config)
+    ))
+
+
+def process(file_id, force=False):
+    """Extract (or re-index) the text of one File. Returns what was done."""
+    file = File.objects.filter(pk=file_id).select_related("text").first()
+    if file is None or file.file_type != "document" or not file.file:
+        return "skipped"
+    previous = getattr(file, "text", None)
+    name = file.file.name
+    if not supported(name):
+        FileText.objects.update_or_create(file=file, defaults={
+            "source_name": name, "sha256": "", "status": FileText.UNSUPPORTED,
+            "error": "", "data": b"", "chars": 0,
+        })
+        return FileText.UNSUPPORTED
+    if previous and previous.source_name == name and not force:
+        # Stored names are never reused, so the bytes are the same: only the
+        # title/description part of the vector can be stale.
+        update_search_vector(file.pk, file.title, file.description, previous.text)
+        return "reindexed"
+    if file.file.size > _setting("FILE_TEXT_MAX_BYTES", 100 * 1024 ** 2):
+        return "skipped"
+
+    path, sha256 = spool(file.file)
+    try:
+        if previous and previous.sha256 == sha256 and not force:
+            FileText.objects.filter(pk=file.pk).update(source_name=name)
+            update_search_vector(file.pk, file.title, file.description, previous.text)
+            return "unchanged"
+        try:
+            text = normalize(EXTRACTORS[os.path.splitext(name)[1].lower()](path))
+            status, error = (FileText.OK if text else FileText.EMPTY), ""
+        except Exception as exc:
+            logger.warning("Text extraction failed for %s: %s", name, exc)
+            text, status, error = "", FileText.FAILED, "%s: %s" % (type(exc).__name__, exc)
+    finally:
+        os.unlink(path)
+
+    text = text[:_setting("FILE_TEXT_MAX_CHARS", 2_000_000)]
+    FileText.objects.update_or_create(file=file, defaults={
+        "source_name": name, "sha256": sha256, "status": status, "error": error,
+        "data": FileText.compress(text) if text else b"", "chars": len(text),
+    })
+    update_search_vector(file.pk, file.title, file.description, text)
+    return "extracted" if status == FileText.OK else status
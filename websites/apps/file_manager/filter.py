@@ -1,19 +1,52 @@
 import django_filters
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django_filters.constants import EMPTY_VALUES
+from nascp_web.search import SubstringFilter, substring_search
 from .models import File
 
+
+class DocumentSearchFilter(django_filters.CharFilter):
+    """
+    Full-text search over title, description and extracted document text
+    (FileText.search), best matches first. Files without extracted text
+    still match on title/description. Other databases than PostgreSQL
+    fall back to substring search on title/description.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if connection.vendor != 'postgresql':
+            return substring_search(qs, ['title', 'description'], value)
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(
+            value, search_type='websearch',
+            config=getattr(settings, 'FILE_TEXT_SEARCH_CONFIG', 'english'),
+        )
+        text_match = File.objects.filter(text__search=query).values('pk')
+        return (
+            substring_search(qs, ['title', 'description'], value) | qs.filter(pk__in=text_match)
+        ).annotate(rank=SearchRank(F('text__search'), query)).order_by(
+            F('rank').desc(nulls_last=True), '-created_at'
+        )
+
+
 class FileFilter(django_filters.FilterSet):
     """
     Provides filtering for the File model, allowing searches by title, category,
     file type, and a range of creation dates.
     """
-    title = django_filters.CharFilter(
+    q = DocumentSearchFilter(label='Search titles and document text')
+    # Substring filters are served by the pg_trgm indexes (see nascp_web.search).
+    title = SubstringFilter(
         field_name='title',
-        lookup_expr='icontains',
         label='Title contains'
     )
-    category = django_filters.CharFilter(
+    category = SubstringFilter(
         field_name='category',
-        lookup_expr='icontains',
         label='Category contains'
     )
     file_type = django_filters.ChoiceFilter(
@@ -0,0 +1,133 @@
+# apps/file_manager/folders.py
+"""
+The folder tree behind /api/jstree/: category -> year -> month -> Files.
+
+Year and month come from the upload path (upload_to 'uploads/%Y/%m/%d/'),
+or from created_at for names that do not have them. Each File points at
+its month node (File.folder), and every node keeps the number of Files
+below it, so an expand reads one node's children through an index
+instead of grouping the whole table.
+
+Kept current by the File signals: a save that changes the category or
+the upload moves the File and adjusts the counts of both ancestor chains
+with one UPDATE each (the chain is every prefix of `path`). Bulk imports
+call assign()/add() around bulk_create. Nodes whose count drops to zero
+are hidden, not deleted, so a concurrent save never points at a removed
+node; `manage.py rebuild_folder_tree` recounts everything and prunes them.
+"""
+import re
+from urllib.parse import quote
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import File, FolderNode
+
+KINDS = (FolderNode.CATEGORY, FolderNode.YEAR, FolderNode.MONTH)
+UPLOAD_DATE_RE = re.compile(r"(?:^|/)(\d{4})/(\d{2})/")
+
+
+def leaf_parts(category, name, created_at=None):
+    """(category, year, month) of a File."""
+    match = UPLOAD_DATE_RE.search(name or "")
+    if match:
+        year, month = match.groups()
+    else:
+        when = created_at or timezone.now()
+        year, month = "%04d" % when.year, "%02d" % when.month
+    return (category or "", year, month)
+
+
+def node_path(parts):
+    return "/".join([quote(parts[0], safe="")] + list(parts[1:]))
+
+
+def chain(path):
+    """`path` and the paths of its ancestors."""
+    segments = path.split("/")
+    return ["/".join(segments[:depth]) for depth in range(1, len(segments) + 1)]
+
+
+def ensure(parts):
+    """The month node for `parts`, creating it and its ancestors if needed."""
+    node = FolderNode.objects.filter(path=node_path(parts)).first()
+    if node is not None:
+        return node
+    for depth, kind in enumerate(KINDS):
+        node, _created = FolderNode.objects.get_or_create(
+            path=node_path(parts[:depth + 1]),
+            defaults={"parent": node, "kind": kind, "name": parts[depth]},
+        )
+    return node
+
+
+def _count(path, delta):
+    FolderNode.objects.filter(path__in=chain(path)).update(
+        file_count=Greatest(F("file_count") + delta, 0)
+    )
+
+
+def place(file):
+    """Put a saved File in its month node (post_save)."""
+    leaf = ensure(leaf_parts(file.category, file.file.name, file.created_at))
+    if leaf.pk == file.folder_id:
+        return
+    previous = file.folder_id
+    File.objects.filter(pk=file.pk).update(folder=leaf)
+    file.folder = leaf
+    _count(leaf.path, 1)
+    if previous:
+        _uncount(previous)
+
+
+def remove(file):
+    """Take a deleted File out of the counts (post_delete)."""
+    if file.folder_id:
+        _uncount(file.folder_id)
+
+
+def _uncount(node_id):
+    path = FolderNode.objects.filter(pk=node_id).values_list("path", flat=True).first()
+    if path is not None:
+        _count(path, -1)
+
+
+def assign(files):
+    """Set `folder` on unsaved Files (before bulk_create); one lookup per month."""
+    leaves = {}
+    for file in files:
+        parts = leaf_parts(file.category, file.file.name, file.created_at)
+        if parts not in leaves:
+            leaves[parts] = ensure(parts)
+        file.folder = leaves[parts]
+
+
+def add(files):
+    """Count Files that assign() placed, once they are inserted."""
+    per_leaf = {}
+    for file in files:
+        if file.folder is not None:
+            per_leaf[file.folder.path] = per_leaf.get(file.folder.path, 0) + 1
+    for path, count in per_leaf.items():
+        _count(path, count)
+
+
+def rebuild(batch_size=2000):
+    """Re-place every File and recount every node. Returns (files, nodes)."""
+    with transaction.atomic():
+        leaves = {}
+        rows = File.objects.values_list("pk", "category", "file", "created_at", "folder_id")
+        for pk, category, name, created_at, folder_id in rows.iterator(chunk_size=batch_size):
+            leaves.setdefault(leaf_parts(category, name, created_at), []).append((pk, folder_id))
+
+        FolderNode.objects.update(file_count=0)
+        for parts, files in leaves.items():
+            leaf = ensure(parts)
+            moved = [pk for pk, folder_id in files if folder_id != leaf.pk]
+            for start in range(0, len(moved), batch_size):
+                File.objects.filter(pk__in=moved[start:start + batch_size]).update(folder=leaf)
+            _count(leaf.path, len(files))
+        FolderNode.objects.filter(file_count=0).delete()
+    return sum(map(len, leaves.values())), FolderNode.objects.count()
@@ -0,0 +1,269 @@
+# apps/file_manager/ingest.py
+"""
+Bulk ingestion of a directory or ZIP of files (`manage.py ingest_files`).
+
+    plan(source, manifest)  ->  [Item]      what would be created
+    Copier(source)(item)                    hash + store one blob (threads)
+    postprocess(file_id)                    text / thumbnail / image variants (processes)
+    announce(files)                         the follow-up jobs signals would queue
+    refresh_lists(files)                    after post-processing added thumbnails
+
+Without a manifest every regular file is taken: `file_type` comes from
+the extension, `category` from the first directory under the root
+(reports/2024/q1.pdf -> "reports") and `title` from the file name. A CSV
+manifest (columns: path, title, description, category, file_type; only
+`path` is required) limits the run to its rows and overrides any of them.
+"""
+import csv
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from dataclasses import dataclass
+
+from django.core.files import File as DjangoFile
+from django.core.files.storage import default_storage
+
+from .cache import bump_files_version
+from .models import File
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".bmp", ".tif", ".tiff", ".svg"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".webm", ".mkv", ".avi", ".mpeg", ".mpg"}
+MANIFEST_NAME = "manifest.csv"
+CHUNK_SIZE = 1024 * 1024
+
+
+class IngestError(Exception):
+    pass
+
+
+@dataclass
+class Item:
+    path: str               # relative to the directory root / ZIP member name
+    size: int
+    title: str
+    description: str
+    category: str
+    file_type: str
+    name: str = ""          # storage name, once copied
+    sha256: str = ""
+
+
+def infer_file_type(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return "image"
+    if extension in VIDEO_EXTENSIONS:
+        return "video"
+    return "document"
+
+
+def infer_category(path):
+    parts = path.replace("\\", "/").split("/")
+    return parts[0] if len(parts) > 1 else ""
+
+
+def infer_title(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return " ".join(stem.replace("_", " ").replace("-", " ").split())[:255] or stem[:255]
+
+
+class Source:
+    """A directory or a ZIP archive, read through one interface."""
+
+    def __init__(self, location):
+        self.location = location
+        self.is_zip = zipfile.is_zipfile(location) if os.path.isfile(location) else False
+        if not self.is_zip and not os.path.isdir(location):
+            raise IngestError("%s is neither a directory nor a ZIP archive." % location)
+        # ZipFile objects are not safe to share between reader threads.
+        self._local = threading.local()
+
+    def _archive(self):
+        if not hasattr(self._local, "archive"):
+            self._local.archive = zipfile.ZipFile(self.location)
+        return self._local.archive
+
+    def entries(self):
+        """(relative path, size) of every regular, non-hidden file."""
+        if self.is_zip:
+            for info in self._archive().infolist():
+                if not info.is_dir() and not _hidden(info.filename):
+                    yield info.filename, info.file_size
+            return
+        for root, directories, files in os.walk(self.location):
+            directories[:] = sorted(d for d in directories if not _hidden(d))
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.location).replace(os.sep, "/")
+                if not _hidden(relative) and os.path.isfile(path):
+                    yield relative, os.path.getsize(path)
+
+    def open(self, path):
+        if self.is_zip:
+            return self._archive().open(path)
+        return open(os.path.join(self.location, path), "rb")
+
+
+def _hidden(path):
+    return any(part.startswith(".") or part == "__MACOSX" for part in path.split("/"))
+
+
+def read_manifest(handle):
+    rows = {}
+    for line, row in enumerate(csv.DictReader(handle), start=2):
+        path = (row.get("path") or "").strip().lstrip("/")
+        if not path:
+            raise IngestError("Manifest line %d has no path." % line)
+        rows[path] = {key: (value or "").strip() for key, value in row.items() if key}
+    return rows
+
+
+def plan(source, manifest=None, category=None):
+    """
+    Items to ingest from `source` (a Source). `manifest` is a path to a CSV
+    file; a manifest.csv at the root of the source is used when it is None.
+    Returns (items, problems).
+    """
+    entries = dict(source.entries())
+    if manifest is None and MANIFEST_NAME in entries:
+        with source.open(MANIFEST_NAME) as handle:
+            rows = read_manifest(io.TextIOWrapper(handle, encoding="utf-8-sig"))
+    elif manifest:
+        with open(manifest, encoding="utf-8-sig", newline="") as handle:
+            rows = read_manifest(handle)
+    else:
+        rows = None
+    entries.pop(MANIFEST_NAME, None)
+
+    items, problems = [], []
+    types = {value for value, _label in File.FILE_TYPE_CHOICES}
+    for path in (rows if rows is not None else entries):
+        if path not in entries:
+            problems.append("%s: listed in the manifest but not found" % path)
+            continue
+        row = rows[path] if rows is not None else {}
+        item = Item(
+            path=path,
+            size=entries[path],
+            title=row.get("title") or infer_title(path),
+            description=row.get("description", ""),
+            category=row.get("category") or infer_category(path) or category or "",
+            file_type=row.get("file_type") or infer_file_type(path),
+        )
+        if item.file_type not in types:
+            problems.append("%s: unknown file_type %r" % (path, item.file_type))
+            continue
+        items.append(item)
+    return items, problems
+
+
+def sha256_of(source, path):
+    digest = hashlib.sha256()
+    with source.open(path) as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Copier:
+    """
+    Stores items into default_storage, skipping any whose bytes were
+    already stored earlier in the same run. Safe to call from many threads.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._seen = {}         # sha256 -> path of the stored copy
+        self._locks = {}        # sha256 -> lock held while that hash is copied
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        """Returns "copied" or "duplicate of <path>"."""
+        item.sha256 = sha256_of(self.source, item.path)
+        with self._lock:
+            hash_lock = self._locks.setdefault(item.sha256, threading.Lock())
+        # A twin waits for the copy in flight; if that copy fails, the hash
+        # stays unrecorded and the twin stores its own bytes instead.
+        with hash_lock:
+            first = self._seen.get(item.sha256)
+            if first is not None:
+                return "duplicate of %s" % first
+            with self.source.open(item.path) as handle:
+                item.name = default_storage.save(
+                    File.new_upload_name(os.path.basename(item.path)),
+                    DjangoFile(handle, name=os.path.basename(item.path)),
+                )
+            self._seen[item.sha256] = item.path
+        return "copied"
+
+
+def create_rows(items, uploaded_by=None, batch_size=500):
+    from . import folders
+
+    rows = [
+        File(
+            title=item.title, description=item.description, file=item.name,
+            category=item.category or None, file_type=item.file_type,
+            uploaded_by=uploaded_by,
+        )
+        for item in items
+    ]
+    # bulk_create sends no post_save: place the rows in the folder tree here.
+    folders.assign(rows)
+    files = File.objects.bulk_create(rows, batch_size=batch_size)
+    folders.add(files)
+    return files
+
+
+def postprocess(file_id):
+    """Per-file work a post_save would have queued; runs in a worker process."""
+    file = File.objects.filter(pk=file_id).only("file", "file_type").first()
+    if file is None:
+        return "missing"
+    if file.file_type == "document":
+        from .extract import process
+
+        return "text " + process(file_id)
+    if file.file_type == "image":
+        from apps.content_creator.images import make_variants
+
+        from .thumbnails import make_thumbnail
+
+        # Announced once for the batch (refresh_lists), not per file.
+        make_thumbnail(file_id, announce=False)
+        return "image variants" if make_variants(default_storage, file.file.name) else "image (not resized)"
+    return "nothing to do"
+
+
+def announce(files):
+    """
+    bulk_create sends no post_save, so queue once for the whole batch what
+    the File receivers would have queued per row.
+    """
+    from apps.feeds.publish import file_keys as feed_keys
+    from apps.feeds.tasks import rebuild_feeds
+    from apps.related.tasks import update_related
+
+    if not files:
+        return
+    bump_files_version()
+    rebuild_feeds.delay(feed_keys())
+    refresh_lists(files)
+    update_related.delay(["file:%d" % file.pk for file in files])
+
+
+def refresh_lists(files):
+    """Purge and republish the lists showing `files`; the purge tells open SPA pages."""
+    from apps.edge_cache.keys import file_keys
+    from apps.edge_cache.tasks import purge_surrogate_keys
+    from apps.prerender.signals import publish_file_snapshots
+
+    # New rows have no page of their own cached yet; only their lists do.
+    list_keys = sorted({
+        key for file in files for key in file_keys(file.pk, file.category, file.file_type)
+        if not key.startswith("file:")
+    })
+    purge_surrogate_keys.delay(list_keys)
+    publish_file_snapshots(sender=File, instance=files[-1])
@@ -0,0 +1,157 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.file_manager import ingest
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+def _megabytes(size):
+    return size / 1024 ** 2
+
+
+class Progress:
+    """Prints `label: done/total ...` at most every `interval` seconds, and at the end."""
+
+    def __init__(self, command, label, total, interval=2.0):
+        self.command, self.label, self.total, self.interval = command, label, total, interval
+        self.started = self.last = time.monotonic()
+        self.done = 0
+        self.bytes = 0
+
+    def step(self, size=0):
+        self.done += 1
+        self.bytes += size
+        now = time.monotonic()
+        if now - self.last >= self.interval or self.done == self.total:
+            self.last = now
+            self.command.stdout.write("  %s: %s" % (self.label, self.rate()))
+
+    def rate(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        line = "%d/%d files in %.1fs, %.1f files/s" % (self.done, self.total, elapsed, self.done / elapsed)
+        if self.bytes:
+            line += ", %.1f MB at %.1f MB/s" % (_megabytes(self.bytes), _megabytes(self.bytes) / elapsed)
+        return line
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest a directory or ZIP of files as File rows: infer type/category "
+        "from paths or a CSV manifest, copy blobs to storage in parallel, "
+        "bulk-insert the rows and post-process them (text, image variants)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip archive.")
+        parser.add_argument("--manifest",
+                            help="CSV with path,title,description,category,file_type "
+                                 "(default: manifest.csv at the root of the source, if any).")
+        parser.add_argument("--category", help="Category for files the manifest/path does not give one.")
+        parser.add_argument("--uploaded-by", help="Username recorded as uploader.")
+        parser.add_argument("--copy-workers", type=int, default=8,
+                            help="Threads copying blobs into storage.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Post-processing processes (default: one per CPU).")
+        parser.add_argument("--no-postprocess", action="store_true",
+                            help="Skip text extraction and image variants.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only show what would be ingested.")
+
+    def handle(self, *args, **options):
+        uploaded_by = None
+        if options["uploaded_by"]:
+            uploaded_by = get_user_model().objects.filter(username=options["uploaded_by"]).first()
+            if uploaded_by is None:
+                raise CommandError("No user named %r." % options["uploaded_by"])
+        try:
+            source = ingest.Source(options["source"])
+            items, problems = ingest.plan(source, options["manifest"], options["category"])
+        except ingest.IngestError as exc:
+            raise CommandError(str(exc))
+        for problem in problems:
+            self.stderr.write("Skipping %s" % problem)
+
+        total_bytes = sum(item.size for item in items)
+        self.stdout.write("%d files, %.1f MB to ingest from %s." % (
+            len(items), _megabytes(total_bytes), options["source"]))
+        if options["dry_run"]:
+            for item in items:
+                self.stdout.write("  %-9s %-20s %8.1f KB  %s  <- %s" % (
+                    item.file_type, item.category[:20] or "-", item.size / 1024, item.title, item.path))
+            by_kind = Counter((item.file_type, item.category or "-") for item in items)
+            for (file_type, category), count in sorted(by_kind.items()):
+                self.stdout.write("  %5d %s / %s" % (count, file_type, category))
+            return
+        if not items:
+            return
+
+        # 1. Blobs: I/O bound, so threads.
+        copier = ingest.Copier(source)
+        progress = Progress(self, "copy", len(items))
+        copied, duplicates = [], []
+        with ThreadPoolExecutor(max_workers=options["copy_workers"]) as pool:
+            futures = {pool.submit(copier, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as exc:
+                    self.stderr.write("Could not copy %s: %s" % (item.path, exc))
+                    outcome = None
+                if outcome == "copied":
+                    copied.append(item)
+                elif outcome:
+                    duplicates.append((item.path, outcome))
+                progress.step(item.size)
+        copy_summary = progress.rate()
+        for path, outcome in duplicates:
+            self.stdout.write("  skipped %s (%s)" % (path, outcome))
+
+        # 2. Rows: one INSERT per batch; remove the blobs again if it fails.
+        copied.sort(key=lambda item: item.path)
+        started = time.monotonic()
+        try:
+            files = ingest.create_rows(copied, uploaded_by)
+        except Exception:
+            for item in copied:
+                default_storage.delete(item.name)
+            raise
+        self.stdout.write("  insert: %d rows in %.2fs" % (len(files), time.monotonic() - started))
+        ingest.announce(files)
+
+        # 3. Post-processing: CPU bound, so processes.
+        outcomes = Counter()
+        if files and not options["no_postprocess"]:
+            progress = Progress(self, "post-process", len(files))
+            # Forked workers must not share the parent's database socket.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+                futures = [pool.submit(ingest.postprocess, file.pk) for file in files]
+                for future in as_completed(futures):
+                    try:
+                        outcomes[future.result()] += 1
+                    except Exception as exc:
+                        outcomes["failed (%s)" % type(exc).__name__] += 1
+                    progress.step()
+            if any(outcome.startswith("image") for outcome in outcomes):
+                # The lists announced above were cached without thumbnails.
+                ingest.refresh_lists(files)
+
+        self.stdout.write(self.style.SUCCESS(
+            "Ingested %d files (%d duplicates, %d problems). Copy: %s." % (
+                len(files), len(duplicates), len(problems), copy_summary)
+        ))
+        if outcomes:
+            self.stdout.write("Post-processing: %s." % ", ".join(
+                "%d %s" % (count, outcome) for outcome, count in outcomes.most_common()))
@@ -0,0 +1,62 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.file_manager.models import File
+from apps.file_manager.thumbnails import make_thumbnail
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+def _make(file_id, force):
+    # One unreadable object (e.g. missing from storage) must not end the run.
+    try:
+        return make_thumbnail(file_id, force=force)
+    except Exception as exc:
+        return "unreadable (%s)" % type(exc).__name__
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the list thumbnail (derivatives/...-<FILE_THUMBNAIL_WIDTH>w) of "
+        "every image File. Files whose thumbnail already exists are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (default: one per CPU).")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-create thumbnails that already exist.")
+        parser.add_argument("--missing", action="store_true",
+                            help="Only Files that have no thumbnail recorded.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the Files that would be read.")
+
+    def handle(self, *args, **options):
+        files = File.objects.filter(file_type="image").exclude(file="")
+        if options["missing"]:
+            files = files.filter(thumbnail="")
+        ids = list(files.order_by("pk").values_list("pk", flat=True))
+        if options["dry_run"]:
+            self.stdout.write("%d image Files would be read." % len(ids))
+            return
+
+        started = time.monotonic()
+        # Forked workers must not share the parent's database socket.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            outcomes = Counter(pool.map(partial(_make, force=options["force"]), ids, chunksize=8))
+        self.stdout.write(self.style.SUCCESS(
+            "Processed %d image Files in %.1fs: %s." % (
+                len(ids), time.monotonic() - started,
+                ", ".join("%d %s" % (count, outcome) for outcome, count in outcomes.most_common()),
+            )
+        ))
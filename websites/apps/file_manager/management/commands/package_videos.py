@@ -0,0 +1,63 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.file_manager.models import File, FileStream
+from apps.file_manager.stream import package
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+def _package(file_id, force):
+    # One unreadable object (e.g. missing from storage) must not end the run.
+    try:
+        return package(file_id, force=force)
+    except Exception as exc:
+        return "unreadable (%s)" % type(exc).__name__
+
+
+class Command(BaseCommand):
+    help = (
+        "Package every video File as HLS (ffmpeg). Uploads already packaged "
+        "are skipped."
+    )
+
+    def add_arguments(self, parser):
+        # ffmpeg already uses every core for one file.
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Files packaged at once (default: 1).")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-package even when the upload is already packaged.")
+        parser.add_argument("--missing", action="store_true",
+                            help="Only Files that have no ready stream yet.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the Files that would be packaged.")
+
+    def handle(self, *args, **options):
+        files = File.objects.filter(file_type="video").exclude(file="")
+        if options["missing"]:
+            files = files.exclude(stream__status=FileStream.READY)
+        ids = list(files.order_by("pk").values_list("pk", flat=True))
+        if options["dry_run"]:
+            self.stdout.write("%d video Files would be packaged." % len(ids))
+            return
+
+        started = time.monotonic()
+        # Forked workers must not share the parent's database socket.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            outcomes = Counter(pool.map(partial(_package, force=options["force"]), ids))
+        self.stdout.write(self.style.SUCCESS(
+            "Processed %d video Files in %.1fs: %s." % (
+                len(ids), time.monotonic() - started,
+                ", ".join("%d %s" % (count, outcome) for outcome, count in outcomes.most_common()),
+            )
+        ))
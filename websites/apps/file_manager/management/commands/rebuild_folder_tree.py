@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.file_manager.folders import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the category/year/month folder tree behind /api/jstree/: "
+        "re-place every File, recount every node and drop empty ones. Run "
+        "once after deploying it; saves keep it current afterwards."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        files, nodes = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            "Placed %d Files in %d folder nodes in %.1fs." % (files, nodes, time.monotonic() - started)
+        ))
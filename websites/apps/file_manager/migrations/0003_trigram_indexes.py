@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from nascp_web.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_manager', '0002_initial'),
+    ]
+
+    operations = [
+        trigram_indexes('file_manager_file', 'title', 'description', 'category'),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:22
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+from nascp_web.search import search_vector_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_manager', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileText',
+            fields=[
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='file_manager.file')),
+                ('source_name', models.CharField(max_length=255)),
+                ('sha256', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('empty', 'Empty'), ('failed', 'Failed'), ('unsupported', 'Unsupported')], max_length=12)),
+                ('error', models.TextField(blank=True)),
+                ('data', models.BinaryField(default=b'')),
+                ('chars', models.PositiveIntegerField(default=0)),
+                ('search', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        search_vector_index('file_manager_filetext', 'search'),
+    ]
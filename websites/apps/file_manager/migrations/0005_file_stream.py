@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_manager', '0004_file_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileStream',
+            fields=[
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stream', serialize=False, to='file_manager.file')),
+                ('source_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('ready', 'Ready'), ('failed', 'Failed')], max_length=12)),
+                ('error', models.TextField(blank=True)),
+                ('playlist', models.CharField(blank=True, max_length=255)),
+                ('renditions', models.JSONField(blank=True, default=list)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('packaged_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
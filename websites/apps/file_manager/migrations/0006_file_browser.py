@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_manager', '0005_file_stream'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, max_length=255, upload_to=''),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['created_at', 'id'], name='file_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['updated_at', 'id'], name='file_updated_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['title', 'id'], name='file_title_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['file_type', 'created_at', 'id'], name='file_type_created_keyset_idx'),
+        ),
+    ]
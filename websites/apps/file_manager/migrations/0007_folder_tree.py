@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('file_manager', '0006_file_browser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FolderNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, unique=True)),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('year', 'Year'), ('month', 'Month')], max_length=8)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('parent', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='file_manager.foldernode')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='folder',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='files', to='file_manager.foldernode'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['folder', 'title', 'id'], name='file_folder_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foldernode',
+            index=models.Index(fields=['parent', 'name'], name='folder_node_children_idx'),
+        ),
+    ]
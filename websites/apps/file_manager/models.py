@@ -1,5 +1,10 @@
+import os
+import zlib
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.crypto import get_random_string
 
 User = get_user_model()
 
@@ -15,6 +20,19 @@ class File(models.Model):
     description = models.TextField(blank=True)
     # The FileField will store the uploaded file and organize uploads by date.
     file = models.FileField(upload_to='uploads/%Y/%m/%d/')
+    # Width-capped copy under derivatives/ (see thumbnails.py); lists show
+    # this instead of the original.
+    thumbnail = models.ImageField(max_length=255, blank=True, editable=False)
+    # Month node of the folder tree (folders.py); maintained by signals.
+    folder = models.ForeignKey(
+        'FolderNode',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,  # led by file_folder_title_idx
+        related_name='files'
+    )
     # You can use a CharField for category or later replace it with a ForeignKey to a Category model.
     category = models.CharField(max_length=100, blank=True, null=True)
     file_type = models.CharField(max_length=20, choices=FILE_TYPE_CHOICES)
@@ -32,6 +50,16 @@ class File(models.Model):
     class Meta:
         # Order files by the most recent uploads first.
         ordering = ['-created_at']
+        # (column, id) pairs behind the file browser's keyset paging; a
+        # b-tree serves both sort directions.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='file_created_keyset_idx'),
+            models.Index(fields=['updated_at', 'id'], name='file_updated_keyset_idx'),
+            models.Index(fields=['title', 'id'], name='file_title_keyset_idx'),
+            models.Index(fields=['file_type', 'created_at', 'id'], name='file_type_created_keyset_idx'),
+            # A month's files in the folder tree, by title.
+            models.Index(fields=['folder', 'title', 'id'], name='file_folder_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -43,10 +71,163 @@ class File(models.Model):
         from django.urls import reverse
         return reverse('file_manager:file_detail', kwargs={'pk': self.pk})
 
+    @property
+    def download_link(self):
+        """
+        Link to the stored file for lists and pages. With signed storage it
+        is the stable redirect (file_download): those responses are cached
+        far longer than a signature stays valid.
+        """
+        return self._stored_link(self.file, 'file_download')
+
+    @property
+    def thumbnail_link(self):
+        return self._stored_link(self.thumbnail, 'file_thumbnail')
+
+    def _stored_link(self, field_file, view_name):
+        if not field_file:
+            return ''
+        from django.urls import reverse
+        from nascp_web.storage import signs_urls
+
+        if signs_urls(field_file.storage):
+            return reverse(view_name, kwargs={'pk': self.pk})
+        return field_file.url
+
     @property
     def extension(self):
         """
         Utility property to get the file extension.
         """
-        import os
         return os.path.splitext(self.file.name)[1].lower()
+
+    @classmethod
+    def new_upload_name(cls, filename):
+        """
+        A fresh storage name under `upload_to` for a direct (presigned)
+        upload. The random suffix stands in for the exists() probe that
+        storage.save() would make, so two uploads never share a key.
+        """
+        field = cls._meta.get_field('file')
+        name = field.generate_filename(None, os.path.basename(filename))
+        root, ext = os.path.splitext(name)
+        return '%s_%s%s' % (root, get_random_string(7), ext)
+
+    @classmethod
+    def upload_prefix(cls):
+        """Static part of `upload_to` ('uploads/'), which direct uploads must sit under."""
+        return str(cls._meta.get_field('file').upload_to).split('%', 1)[0]
+
+
+class FileText(models.Model):
+    """
+    Text extracted from a document File (apps/file_manager/extract.py),
+    zlib-compressed, plus its full-text search vector. Kept out of `File`
+    so listing and serialising files never reads it.
+    """
+    OK = 'ok'
+    EMPTY = 'empty'          # parsed, but no text layer (e.g. a scanned PDF)
+    FAILED = 'failed'
+    UNSUPPORTED = 'unsupported'
+    STATUS_CHOICES = (
+        (OK, 'OK'),
+        (EMPTY, 'Empty'),
+        (FAILED, 'Failed'),
+        (UNSUPPORTED, 'Unsupported'),
+    )
+
+    file = models.OneToOneField(File, on_delete=models.CASCADE, primary_key=True, related_name='text')
+    # Storage name and SHA-256 of the bytes the text came from: an unchanged
+    # name or hash means there is nothing to extract again.
+    source_name = models.CharField(max_length=255)
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    data = models.BinaryField(default=b'')
+    chars = models.PositiveIntegerField(default=0)
+    # title (A), description (B) and the first FILE_TEXT_INDEX_CHARS of text
+    # (C); GIN-indexed on PostgreSQL, unused elsewhere.
+    search = SearchVectorField(null=True, editable=False)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '%s (%s, %d chars)' % (self.file_id, self.status, self.chars)
+
+    @property
+    def text(self):
+        return zlib.decompress(self.data).decode('utf-8') if self.data else ''
+
+    @staticmethod
+    def compress(text):
+        return zlib.compress(text.encode('utf-8'), 9)
+
+
+class FileStream(models.Model):
+    """
+    HLS packaging of a video File (apps/file_manager/stream.py): the
+    master playlist in the "streams" storage and the renditions it lists.
+    """
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    )
+
+    file = models.OneToOneField(File, on_delete=models.CASCADE, primary_key=True, related_name='stream')
+    # Storage name of the upload that was packaged: a new upload repackages.
+    source_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    # "<file pk>/<token>/master.m3u8"; each packaging run gets its own
+    # directory, so every playlist and segment URL is immutable.
+    playlist = models.CharField(max_length=255, blank=True)
+    # [{"short_side": 720, "video_kbps": 2500}, ...], largest first.
+    renditions = models.JSONField(default=list, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    packaged_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '%s (%s)' % (self.file_id, self.status)
+
+    @property
+    def url(self):
+        if self.status != self.READY or not self.playlist:
+            return ''
+        from django.core.files.storage import storages
+        return storages['streams'].url(self.playlist)
+
+
+class FolderNode(models.Model):
+    """
+    Materialized category -> year -> month tree over the Files, served
+    lazily by /api/jstree/ (see folders.py). `path` is the node's own
+    name preceded by its ancestors' ("reports/2024/03", the category
+    percent-encoded); `file_count` counts the Files below the node.
+    """
+    CATEGORY = 'category'
+    YEAR = 'year'
+    MONTH = 'month'
+    KIND_CHOICES = (
+        (CATEGORY, 'Category'),
+        (YEAR, 'Year'),
+        (MONTH, 'Month'),
+    )
+
+    path = models.CharField(max_length=1024, unique=True)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, db_index=False, related_name='children'
+    )
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    # The category as stored on File ('' for none), "2024" or "03".
+    name = models.CharField(max_length=100, blank=True)
+    file_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # One expand of the tree: the children of a node, by name.
+        indexes = [
+            models.Index(fields=['parent', 'name'], name='folder_node_children_idx'),
+        ]
+
+    def __str__(self):
+        return '%s (%d)' % (self.path, self.file_count)
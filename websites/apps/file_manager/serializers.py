@@ -1,8 +1,44 @@
 # apps/file_manager/serializers.py
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from nascp_web.storage import signs_urls
 from .models import File
 
 class FileSerializer(serializers.ModelSerializer):
     class Meta:
         model = File
         fields = '__all__'  # or list specific fields you want to expose
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if signs_urls():
+            # Edge-cached like every /api/ response: no expiring signatures.
+            request = self.context.get('request')
+            for field, link in (('file', instance.download_link), ('thumbnail', instance.thumbnail_link)):
+                data[field] = request.build_absolute_uri(link) if request and link else link or None
+        return data
+
+
+class DirectUploadSerializer(serializers.ModelSerializer):
+    """
+    Registers a File whose bytes the browser already put in the bucket
+    through a presigned POST; `key` is the name the presign call returned.
+    """
+    key = serializers.CharField(max_length=File._meta.get_field('file').max_length)
+
+    class Meta:
+        model = File
+        fields = ('key', 'title', 'description', 'category', 'file_type')
+
+    def validate_key(self, key):
+        if not key.startswith(File.upload_prefix()) or '..' in key.split('/'):
+            raise serializers.ValidationError('Not a direct-upload key.')
+        if File.objects.filter(file=key).exists():
+            raise serializers.ValidationError('This upload is already registered.')
+        if not default_storage.exists(key):
+            raise serializers.ValidationError('Nothing was uploaded under this key.')
+        return key
+
+    def create(self, validated_data):
+        validated_data['file'] = validated_data.pop('key')
+        return super().create(validated_data)
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import folders
+from .cache import bump_files_version
+from .models import File, FileStream
+from .tasks import extract_file_text, make_thumbnail, package_video
+
+
+def announce_file_change(file):
+    """
+    A worker changed what `file` looks like in lists (a thumbnail, a
+    stream): purge its pages (which also tells the SPA, see apps.live) and
+    republish the API snapshots.
+    """
+    from apps.edge_cache.keys import file_keys
+    from apps.edge_cache.tasks import purge_surrogate_keys
+    from apps.prerender.signals import publish_file_snapshots
+
+    purge_surrogate_keys.delay(file_keys(file.pk, file.category, file.file_type))
+    publish_file_snapshots(sender=File, instance=file)
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def bump_files_version_on_change(sender, **kwargs):
+    bump_files_version()
+
+
+@receiver(post_save, sender=File)
+def queue_text_extraction(sender, instance, **kwargs):
+    # Also on metadata edits: the job then only refreshes the search vector.
+    if instance.file_type == 'document' and instance.file:
+        extract_file_text.delay(instance.pk)
+
+
+@receiver(post_save, sender=File)
+def queue_video_packaging(sender, instance, **kwargs):
+    # Metadata edits cost one job that finds the upload already packaged.
+    if instance.file_type == 'video' and instance.file:
+        package_video.delay(instance.pk)
+
+
+@receiver(post_save, sender=File)
+def place_in_folder_tree(sender, instance, raw=False, **kwargs):
+    if not raw:
+        folders.place(instance)
+
+
+@receiver(post_delete, sender=File)
+def remove_from_folder_tree(sender, instance, **kwargs):
+    folders.remove(instance)
+
+
+@receiver(post_save, sender=File)
+def queue_thumbnail(sender, instance, **kwargs):
+    if instance.file_type == 'image' and instance.file:
+        from .thumbnails import thumbnail_name
+
+        expected = thumbnail_name(instance.file.name)
+        if expected and instance.thumbnail.name != expected:
+            make_thumbnail.delay(instance.pk)
+
+
+@receiver(post_delete, sender=FileStream)
+def delete_stream_files(sender, instance, **kwargs):
+    if instance.playlist:
+        from .stream import delete_tree, streams_storage
+
+        directory = instance.playlist.rsplit('/', 1)[0]
+        transaction.on_commit(lambda: delete_tree(streams_storage(), directory))
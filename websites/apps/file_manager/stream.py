@@ -0,0 +1,220 @@
+# apps/file_manager/stream.py
+"""
+HLS packaging for video Files.
+
+    package(file_id)  ->  "packaged" | "unchanged" | "skipped" | FileStream status
+
+spools the upload to a temporary file, probes it with ffprobe and has a
+single ffmpeg run encode every HLS_LADDER rung no larger than the source
+(H.264 + AAC, a keyframe every HLS_SEGMENT_SECONDS so segments line up
+across rungs) into fMP4 segments, a playlist per rung and a master
+playlist. The output is uploaded to the "streams" storage under
+<file pk>/<random token>/, segments before playlists, so a playlist never
+names a missing segment. Names are never reused (repackaging writes a new
+directory and deletes the old one), so everything is served as static
+files with a one-year Cache-Control.
+
+Runs in the worker (`run_worker --pool process`): saves of video Files
+queue it, `manage.py package_videos` backfills.
+"""
+import json
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.core.files.storage import storages
+from django.utils.crypto import get_random_string
+
+from .extract import spool
+from .models import File, FileStream
+from .signals import announce_file_change
+
+logger = logging.getLogger(__name__)
+
+MASTER_NAME = "master.m3u8"
+# (short side in pixels, video kbps), largest first.
+DEFAULT_LADDER = ((720, 2500), (480, 1200), (360, 600))
+
+
+class PackagingError(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def streams_storage():
+    return storages["streams"]
+
+
+def probe(path):
+    """{"width", "height", "duration", "audio"} of the first video stream, display-oriented."""
+    completed = subprocess.run(
+        [_setting("FFPROBE_BINARY", "ffprobe"), "-v", "error", "-print_format", "json",
+         "-show_format", "-show_streams", path],
+        capture_output=True, text=True, timeout=300,
+    )
+    if completed.returncode:
+        raise PackagingError("ffprobe: %s" % completed.stderr.strip()[-500:])
+    info = json.loads(completed.stdout)
+    streams = info.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    if video is None or not video.get("height"):
+        raise PackagingError("No video stream.")
+    width, height = int(video["width"]), int(video["height"])
+    rotation = video.get("tags", {}).get("rotate") or next(
+        (data.get("rotation") for data in video.get("side_data_list", []) if "rotation" in data), 0
+    )
+    if abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+    return {
+        "width": width,
+        "height": height,
+        "duration": float(info.get("format", {}).get("duration") or 0) or None,
+        "audio": any(stream.get("codec_type") == "audio" for stream in streams),
+    }
+
+
+def ladder(width, height):
+    """Rungs (short side, video kbps) to encode; never upscales."""
+    short_side = min(width, height)
+    rungs = sorted(_setting("HLS_LADDER", DEFAULT_LADDER), reverse=True)
+    fitting = [rung for rung in rungs if rung[0] <= short_side]
+    return fitting or [(short_side - short_side % 2, rungs[-1][1])]
+
+
+def ffmpeg_command(source, output_dir, rungs, portrait, audio):
+    seconds = _setting("HLS_SEGMENT_SECONDS", 6)
+    audio_kbps = _setting("HLS_AUDIO_KBPS", 96)
+    scale = "scale=%d:-2" if portrait else "scale=-2:%d"
+    graph = ["[0:v]split=%d%s" % (len(rungs), "".join("[v%d]" % index for index in range(len(rungs))))]
+    graph += ["[v%d]%s[out%d]" % (index, scale % side, index) for index, (side, _kbps) in enumerate(rungs)]
+
+    command = [
+        _setting("FFMPEG_BINARY", "ffmpeg"), "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", source, "-filter_complex", ";".join(graph),
+    ]
+    for index, (_side, kbps) in enumerate(rungs):
+        command += [
+            "-map", "[out%d]" % index,
+            "-c:v:%d" % index, "libx264",
+            "-b:v:%d" % index, "%dk" % kbps,
+            "-maxrate:v:%d" % index, "%dk" % (kbps * 1.1),
+            "-bufsize:v:%d" % index, "%dk" % (kbps * 2),
+        ]
+        if audio:
+            command += ["-map", "0:a:0", "-c:a:%d" % index, "aac", "-b:a:%d" % index, "%dk" % audio_kbps]
+    if audio:
+        command += ["-ac", "2"]
+    command += [
+        "-preset", _setting("HLS_PRESET", "veryfast"), "-profile:v", "main", "-pix_fmt", "yuv420p",
+        # Keyframes on segment boundaries only, identical in every rung, so
+        # players can switch rungs between any two segments.
+        "-sc_threshold", "0", "-force_key_frames", "expr:gte(t,n_forced*%d)" % seconds,
+        "-f", "hls", "-hls_time", str(seconds), "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", os.path.join(output_dir, "v%v", "seg_%05d.m4s"),
+        "-master_pl_name", MASTER_NAME,
+        "-var_stream_map", " ".join(
+            ("v:%d,a:%d" if audio else "v:%d") % ((index, index) if audio else (index,))
+            for index in range(len(rungs))
+        ),
+        os.path.join(output_dir, "v%v", "index.m3u8"),
+    ]
+    return command
+
+
+def encode(source, output_dir, info):
+    """Run ffmpeg; returns the rungs encoded."""
+    rungs = ladder(info["width"], info["height"])
+    command = ffmpeg_command(
+        source, output_dir, rungs, portrait=info["height"] > info["width"], audio=info["audio"],
+    )
+    completed = subprocess.run(
+        command, capture_output=True, text=True, timeout=_setting("HLS_TIMEOUT", 4 * 3600),
+    )
+    if completed.returncode:
+        raise PackagingError("ffmpeg: %s" % completed.stderr.strip()[-2000:])
+    if not os.path.exists(os.path.join(output_dir, MASTER_NAME)):
+        raise PackagingError("ffmpeg wrote no master playlist.")
+    return rungs
+
+
+def upload(output_dir, prefix, storage):
+    """Store the packaged tree under `prefix`; returns the master playlist's name."""
+    paths = []
+    for root, _directories, files in os.walk(output_dir):
+        paths += [os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, "/") for name in files]
+
+    def save(path):
+        with open(os.path.join(output_dir, path), "rb") as handle:
+            return storage.save(posixpath.join(prefix, path), DjangoFile(handle))
+
+    playlists = sorted((path for path in paths if path.endswith(".m3u8")), key=lambda path: path == MASTER_NAME)
+    with ThreadPoolExecutor(max_workers=_setting("HLS_UPLOAD_THREADS", 8)) as pool:
+        list(pool.map(save, [path for path in paths if not path.endswith(".m3u8")]))
+    for path in playlists:
+        name = save(path)
+    return name
+
+
+def delete_tree(storage, prefix):
+    """Remove everything stored under `prefix`."""
+    try:
+        directories, files = storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for name in files:
+        storage.delete(posixpath.join(prefix, name))
+    for directory in directories:
+        delete_tree(storage, posixpath.join(prefix, directory))
+
+
+def package(file_id, force=False):
+    """Package (or re-package) one video File as HLS. Returns what was done."""
+    file = File.objects.filter(pk=file_id).select_related("stream").first()
+    if file is None or file.file_type != "video" or not file.file:
+        return "skipped"
+    previous = getattr(file, "stream", None)
+    name = file.file.name
+    if previous and previous.source_name == name and previous.status == FileStream.READY and not force:
+        return "unchanged"
+
+    storage = streams_storage()
+    source, _sha256 = spool(file.file)
+    output_dir = tempfile.mkdtemp(prefix="hls-")
+    try:
+        try:
+            info = probe(source)
+            rungs = encode(source, output_dir, info)
+        except (PackagingError, OSError, ValueError, subprocess.TimeoutExpired) as exc:
+            # Unreadable or unsupported input, or no ffmpeg: retrying will not help.
+            logger.warning("HLS packaging failed for %s: %s", name, exc)
+            FileStream.objects.update_or_create(file=file, defaults={
+                "source_name": name, "status": FileStream.FAILED,
+                "error": "%s: %s" % (type(exc).__name__, exc),
+                "playlist": previous.playlist if previous else "",
+            })
+            return FileStream.FAILED
+        playlist = upload(output_dir, "%d/%s" % (file.pk, get_random_string(12).lower()), storage)
+    finally:
+        os.unlink(source)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    FileStream.objects.update_or_create(file=file, defaults={
+        "source_name": name, "status": FileStream.READY, "error": "", "playlist": playlist,
+        "renditions": [{"short_side": side, "video_kbps": kbps} for side, kbps in rungs],
+        "duration": info["duration"],
+    })
+    if previous and previous.playlist and previous.playlist != playlist:
+        delete_tree(storage, posixpath.dirname(previous.playlist))
+    # Lists and API snapshots now carry the new stream_url.
+    announce_file_change(file)
+    return "packaged"
@@ -6,14 +6,19 @@ class FileTable(tables.Table):
     title = tables.Column(linkify=True)
     
     # A custom preview column that renders different content based on the file type.
+    # Images show their thumbnail (thumbnails.py), never the original upload.
     preview = tables.TemplateColumn(
         template_code="""
             {% if record.file_type == 'image' %}
-                <img src="{{ record.file.url }}" alt="{{ record.title }}" style="max-height: 50px;" />
+                {% if record.thumbnail %}
+                    <img src="{{ record.thumbnail_link }}" alt="{{ record.title }}" loading="lazy" decoding="async" style="max-height: 50px;" />
+                {% else %}
+                    <a href="{{ record.download_link }}" target="_blank">View Image</a>
+                {% endif %}
             {% elif record.file_type == 'document' %}
-                <a href="{{ record.file.url }}" target="_blank">View Document</a>
+                <a href="{{ record.download_link }}" target="_blank">View Document</a>
             {% elif record.file_type == 'video' %}
-                <a href="{{ record.file.url }}" target="_blank">Watch Video</a>
+                <a href="{{ record.download_link }}" target="_blank">Watch Video</a>
             {% else %}
                 N/A
             {% endif %}
@@ -22,9 +27,10 @@ class FileTable(tables.Table):
         orderable=False
     )
     
-    # Other columns displaying file metadata.
-    file_type = tables.Column(verbose_name="Type")
-    category = tables.Column()
+    # Other columns displaying file metadata. Only title and the dates are
+    # sortable: the browser pages by keyset over their (column, id) indexes.
+    file_type = tables.Column(verbose_name="Type", orderable=False)
+    category = tables.Column(orderable=False)
     created_at = tables.DateTimeColumn(format="Y-m-d H:i:s", verbose_name="Uploaded On")
     updated_at = tables.DateTimeColumn(format="Y-m-d H:i:s", verbose_name="Last Updated")
     
@@ -0,0 +1,23 @@
+from apps.jobs.queue import task
+
+
+@task(max_attempts=3, priority=5)
+def extract_file_text(file_id):
+    from .extract import process  # pypdf is only needed by workers
+
+    process(file_id)
+
+
+@task(max_attempts=3, priority=10)
+def package_video(file_id):
+    # Minutes of ffmpeg per upload: behind the quick jobs.
+    from .stream import package
+
+    package(file_id)
+
+
+@task(max_attempts=3, priority=5)
+def make_thumbnail(file_id):
+    from .thumbnails import make_thumbnail as make
+
+    make(file_id)
@@ -1,3 +1,453 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import boto3
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from moto import mock_aws
+
+from nascp_web.search import substring_search
+from nascp_web.storage import download_urls
+
+from . import browse, extract, ingest
+from .filter import FileFilter
+from .models import File, FileText, FolderNode
+
+
+class SubstringSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for title in ("Annual TB report", "Doc 01 summary", "Doc 02 summary", "Mastitis notes"):
+            File.objects.create(title=title, file="uploads/2025/01/01/%s.pdf" % title[:3],
+                                file_type="document", category="reports")
+
+    def titles(self, term):
+        return sorted(substring_search(File.objects.all(), ["title"], term).values_list("title", flat=True))
+
+    def test_short_terms_match_anywhere(self):
+        self.assertEqual(self.titles("TB"), ["Annual TB report"])
+        self.assertEqual(self.titles("Doc 01"), ["Doc 01 summary"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.titles("summary doc"), ["Doc 01 summary", "Doc 02 summary"])
+        self.assertEqual(self.titles('"notes summary"'), [])
+
+
+class FolderTreeTests(TestCase):
+    def add(self, title, category, day="2024/03/05"):
+        return File.objects.create(title=title, file="uploads/%s/%s.pdf" % (day, title),
+                                   file_type="document", category=category)
+
+    def count(self, path):
+        return FolderNode.objects.get(path=path).file_count
+
+    def test_counts_follow_saves_and_deletes(self):
+        first = self.add("one", "reports")
+        self.add("two", "reports", day="2024/04/01")
+        self.assertEqual([self.count(p) for p in ("reports", "reports/2024", "reports/2024/03")], [2, 2, 1])
+
+        first.category = "guides"
+        first.save()
+        self.assertEqual([self.count(p) for p in ("reports", "reports/2024/03", "guides/2024/03")], [1, 0, 1])
+
+        first.delete()
+        self.assertEqual([self.count(p) for p in ("guides", "reports")], [0, 1])
+
+    def test_tree_hides_empty_nodes(self):
+        self.add("one", "reports").delete()
+        self.add("two", "guides")
+        top = self.client.get("/api/jstree/").json()
+        self.assertEqual([node["text"] for node in top], ["guides (1)"])
+
+        month = FolderNode.objects.get(path="guides/2024/03")
+        files = self.client.get("/api/jstree/", {"parent": "month-%d" % month.pk}).json()
+        self.assertEqual([node["text"] for node in files], ["two"])
+
+
+class KeysetPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Repeated titles: the pk has to break the ties.
+        for n, title in enumerate("aabbcdd"):
+            File.objects.create(title=title, file="uploads/2024/03/05/%d.pdf" % n,
+                                file_type="document", category="reports")
+
+    def walk(self, ordering):
+        pages, cursor = [], None
+        while True:
+            page = browse.keyset_page(File.objects.all(), ordering, 3, after=cursor)
+            pages.append(page)
+            if page.next is None:
+                return pages
+            cursor = browse.read_cursor(ordering, page.next["after"])
+
+    def test_pages_cover_every_row_once(self):
+        for ordering in ("title", "-title"):
+            expected = list(File.objects.order_by(ordering, ordering.replace("title", "pk")))
+            rows = [row for page in self.walk(ordering) for row in page.rows]
+            self.assertEqual(rows, expected)
+
+    def test_before_returns_the_previous_page(self):
+        first, second = self.walk("-title")[:2]
+        before = browse.read_cursor("-title", second.previous["before"])
+        page = browse.keyset_page(File.objects.all(), "-title", 3, before=before)
+        self.assertEqual(page.rows, first.rows)
+        self.assertIsNone(page.previous)
+
+    def test_cursor_is_bound_to_its_sort(self):
+        token = self.walk("title")[0].next["after"]
+        self.assertIsNotNone(browse.read_cursor("title", token))
+        self.assertIsNone(browse.read_cursor("-title", token))
+        self.assertIsNone(browse.read_cursor("title", token[:-2] + "xx"))
+
+
+BUCKET_STORAGES = {
+    **settings.STORAGES,
+    "default": {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": "media", "region_name": "us-east-1", "querystring_auth": True,
+            "access_key": "testing", "secret_key": "testing", "file_overwrite": False,
+        },
+    },
+}
+
+
+@mock_aws
+@override_settings(STORAGES=BUCKET_STORAGES, DIRECT_UPLOAD_MAX_BYTES=1024, MEDIA_SIGNED_URL_EXPIRE=600)
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket="media")
+        self.staff = get_user_model().objects.create_user("editor", password="pw", is_staff=True)
+        self.client.force_login(self.staff)
+
+    def presign(self, **data):
+        return self.client.post("/api/uploads/presign/", data, content_type="application/json")
+
+    def complete(self, key, **data):
+        data = {"key": key, "title": "Plan", "file_type": "document", **data}
+        return self.client.post("/api/uploads/complete/", data, content_type="application/json")
+
+    def upload(self, body=b"%PDF-1.4 plan"):
+        post = self.presign(filename="Plan.pdf").json()
+        response = requests.post(post["url"], data=post["fields"], files={"file": ("Plan.pdf", body)})
+        self.assertEqual(response.status_code, 204)
+        return post["key"]
+
+    def test_presign_pins_key_type_and_size(self):
+        post = self.presign(filename="reports/Plan.PDF").json()
+        self.assertRegex(post["key"], r"^uploads/\d{4}/\d{2}/\d{2}/Plan_\w{7}\.PDF$")
+        self.assertEqual(post["fields"]["Content-Type"], "application/pdf")
+        conditions = json.loads(base64.b64decode(post["fields"]["policy"]))["conditions"]
+        self.assertIn({"Content-Type": "application/pdf"}, conditions)
+        self.assertIn(["content-length-range", 1, 1024], conditions)
+        self.assertIn({"key": post["key"]}, conditions)
+
+        explicit = self.presign(filename="clip.bin", content_type="video/mp4").json()
+        self.assertEqual(explicit["fields"]["Content-Type"], "video/mp4")
+
+    def test_presign_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.presign(filename="Plan.pdf").status_code, 403)
+
+    def test_complete_registers_the_uploaded_object(self):
+        key = self.upload()
+        response = self.complete(key)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(File.objects.get().file.name, key)
+        self.assertEqual(self.complete(key).json(), {"key": ["This upload is already registered."]})
+
+    def test_complete_rejects_missing_and_foreign_keys(self):
+        missing = self.presign(filename="Plan.pdf").json()["key"]
+        self.assertEqual(self.complete(missing).json(), {"key": ["Nothing was uploaded under this key."]})
+        self.s3.put_object(Bucket="media", Key="private/secret.pdf", Body=b"x")
+        for key in ("private/secret.pdf", "uploads/../private/secret.pdf"):
+            self.assertEqual(self.complete(key).json(), {"key": ["Not a direct-upload key."]})
+        self.assertFalse(File.objects.exists())
+
+    def test_signed_urls_are_reused_until_half_their_lifetime(self):
+        self.s3.put_object(Bucket="media", Key="uploads/a.pdf", Body=b"x")
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            first = download_urls(["uploads/a.pdf"])
+            self.assertEqual(download_urls(["uploads/a.pdf", ""]), first)
+        set_many.assert_called_once()
+        self.assertEqual(set_many.call_args.args[1], 300)
+        self.assertEqual(requests.get(first["uploads/a.pdf"]).content, b"x")
+
+        # Once the cached copy expires a fresh signature is made.
+        cache.clear()
+        with mock.patch.object(default_storage, "url", wraps=default_storage.url) as sign:
+            download_urls(["uploads/a.pdf"])
+        sign.assert_called_once_with("uploads/a.pdf", expire=600)
+
+    @override_settings(STORAGES=settings.STORAGES)
+    def test_presign_needs_a_bucket(self):
+        self.assertEqual(self.presign(filename="Plan.pdf").status_code, 400)
+
+
+def pdf_bytes(*lines):
+    """A one-page PDF showing `lines` in Helvetica."""
+    text = " ".join("(%s) Tj 0 -16 Td" % line for line in lines)
+    stream = ("BT /F1 12 Tf 72 720 Td %s ET" % text).encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+        b" /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    out, offsets = io.BytesIO(b"%PDF-1.4\n"), []
+    out.seek(0, io.SEEK_END)
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def docx_bytes():
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    document = (
+        '<w:document %s><w:body>'
+        '<w:p><w:r><w:t>Malaria</w:t></w:r><w:r><w:tab/><w:t>guidelines</w:t></w:r></w:p>'
+        '<w:p><w:r><w:t>First line</w:t><w:br/><w:t>second   line</w:t></w:r></w:p>'
+        '</w:body></w:document>' % w
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", document)
+        archive.writestr("word/header1.xml", '<w:hdr %s><w:p><w:r><w:t>Ministry of Health</w:t></w:r></w:p></w:hdr>' % w)
+        archive.writestr("word/styles.xml", '<w:styles %s><w:p><w:r><w:t>ignored</w:t></w:r></w:p></w:styles>' % w)
+    return buffer.getvalue()
+
+
+class TextExtractionTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        storages = {**settings.STORAGES, "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": root},
+        }}
+        self.enterContext(override_settings(STORAGES=storages))
+
+    def add(self, name, data, title="Document", description=""):
+        stored = default_storage.save("uploads/%s" % name, ContentFile(data))
+        return File.objects.create(title=title, description=description, file=stored, file_type="document")
+
+    def test_pdf_text(self):
+        file = self.add("plan.pdf", pdf_bytes("National malaria plan", "Annex 2"))
+        self.assertEqual(extract.process(file.pk), "extracted")
+        text = FileText.objects.get(pk=file.pk)
+        self.assertEqual(text.status, FileText.OK)
+        self.assertEqual(text.text.split(), ["National", "malaria", "plan", "Annex", "2"])
+        self.assertEqual(text.chars, len(text.text))
+
+    def test_docx_text(self):
+        file = self.add("guide.docx", docx_bytes())
+        self.assertEqual(extract.process(file.pk), "extracted")
+        self.assertEqual(
+            FileText.objects.get(pk=file.pk).text,
+            "Malaria guidelines\nFirst line\nsecond line\nMinistry of Health",
+        )
+
+    def test_broken_and_unsupported_documents(self):
+        broken = self.add("broken.pdf", b"%PDF-1.4 truncated")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(extract.process(broken.pk), FileText.FAILED)
+        self.assertTrue(FileText.objects.get(pk=broken.pk).error)
+        sheet = self.add("data.xlsx", b"PK")
+        self.assertEqual(extract.process(sheet.pk), FileText.UNSUPPORTED)
+
+    def test_unchanged_bytes_are_not_parsed_again(self):
+        data = pdf_bytes("Cholera response")
+        file = self.add("response.pdf", data)
+        self.assertEqual(extract.process(file.pk), "extracted")
+        with mock.patch.dict(extract.EXTRACTORS, {".pdf": mock.Mock(side_effect=AssertionError)}):
+            # Same stored name: only the search vector is refreshed.
+            self.assertEqual(extract.process(file.pk), "reindexed")
+            # Re-uploaded under a new name with identical bytes: hashed, not parsed.
+            file.file = default_storage.save("uploads/response-copy.pdf", ContentFile(data))
+            file.save()
+            self.assertEqual(extract.process(file.pk), "unchanged")
+        text = FileText.objects.get(pk=file.pk)
+        self.assertEqual((text.source_name, text.text), (file.file.name, "Cholera response"))
+
+        file.file = default_storage.save("uploads/response-v2.pdf", ContentFile(pdf_bytes("Cholera update")))
+        file.save()
+        self.assertEqual(extract.process(file.pk), "extracted")
+        self.assertEqual(FileText.objects.get(pk=file.pk).text, "Cholera update")
+
+    def test_q_filter(self):
+        plan = self.add("plan.pdf", pdf_bytes("x"), title="Malaria plan")
+        self.add("notes.pdf", pdf_bytes("x"), title="Notes", description="Cholera and malaria notes")
+        self.add("other.pdf", pdf_bytes("x"), title="Budget")
+
+        def titles(q):
+            return sorted(FileFilter({"q": q}, queryset=File.objects.all()).qs.values_list("title", flat=True))
+
+        self.assertEqual(titles("malaria"), ["Malaria plan", "Notes"])
+        self.assertEqual(titles("malaria plan"), ["Malaria plan"])
+        self.assertEqual(titles(""), ["Budget", "Malaria plan", "Notes"])
+        self.assertEqual(FileFilter({"q": "plan"}, queryset=File.objects.all()).qs.get(), plan)
+
+
+class IngestTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.addCleanup(shutil.rmtree, self.source)
+        storages = {**settings.STORAGES, "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": media},
+        }}
+        self.enterContext(override_settings(STORAGES=storages))
+
+    def write(self, path, data=b"data"):
+        full = os.path.join(self.source, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as handle:
+            handle.write(data)
+        return full
+
+    def plan(self, manifest=None, category=None):
+        items, problems = ingest.plan(ingest.Source(self.source), manifest, category)
+        return {item.path: item for item in items}, problems
+
+    def stored(self):
+        directories, files = [""], []
+        while directories:
+            directory = directories.pop()
+            subdirectories, names = default_storage.listdir(directory)
+            directories += [os.path.join(directory, name) for name in subdirectories]
+            files += [os.path.join(directory, name) for name in names]
+        return sorted(files)
+
+    def test_plan_infers_type_category_and_title(self):
+        self.write("reports/2024/annual_report-final.pdf")
+        self.write("photos/Clinic Opening.JPG")
+        self.write("launch.mp4")
+        self.write(".git/config")
+        self.write("__MACOSX/reports/._annual.pdf")
+        items, problems = self.plan(category="misc")
+        self.assertEqual(problems, [])
+        self.assertEqual(sorted(items), ["launch.mp4", "photos/Clinic Opening.JPG", "reports/2024/annual_report-final.pdf"])
+        report = items["reports/2024/annual_report-final.pdf"]
+        self.assertEqual((report.file_type, report.category, report.title), ("document", "reports", "annual report final"))
+        self.assertEqual(items["photos/Clinic Opening.JPG"].file_type, "image")
+        self.assertEqual((items["launch.mp4"].file_type, items["launch.mp4"].category), ("video", "misc"))
+
+    def test_manifest_limits_and_overrides(self):
+        self.write("a.pdf")
+        self.write("b.pdf")
+        self.write("c.bin")
+        self.write("manifest.csv", (
+            "path,title,category,file_type\n"
+            "a.pdf,Annual plan,plans,\n"
+            "c.bin,,,spreadsheet\n"
+            "missing.pdf,,,\n"
+        ).encode())
+        items, problems = self.plan()
+        self.assertEqual(list(items), ["a.pdf"])
+        self.assertEqual((items["a.pdf"].title, items["a.pdf"].category), ("Annual plan", "plans"))
+        self.assertEqual(problems, [
+            "c.bin: unknown file_type 'spreadsheet'",
+            "missing.pdf: listed in the manifest but not found",
+        ])
+
+        # An explicit manifest wins over the one in the source; it works for ZIPs too.
+        archive = os.path.join(tempfile.mkdtemp(), "batch.zip")
+        self.addCleanup(shutil.rmtree, os.path.dirname(archive))
+        with zipfile.ZipFile(archive, "w") as zipped:
+            zipped.writestr("guides/b.pdf", b"b")
+            zipped.writestr("guides/c.bin", b"c")
+        manifest = self.write("other.csv", b"path,file_type\nguides/c.bin,image\n")
+        items, problems = ingest.plan(ingest.Source(archive), manifest)
+        self.assertEqual([(i.path, i.file_type, i.category) for i in items], [("guides/c.bin", "image", "guides")])
+
+    def test_copier_skips_duplicates_within_a_run(self):
+        self.write("one/report.pdf", b"same bytes")
+        self.write("two/report copy.pdf", b"same bytes")
+        self.write("two/other.pdf", b"other bytes")
+        items, _problems = self.plan()
+        copier = ingest.Copier(ingest.Source(self.source))
+        outcomes = {path: copier(items[path]) for path in sorted(items)}
+        self.assertEqual(outcomes, {
+            "one/report.pdf": "copied",
+            "two/other.pdf": "copied",
+            "two/report copy.pdf": "duplicate of one/report.pdf",
+        })
+        self.assertEqual(len(self.stored()), 2)
+
+    def test_a_failed_copy_does_not_mark_its_twins_as_duplicates(self):
+        self.write("one/report.pdf", b"same bytes")
+        self.write("two/report.pdf", b"same bytes")
+        items, _problems = self.plan()
+        copier = ingest.Copier(ingest.Source(self.source))
+        save = default_storage.save
+        attempts = []
+
+        def flaky_save(name, content):
+            attempts.append(name)
+            if len(attempts) == 1:
+                raise OSError("disk full")
+            return save(name, content)
+
+        with mock.patch.object(default_storage, "save", side_effect=flaky_save):
+            with self.assertRaises(OSError):
+                copier(items["one/report.pdf"])
+            self.assertEqual(copier(items["two/report.pdf"]), "copied")
+        self.assertTrue(default_storage.exists(items["two/report.pdf"].name))
+
+    def test_create_rows_places_files_in_folders(self):
+        self.write("reports/q1.pdf")
+        self.write("reports/q2.pdf", b"other")
+        items, _problems = self.plan()
+        copier = ingest.Copier(ingest.Source(self.source))
+        for item in items.values():
+            copier(item)
+        files = ingest.create_rows(list(items.values()))
+        today = timezone.now()
+        month = "reports/%04d/%02d" % (today.year, today.month)
+        self.assertEqual(FolderNode.objects.get(path="reports").file_count, 2)
+        self.assertEqual(FolderNode.objects.get(path=month).file_count, 2)
+        self.assertEqual({file.folder.path for file in File.objects.filter(pk__in=[f.pk for f in files])}, {month})
+
+    def test_command_removes_blobs_when_the_insert_fails(self):
+        self.write("reports/q1.pdf")
+        self.write("reports/q2.pdf", b"other")
+        with mock.patch.object(ingest, "create_rows", side_effect=RuntimeError("insert failed")):
+            with self.assertRaises(RuntimeError):
+                call_command("ingest_files", self.source, "--no-postprocess", stdout=StringIO())
+        self.assertEqual(self.stored(), [])
+        self.assertFalse(File.objects.exists())
+
+    def test_command_ingests_and_reports_duplicates(self):
+        self.write("reports/q1.pdf", b"same")
+        self.write("reports/q1 copy.pdf", b"same")
+        out = StringIO()
+        call_command("ingest_files", self.source, "--no-postprocess", "--copy-workers=2", stdout=out)
+        self.assertEqual(File.objects.count(), 1)
+        self.assertIn("(duplicate of reports/q", out.getvalue())
+        self.assertIn("Ingested 1 files (1 duplicates, 0 problems)", out.getvalue())
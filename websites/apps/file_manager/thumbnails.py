@@ -0,0 +1,79 @@
+# apps/file_manager/thumbnails.py
+"""
+List thumbnails for image Files.
+
+For an image stored at  uploads/2025/03/01/photo.jpg  we keep
+
+    derivatives/uploads/2025/03/01/photo-160w.webp
+
+(FILE_THUMBNAIL_WIDTH wide, WebP when Pillow can encode it, else the
+upload's own format), named like the srcset copies of
+apps.content_creator.images, and record it in File.thumbnail. The file
+browser and the API's `thumbnail_url` then never send the original.
+
+Saves of image Files queue it; `manage.py make_thumbnails` backfills.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from apps.content_creator.images import (
+    RESPONSIVE_EXTENSIONS, derivative_formats, derivative_name, encode, normalize_mode, replace,
+)
+
+from .models import File
+from .signals import announce_file_change
+
+
+def thumbnail_width():
+    return getattr(settings, "FILE_THUMBNAIL_WIDTH", 160)
+
+
+def thumbnail_format(path):
+    """(extension, encoder) of the thumbnail of `path`, or None if we do not resize it."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in RESPONSIVE_EXTENSIONS:
+        return None
+    if "webp" in derivative_formats():
+        return "webp", "webp"
+    return extension.lstrip("."), RESPONSIVE_EXTENSIONS[extension]
+
+
+def thumbnail_name(path):
+    fmt = thumbnail_format(path)
+    return derivative_name(path, fmt[0], thumbnail_width()) if fmt else None
+
+
+def make_thumbnail(file_id, force=False, announce=True):
+    """Create (or replace) the thumbnail of one image File. Returns what was done."""
+    file = File.objects.filter(pk=file_id).only(
+        "file", "file_type", "thumbnail", "category",
+    ).first()
+    if file is None or file.file_type != "image" or not file.file:
+        return "skipped"
+    path = file.file.name
+    name = thumbnail_name(path)
+    if name is None:
+        return "unsupported"
+    if file.thumbnail.name == name and not force and default_storage.exists(name):
+        return "unchanged"
+
+    try:
+        with default_storage.open(path, "rb") as handle:
+            image = normalize_mode(ImageOps.exif_transpose(Image.open(BytesIO(handle.read()))))
+    except OSError:
+        return "unreadable"
+    image.thumbnail((thumbnail_width(), image.height), Image.Resampling.LANCZOS)
+    replace(default_storage, name, encode(image, thumbnail_format(path)[1]))
+
+    previous = file.thumbnail.name
+    File.objects.filter(pk=file.pk).update(thumbnail=name)
+    if previous and previous != name:
+        default_storage.delete(previous)
+    file.thumbnail.name = name
+    if announce:
+        announce_file_change(file)
+    return "made"
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import FileBrowserView, FileDetailView
+
+app_name = 'file_manager'
+
+urlpatterns = [
+    path('files/', FileBrowserView.as_view(), name='file_list'),
+    path('files/<int:pk>/', FileDetailView.as_view(), name='file_detail'),
+]
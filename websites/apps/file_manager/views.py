@@ -1,3 +1,88 @@
-from django.shortcuts import render
+from django.utils.http import urlencode
+from django.views.generic import DetailView, TemplateView
+from django_tables2.utils import OrderByTuple
 
-# Create your views here.
+from apps.edge_cache.keys import SurrogateKeyMixin
+from . import browse
+from .filter import FileFilter
+from .models import File
+from .tables import FileTable
+
+# What FileTable shows; the description and uploader are never loaded.
+LIST_FIELDS = (
+    'id', 'title', 'file', 'thumbnail', 'file_type', 'category', 'created_at', 'updated_at',
+)
+PAGING_PARAMS = ('after', 'before', 'page')
+
+
+class FileBrowserView(SurrogateKeyMixin, TemplateView):
+    """
+    FileTable over FileFilter's results, paged by keyset (see browse.py):
+    sorting is limited to the indexed columns and the total comes from the
+    cache or the planner, so no page costs a full scan or COUNT(*).
+    """
+    template_name = 'file_manager/file_list.html'
+    surrogate_keys = ('files',)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET
+        filterset = FileFilter(params, queryset=File.objects.only(*LIST_FIELDS))
+        queryset = filterset.qs
+        per_page = browse.page_size()
+
+        # DocumentSearchFilter orders full-text matches by rank on PostgreSQL.
+        ranked = 'rank' in queryset.query.annotations
+        if ranked:
+            ordering = None
+            page = browse.numbered_page(queryset, params.get('page'), per_page)
+        else:
+            ordering = browse.parse_ordering(params.get('sort'))
+            page = browse.keyset_page(
+                queryset, ordering, per_page,
+                after=browse.read_cursor(ordering, params.get('after')),
+                before=browse.read_cursor(ordering, params.get('before')),
+            )
+
+        table = FileTable(page.rows, orderable=not ranked)
+        if ordering:
+            # The rows are already in database order: mark the sorted column
+            # without the order_by setter, which would re-sort them in Python.
+            table._order_by = OrderByTuple([ordering])
+
+        filter_params = sorted(
+            (name, value) for name in params if name in filterset.filters
+            for value in params.getlist(name) if value
+        )
+        count, estimated = browse.cached_count(queryset, urlencode(filter_params))
+        context.update({
+            'filter': filterset,
+            'table': table,
+            'page': page,
+            'count': count,
+            'count_estimated': estimated,
+            'next_url': self.page_url(page.next),
+            'previous_url': self.page_url(page.previous),
+        })
+        return context
+
+    def page_url(self, paging):
+        if paging is None:
+            return None
+        params = self.request.GET.copy()
+        for name in PAGING_PARAMS:
+            params.pop(name, None)
+        params.update(paging)
+        return '?' + params.urlencode()
+
+
+class FileDetailView(SurrogateKeyMixin, DetailView):
+    model = File
+    template_name = 'file_manager/file_details.html'
+    context_object_name = 'file'
+
+    def get_queryset(self):
+        return File.objects.select_related('stream')
+
+    def get_surrogate_keys(self):
+        return ['file:%s' % self.object.pk]
@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from nascp_web.changelist import ScalableAdminMixin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'unique_key')
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ('retry_now',)
+
+    @admin.action(description='Queue selected jobs to run again now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, run_at=timezone.now(), attempts=0,
+            locked_by='', locked_at=None, finished_at=None,
+        )
+        self.message_user(request, '%d job(s) queued.' % updated)
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.jobs import queue, schedule, workers
+
+# Seconds between schedule checks and stale-lock sweeps.
+MAINTENANCE_INTERVAL = 30
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs until stopped (SIGTERM/SIGINT finish running jobs first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4,
+                            help="Jobs run at the same time.")
+        parser.add_argument("--pool", choices=("thread", "process"), default="thread",
+                            help="Run jobs in threads (I/O-bound work) or processes (CPU-bound work).")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Seconds to wait when no job is due.")
+        parser.add_argument("--burst", action="store_true",
+                            help="Exit once no job is due instead of waiting for more.")
+
+    def handle(self, *args, **options):
+        concurrency, poll = options["concurrency"], options["poll"]
+        worker_id = "%s:%d:%s" % (socket.gethostname(), os.getpid(), uuid.uuid4().hex[:6])
+        stopping = []
+        running = set()
+
+        def stop(signum, frame):
+            if not stopping:
+                self.stdout.write("Stopping after %d running job(s)..." % len(running))
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        if options["pool"] == "process":
+            # Spawned, not forked: the executor starts its processes at the
+            # first submit, after claim() has reopened our connection, and
+            # a forked child closing that socket would end our session.
+            pool = ProcessPoolExecutor(
+                max_workers=concurrency, initializer=workers.init_process,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+
+        self.stdout.write("Worker %s running up to %d job(s) in a %s pool." % (
+            worker_id, concurrency, options["pool"]))
+        done = 0
+        last_slot = timezone.now()
+        next_maintenance = 0.0
+        try:
+            while not stopping:
+                if time.monotonic() >= next_maintenance:
+                    last_slot = schedule.enqueue_due(last_slot)
+                    queue.requeue_stale()
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+
+                claimed = []
+                if len(running) < concurrency:
+                    claimed = queue.claim(concurrency - len(running), worker_id)
+                    running.update(pool.submit(workers.run, job_id, worker_id) for job_id in claimed)
+
+                if not running and not claimed and options["burst"]:
+                    break
+                if running:
+                    finished, running = wait(
+                        running, timeout=0 if claimed else poll, return_when=FIRST_COMPLETED
+                    )
+                    done += len(finished)
+                elif not claimed:
+                    time.sleep(poll)
+        finally:
+            pool.shutdown(wait=True)
+            done += len(running)
+            close_old_connections()
+        self.stdout.write(self.style.SUCCESS("Worker %s finished %d job(s)." % (worker_id, done)))
@@ -0,0 +1,206 @@
+# apps/jobs/queue.py
+"""
+Database-backed job queue.
+
+Declare work as a task in an app's tasks.py (discovered at startup):
+
+    from apps.jobs.queue import task
+
+    @task(max_attempts=3)
+    def rebuild_feeds(keys):
+        ...
+
+and queue it from anywhere, including signal handlers:
+
+    rebuild_feeds.delay(keys)
+
+`enqueue` writes the Job row once the surrounding transaction commits, so
+a worker never sees a job for data that is not visible yet, a rolled-back
+save queues nothing, and the request only pays for one INSERT. Workers
+(`manage.py run_worker`) claim due jobs with FOR UPDATE SKIP LOCKED and
+retry failures with exponential backoff up to `max_attempts`. A running
+job refreshes its lock every JOBS_HEARTBEAT_SECONDS, so only jobs whose
+worker died are requeued, however long the task itself takes (an HLS
+encode can run for hours).
+
+JOBS_INLINE = True runs tasks on commit in the calling process instead,
+for development without a worker.
+"""
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(func=None, *, max_attempts=5, priority=0):
+    """Register `func` as a task and give it `.delay(*args, **kwargs)`."""
+    def register(func):
+        name = "%s.%s" % (func.__module__, func.__qualname__)
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.priority = priority
+        func.delay = lambda *args, **kwargs: enqueue(func, args, kwargs)
+        REGISTRY[name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    if name not in REGISTRY:
+        # Importing the module runs its @task decorators.
+        import_module(name.rsplit(".", 1)[0])
+    return REGISTRY[name]
+
+
+def enqueue(func, args=(), kwargs=None, *, run_at=None, unique_key=None, priority=None):
+    """
+    Queue `func(*args, **kwargs)` once the current transaction commits.
+    With `unique_key`, a second job with the same key is silently dropped.
+    """
+    fields = dict(
+        task=func.task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at or timezone.now(),
+        unique_key=unique_key,
+        priority=func.priority if priority is None else priority,
+        max_attempts=func.max_attempts,
+    )
+
+    def create():
+        if getattr(settings, "JOBS_INLINE", False):
+            _run_inline(func, fields)
+            return
+        try:
+            with transaction.atomic():
+                Job.objects.create(**fields)
+        except IntegrityError:
+            if unique_key is None:
+                raise
+
+    transaction.on_commit(create)
+
+
+def _run_inline(func, fields):
+    try:
+        func(*fields["args"], **fields["kwargs"])
+    except Exception:
+        logger.exception("Inline job %s failed", fields["task"])
+
+
+# ---------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------
+def claim(limit, worker_id):
+    """Mark up to `limit` due jobs as running for `worker_id`; return their ids."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by("priority", "run_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if ids:
+            Job.objects.filter(pk__in=ids).update(
+                status=Job.RUNNING, locked_by=worker_id, locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+    return ids
+
+
+def backoff(attempt):
+    """Seconds before retry `attempt` (1-based): doubling, jittered, capped."""
+    base = getattr(settings, "JOBS_RETRY_BASE_SECONDS", 10)
+    cap = getattr(settings, "JOBS_RETRY_MAX_SECONDS", 3600)
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Heartbeat(threading.Thread):
+    """Keeps `locked_at` of a running job fresh until stopped."""
+
+    def __init__(self, job_id, worker_id):
+        super().__init__(name="job-heartbeat-%s" % job_id, daemon=True)
+        self.job_id, self.worker_id = job_id, worker_id
+        self.stopped = threading.Event()
+
+    def beat(self):
+        return Job.objects.filter(
+            pk=self.job_id, status=Job.RUNNING, locked_by=self.worker_id,
+        ).update(locked_at=timezone.now())
+
+    def run(self):
+        interval = getattr(settings, "JOBS_HEARTBEAT_SECONDS", 60)
+        try:
+            while not self.stopped.wait(interval):
+                try:
+                    if not self.beat():
+                        return  # requeued and claimed elsewhere
+                except Exception:
+                    logger.warning("Heartbeat of job %s failed", self.job_id, exc_info=True)
+        finally:
+            connection.close()  # this thread's own connection
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def execute(job_id, worker_id):
+    """
+    Run one job claimed by `worker_id` and record the outcome. Returns the
+    final status. If the job was requeued meanwhile (requeue_stale) and
+    claimed again, its new owner's state is left alone.
+    """
+    job = Job.objects.get(pk=job_id)
+    mine = Job.objects.filter(pk=job_id, status=Job.RUNNING, locked_by=worker_id)
+    heartbeat = Heartbeat(job_id, worker_id)
+    heartbeat.start()
+    try:
+        try:
+            get_task(job.task)(*job.args, **job.kwargs)
+        finally:
+            heartbeat.stop()
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            status, run_at = Job.QUEUED, timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("Job %s failed (attempt %d), retrying", job, job.attempts)
+        else:
+            status, run_at = Job.FAILED, job.run_at
+            logger.error("Job %s failed permanently:\n%s", job, error)
+        updated = mine.update(
+            status=status, run_at=run_at, last_error=error, locked_by="", locked_at=None,
+            finished_at=timezone.now() if status == Job.FAILED else None,
+        )
+    else:
+        status = Job.DONE
+        updated = mine.update(
+            status=Job.DONE, locked_by="", locked_at=None, finished_at=timezone.now(),
+        )
+    if not updated:
+        logger.warning("Job %s lost its lock while running; outcome %s not recorded", job, status)
+    return status
+
+
+def requeue_stale():
+    """Put back running jobs whose worker died (no heartbeat for JOBS_LOCK_TIMEOUT)."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "JOBS_LOCK_TIMEOUT", 600))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(
+        status=Job.QUEUED, locked_by="", locked_at=None,
+    )
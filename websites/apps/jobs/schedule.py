@@ -0,0 +1,113 @@
+# apps/jobs/schedule.py
+"""
+Cron-like periodic jobs.
+
+    JOB_SCHEDULES = {
+        "purge-finished-jobs": {"task": "apps.jobs.tasks.purge_finished", "cron": "30 3 * * *"},
+    }
+
+Expressions use the five standard cron fields (minute hour day-of-month
+month day-of-week, Sunday = 0 or 7) with `*`, `a-b`, `*/n`, `a-b/n` and
+comma lists, evaluated in TIME_ZONE. Every worker checks the schedules; a
+Job is created per matching minute with unique_key
+"schedule:<name>:<minute>", so however many workers run, each slot is
+queued exactly once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_task
+
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Minutes looked back after a pause, so a slow tick does not skip slots.
+MAX_CATCH_UP_MINUTES = 60
+
+
+def _parse_field(spec, low, high):
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(bound) for bound in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError("Cron field %r is outside %d-%d" % (spec, low, high))
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("Cron expression %r needs 5 fields" % expression)
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(spec, low, high) for spec, (low, high) in zip(fields, FIELD_RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Standard cron: when both day fields are restricted, either may match.
+        self.any_day = fields[2] == "*" or fields[4] == "*"
+
+    def matches(self, moment):
+        if moment.minute not in self.minutes or moment.hour not in self.hours:
+            return False
+        if moment.month not in self.months:
+            return False
+        day_ok = moment.day in self.days
+        # isoweekday(): Monday = 1 ... Sunday = 7 -> cron's Sunday = 0.
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        return (day_ok and weekday_ok) if self.any_day else (day_ok or weekday_ok)
+
+
+def schedules():
+    return {
+        name: (Cron(entry["cron"]), entry)
+        for name, entry in getattr(settings, "JOB_SCHEDULES", {}).items()
+    }
+
+
+def enqueue_due(since, now=None):
+    """
+    Queue jobs for every schedule slot in (since, now]. Returns the minute
+    checked last; pass it back as `since` on the next call.
+    """
+    now = timezone.localtime(now or timezone.now()).replace(second=0, microsecond=0)
+    since = max(
+        timezone.localtime(since).replace(second=0, microsecond=0),
+        now - timedelta(minutes=MAX_CATCH_UP_MINUTES),
+    )
+    entries = schedules()
+    minute = since + timedelta(minutes=1)
+    while minute <= now:
+        for name, (cron, entry) in entries.items():
+            if cron.matches(minute):
+                _create_slot(name, entry, minute)
+        minute += timedelta(minutes=1)
+    return now
+
+
+def _create_slot(name, entry, minute):
+    func = get_task(entry["task"])
+    try:
+        with transaction.atomic():
+            Job.objects.create(
+                task=func.task_name,
+                args=list(entry.get("args", ())),
+                kwargs=entry.get("kwargs", {}),
+                run_at=minute,
+                priority=func.priority,
+                max_attempts=func.max_attempts,
+                unique_key="schedule:%s:%s" % (name, minute.isoformat()),
+            )
+    except IntegrityError:
+        pass  # another worker queued this slot
@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import task
+
+
+@task(max_attempts=1, priority=10)
+def purge_finished():
+    """Delete done/failed jobs older than JOBS_KEEP_FINISHED_DAYS."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "JOBS_KEEP_FINISHED_DAYS", 14))
+    Job.objects.filter(status__in=(Job.DONE, Job.FAILED), finished_at__lt=cutoff).delete()
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+CALLS = []
+
+
+@queue.task(max_attempts=2)
+def record(value):
+    CALLS.append(value)
+
+
+@queue.task(max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+@queue.task(priority=-1)
+def urgent():
+    pass
+
+
+@override_settings(JOBS_INLINE=False)
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def delay(self, func, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            func.delay(*args)
+        return Job.objects.latest("pk")
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            record.delay(1)
+            self.assertFalse(Job.objects.exists())
+        callbacks[0]()
+        self.assertEqual(Job.objects.get().args, [1])
+
+    def test_unique_key_queues_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue.enqueue(record, (1,), unique_key="once")
+            queue.enqueue(record, (2,), unique_key="once")
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claim_takes_due_jobs_by_priority(self):
+        later = self.delay(record, 1)
+        first = self.delay(urgent)
+        future = self.delay(record, 2)
+        Job.objects.filter(pk=future.pk).update(run_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(queue.claim(10, "w1"), [first.pk, later.pk])
+        job = Job.objects.get(pk=first.pk)
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, "w1", 1))
+        self.assertEqual(queue.claim(10, "w2"), [])
+
+    def test_execute_records_success(self):
+        job = self.delay(record, 7)
+        queue.claim(1, "w1")
+        self.assertEqual(queue.execute(job.pk, "w1"), Job.DONE)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, CALLS), (Job.DONE, "", [7]))
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = self.delay(explode)
+        queue.claim(1, "w1")
+        with self.assertLogs("apps.jobs.queue", "WARNING"):
+            self.assertEqual(queue.execute(job.pk, "w1"), Job.QUEUED)
+        job.refresh_from_db()
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("ValueError: boom", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.claim(1, "w1")
+        with self.assertLogs("apps.jobs.queue", "ERROR"):
+            self.assertEqual(queue.execute(job.pk, "w1"), Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_requeue_stale_only_touches_old_locks(self):
+        stale, fresh = self.delay(record, 1), self.delay(record, 2)
+        queue.claim(2, "w1")
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.QUEUED)
+        self.assertEqual(Job.objects.get(pk=fresh.pk).status, Job.RUNNING)
+
+    def test_requeued_job_keeps_its_new_owner(self):
+        job = self.delay(record, 1)
+        queue.claim(1, "w1")
+        # w1 looked dead: the job was requeued and w2 claimed it.
+        Job.objects.filter(pk=job.pk).update(status=Job.QUEUED, locked_by="", locked_at=None)
+        queue.claim(1, "w2")
+
+        with self.assertLogs("apps.jobs.queue", "WARNING") as logs:
+            queue.execute(job.pk, "w1")
+        self.assertIn("lost its lock", logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.RUNNING, "w2"))
+
+    def test_heartbeat_refreshes_only_its_own_lock(self):
+        job = self.delay(record, 1)
+        queue.claim(1, "w1")
+        old = timezone.now() - timedelta(minutes=30)
+        Job.objects.filter(pk=job.pk).update(locked_at=old)
+
+        self.assertEqual(queue.Heartbeat(job.pk, "w2").beat(), 0)
+        self.assertEqual(queue.Heartbeat(job.pk, "w1").beat(), 1)
+        self.assertGreater(Job.objects.get(pk=job.pk).locked_at, old)
@@ -0,0 +1,23 @@
+# apps/jobs/workers.py
+"""
+What the pool of `manage.py run_worker` calls. Process-pool children are
+spawned and import this module to unpickle these functions before Django
+is set up, so nothing here imports models at import time.
+"""
+import django
+
+
+def init_process():
+    django.setup()
+
+
+def run(job_id, worker_id):
+    from django.db import close_old_connections
+
+    from .queue import execute
+
+    close_old_connections()
+    try:
+        return execute(job_id, worker_id)
+    finally:
+        close_old_connections()
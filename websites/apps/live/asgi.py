@@ -0,0 +1,127 @@
+# apps/live/asgi.py
+"""
+Server-Sent Events stream of change events at LIVE_EVENTS_PATH.
+
+    id: 42                  (sequence number, for Last-Event-ID)
+    event: change
+    data: {"keys": ["file:7", "files", "files:type:document", ...]}
+
+`keys` are the surrogate keys (apps.edge_cache.keys) an edge purge has
+just gone through for, i.e. what the SPA's lists are tagged with, so a
+refetch gets the new version. An `event: reset` means events were lost
+(Last-Event-ID too old, a slow client, a lost Redis subscription): the
+client should refetch everything.
+
+Served by a bare ASGI app in front of Django's handler, so an open stream
+is a coroutine waiting on a queue: no middleware, no request object, no
+thread, no database connection. Comment lines every
+LIVE_HEARTBEAT_SECONDS keep proxies from closing idle streams. Under WSGI
+the Django view at the same path answers 204, which tells EventSource
+not to reconnect; the SPA then keeps its fetch-on-load behaviour.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+from .broadcast import RESET, get_broadcaster
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def format_event(message):
+    if message is RESET:
+        return b"event: reset\ndata: {}\n\n"
+    seq, event = message
+    return ("id: %d\nevent: change\ndata: %s\n\n" % (
+        seq, json.dumps(event, separators=(",", ":")),
+    )).encode()
+
+
+def _last_event_id(scope):
+    for name, value in scope.get("headers", ()):
+        if name == b"last-event-id":
+            raw = value.decode("latin-1")
+            break
+    else:
+        # EventSource cannot set headers on the first connection; allow ?last_event_id=.
+        raw = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("last_event_id", [""])[0]
+    return int(raw) if raw.strip().isdigit() else None
+
+
+async def _plain(send, status, body, headers=()):
+    await send({
+        "type": "http.response.start", "status": status,
+        "headers": [(b"content-type", b"text/plain; charset=utf-8"), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class EventStreamApp:
+    """Answers LIVE_EVENTS_PATH itself and passes everything else to `app`."""
+
+    def __init__(self, app):
+        self.app = app
+        self.path = _setting("LIVE_EVENTS_PATH", "/api/events/")
+        self.streams = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+        if scope["method"] != "GET":
+            return await _plain(send, 405, b"Method not allowed.", [(b"allow", b"GET")])
+        if self.streams >= _setting("LIVE_MAX_STREAMS", 10000):
+            return await _plain(send, 503, b"Too many streams.", [(b"retry-after", b"30")])
+
+        hub = await get_broadcaster().hub()
+        queue = hub.subscribe()
+        self.streams += 1
+        disconnected = asyncio.ensure_future(_disconnected(receive))
+        waiting = None
+        try:
+            await send({
+                "type": "http.response.start", "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache, no-transform"),
+                    (b"x-accel-buffering", b"no"),  # nginx: do not buffer the stream
+                ],
+            })
+            # Reconnect after 5-10s, spread out so a restart is not a stampede.
+            opening = b"retry: %d\n\n" % (5000 + id(queue) % 5000)
+            last_id = _last_event_id(scope)
+            if last_id is not None:
+                missed = hub.since(last_id)
+                opening += format_event(RESET) if missed is None else b"".join(map(format_event, missed))
+            await send({"type": "http.response.body", "body": opening, "more_body": True})
+
+            heartbeat = _setting("LIVE_HEARTBEAT_SECONDS", 20)
+            while True:
+                if waiting is None:
+                    waiting = asyncio.ensure_future(queue.get())
+                done, _pending = await asyncio.wait(
+                    {waiting, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    break
+                if waiting in done:
+                    body, waiting = format_event(waiting.result()), None
+                else:
+                    body = b": ping\n\n"
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+        except OSError:
+            pass  # the client went away mid-send
+        finally:
+            hub.unsubscribe(queue)
+            self.streams -= 1
+            disconnected.cancel()
+            if waiting is not None:
+                waiting.cancel()
@@ -0,0 +1,170 @@
+# apps/live/broadcast.py
+"""
+Change-event broadcasters, chosen by settings:
+
+    LIVE_BROADCASTER = {
+        "BACKEND": "apps.live.broadcast.RedisBroadcaster",
+        "OPTIONS": {"url": "redis://...", "channel": "live:changes"},
+    }
+
+`publish(event)` is called synchronously, by the edge purge job
+(apps/live/signals.py) in whichever process runs it. Each ASGI process keeps one Hub per event loop: the
+open streams' queues plus the last LIVE_HISTORY (sequence number, event)
+pairs, so a client that reconnects with Last-Event-ID gets what it missed.
+
+LocalBroadcaster only reaches streams in the publishing process, which is
+enough for development (JOBS_INLINE: the request process runs the purge). RedisBroadcaster numbers events with INCR and fans them out
+with PUBLISH; every ASGI process holds one subscription, however many
+clients it serves.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Queued to a stream instead of events it can no longer be given: the
+# client refetches everything.
+RESET = object()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Hub:
+    """The streams of one event loop and the events they may have missed."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queues = set()
+        self.recent = deque(maxlen=_setting("LIVE_HISTORY", 500))
+
+    def subscribe(self):
+        queue = asyncio.Queue(_setting("LIVE_QUEUE_SIZE", 100))
+        self.queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.queues.discard(queue)
+
+    def since(self, last_seq):
+        """Messages after `last_seq`, or None when this hub cannot tell what was missed."""
+        seqs = [seq for seq, _event in self.recent]
+        if last_seq in seqs or (seqs and seqs[0] == last_seq + 1):
+            return [message for message in self.recent if message[0] > last_seq]
+        return None
+
+    def dispatch(self, message):
+        """Runs on the hub's loop. `message` is (seq, event) or RESET."""
+        if message is not RESET:
+            self.recent.append(message)
+        for queue in self.queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stream this far behind gets a reset instead of the backlog.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET)
+
+
+class BaseBroadcaster:
+    def __init__(self):
+        self._hubs = {}
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        raise NotImplementedError
+
+    async def hub(self):
+        """The Hub of the running loop, created (and fed) on first use."""
+        loop = asyncio.get_running_loop()
+        hub = self._hubs.get(loop)
+        if hub is None:
+            with self._lock:
+                hub = self._hubs.setdefault(loop, Hub(loop))
+            await self.start(hub)
+        return hub
+
+    async def start(self, hub):
+        pass
+
+    def _dispatch_threadsafe(self, message):
+        for loop, hub in list(self._hubs.items()):
+            if loop.is_closed():
+                self._hubs.pop(loop, None)
+                continue
+            loop.call_soon_threadsafe(hub.dispatch, message)
+
+
+class LocalBroadcaster(BaseBroadcaster):
+    """Streams of this process only."""
+
+    def __init__(self):
+        super().__init__()
+        self._seqs = itertools.count(1)
+
+    def publish(self, event):
+        with self._lock:
+            seq = next(self._seqs)
+        self._dispatch_threadsafe((seq, event))
+
+
+class RedisBroadcaster(BaseBroadcaster):
+    """Streams of every process subscribed to `channel`."""
+
+    def __init__(self, url, channel="live:changes", reconnect_seconds=2.0):
+        super().__init__()
+        self.url, self.channel, self.reconnect_seconds = url, channel, reconnect_seconds
+        self._client = None
+
+    def publish(self, event):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        seq = self._client.incr(self.channel + ":seq")
+        self._client.publish(self.channel, json.dumps([seq, event], separators=(",", ":")))
+
+    async def start(self, hub):
+        hub.listener = asyncio.ensure_future(self._listen(hub))
+
+    async def _listen(self, hub):
+        import redis.asyncio as redis
+
+        connected_before = False
+        while True:
+            client = redis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if connected_before:
+                        # Whatever was published while we were away is lost.
+                        hub.recent.clear()
+                        hub.dispatch(RESET)
+                    connected_before = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            hub.dispatch(tuple(json.loads(message["data"])))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Live events subscription lost (%s); reconnecting.", exc)
+                await asyncio.sleep(self.reconnect_seconds)
+            finally:
+                await client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_broadcaster():
+    config = getattr(settings, "LIVE_BROADCASTER", None) or {}
+    backend = import_string(config.get("BACKEND", "apps.live.broadcast.LocalBroadcaster"))
+    return backend(**config.get("OPTIONS", {}))
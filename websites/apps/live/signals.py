@@ -0,0 +1,18 @@
+"""
+Change events, sent once an edge purge has gone through.
+
+Every save that changes a response purges the response's surrogate keys
+(apps.edge_cache: the model receivers, ingest, workers); the purge job
+then sends `keys_purged`. Publishing from there rather than on commit
+means a client that refetches on the event gets the new version, not the
+one the edge still held while the purge was queued.
+"""
+from django.dispatch import receiver
+
+from apps.edge_cache.tasks import keys_purged
+from .broadcast import get_broadcaster
+
+
+@receiver(keys_purged)
+def publish_purged_keys(sender, keys, **kwargs):
+    get_broadcaster().publish({"keys": sorted(set(keys))})
@@ -0,0 +1,32 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.file_manager.models import File
+
+
+class RecordingPurger:
+    def __init__(self, log):
+        self.log = log
+
+    def purge(self, keys):
+        self.log.append(("purge", sorted(set(keys))))
+
+
+@override_settings(JOBS_INLINE=True)
+class ChangeEventTests(TestCase):
+    def test_event_follows_the_edge_purge(self):
+        log = []
+        broadcaster = mock.Mock()
+        broadcaster.publish.side_effect = lambda event: log.append(("publish", event["keys"]))
+        with mock.patch("apps.edge_cache.tasks.get_purger", return_value=RecordingPurger(log)), \
+                mock.patch("apps.live.signals.get_broadcaster", return_value=broadcaster), \
+                mock.patch("apps.file_manager.signals.extract_file_text"), \
+                self.captureOnCommitCallbacks(execute=True):
+            File.objects.create(title="Plan", file="uploads/2025/01/01/plan.pdf",
+                                file_type="document", category="reports")
+
+        purged = [entry for entry in log if entry[0] == "purge" and "files" in entry[1]]
+        self.assertTrue(purged)
+        position = log.index(purged[0])
+        self.assertEqual(log[position + 1], ("publish", purged[0][1]))
@@ -0,0 +1,10 @@
+from django.http import HttpResponse
+
+
+def events_unavailable(request):
+    """
+    LIVE_EVENTS_PATH when served by Django (WSGI, runserver): the stream
+    itself only exists under ASGI (apps/live/asgi.py). 204 makes
+    EventSource stop reconnecting.
+    """
+    return HttpResponse(status=204)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class PrerenderConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.prerender'
+
+    def ready(self):
+        import apps.prerender.signals  # noqa
@@ -0,0 +1,45 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.prerender import renderer
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without Django configured.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Render every published page and API snapshot into STATIC_PUBLISH_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Render processes (default: one per CPU).")
+        parser.add_argument("--clean", action="store_true",
+                            help="Delete the output directory before rendering.")
+
+    def handle(self, *args, **options):
+        if options["clean"]:
+            renderer.clear()
+        for path in renderer.dynamic_api_paths():
+            # Snapshots left by earlier runs would still be served.
+            renderer.remove_path(path)
+        paths = renderer.all_paths()
+        started = time.monotonic()
+
+        # Forked workers must not share the parent's database socket.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            written = sum(pool.map(renderer.write_path, paths, chunksize=16))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            "Pre-rendered %d/%d paths into %s in %.1fs."
+            % (written, len(paths), renderer.publish_root(), elapsed)
+        ))
+        if written < len(paths):
+            self.stdout.write(self.style.WARNING("Skipped paths are listed in the log above."))
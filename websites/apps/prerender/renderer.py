@@ -0,0 +1,171 @@
+# apps/prerender/renderer.py
+"""
+Static pre-rendering of public pages and API snapshots.
+
+Each URL is requested as an anonymous GET through the full handler and
+middleware stack (so the body is exactly what the live site sends) and
+written under STATIC_PUBLISH_ROOT, mirroring the URL path:
+
+    /contents/<slug>/          -> <root>/contents/<slug>/index.html
+    /api/top-news-contents/    -> <root>/api/top-news-contents/index.json
+
+so the front-end server can answer before proxying to Django, e.g. nginx:
+
+    location / { try_files $uri/index.html $uri/index.json @django; }
+
+The response headers the front end must send with the file
+(Cache-Control, CSP and the other security headers, Surrogate-Key) are
+written next to it as `index.<ext>.headers`, one "Name: value" per line.
+
+Files are swapped in atomically (write + rename); readers never see a
+partial page. Only 200 responses a shared cache may store are written.
+These internal requests are neither throttled nor audited (RENDER_KEY).
+"""
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.urls import URLPattern, reverse
+
+from apps.content_creator.models import Category, Content
+
+logger = logging.getLogger(__name__)
+
+# Templated pages that do not come from a model row.
+STATIC_PAGES = ("vision_mission_mandate", "nascp_brief")
+# API endpoints a snapshot would get wrong: jstree answers per ?parent= and
+# the ASGI app serves live_events. Written once, try_files would shadow them.
+DYNAMIC_API_NAMES = ("jstree", "live_events")
+# WSGI environ flag on pre-render requests. Not an HTTP_* key, so no
+# client can set it.
+RENDER_KEY = "nascp.prerender"
+REPLAYED_HEADERS = (
+    "Cache-Control", "Content-Security-Policy", "X-Frame-Options", "X-Content-Type-Options",
+    "Referrer-Policy", "Cross-Origin-Opener-Policy", "Surrogate-Key", "Cache-Tag",
+)
+
+
+def publish_root():
+    return Path(settings.STATIC_PUBLISH_ROOT)
+
+
+def output_file(path, extension):
+    return publish_root() / path.strip("/") / ("index.%s" % extension)
+
+
+def is_render_request(request):
+    return bool(request.META.get(RENDER_KEY))
+
+
+def render_path(path):
+    """
+    Request `path` as an anonymous GET through the middleware stack.
+    Returns (body, extension, headers) or None if it is not publishable.
+    """
+    # django.test is heavy; only processes that actually render pay for it.
+    from django.test import Client
+
+    # Requested as the public site (SITE_URL), so host checks and the HTTPS
+    # redirect treat it like a visitor's request.
+    site = urlsplit(settings.SITE_URL)
+    client = Client(HTTP_HOST=site.netloc, **{RENDER_KEY: True})
+    try:
+        response = client.get(path, secure=site.scheme == "https")
+    except Exception:
+        logger.exception("Pre-rendering %s failed", path)
+        return None
+    if response.status_code != 200:
+        logger.warning("Pre-rendering %s skipped: HTTP %s", path, response.status_code)
+        return None
+    cache_control = response.get("Cache-Control", "")
+    if response.cookies or "private" in cache_control or "no-store" in cache_control:
+        logger.warning("Pre-rendering %s skipped: the response is personal", path)
+        return None
+    extension = "json" if "json" in response.get("Content-Type", "") else "html"
+    headers = {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)}
+    return response.content, extension, headers
+
+
+def _replace(target, data):
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.chmod(tmp_name, 0o644)
+    os.replace(tmp_name, target)
+
+
+def write_path(path):
+    """Render `path` and atomically replace its published file and headers."""
+    rendered = render_path(path)
+    if rendered is None:
+        return False
+    body, extension, headers = rendered
+    target = output_file(path, extension)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Headers first: a reader that sees the new body also gets its headers.
+    _replace(target.with_name(target.name + ".headers"), "".join(
+        "%s: %s\n" % item for item in headers.items()
+    ).encode())
+    _replace(target, body)
+    return True
+
+
+def remove_path(path):
+    """Drop the published copy of `path` so requests fall through to Django."""
+    directory = publish_root() / path.strip("/")
+    for extension in ("html", "json"):
+        (directory / ("index.%s" % extension)).unlink(missing_ok=True)
+        (directory / ("index.%s.headers" % extension)).unlink(missing_ok=True)
+
+
+def clear():
+    shutil.rmtree(publish_root(), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------
+# Path sets
+# ---------------------------------------------------------------------
+def _api_names():
+    from apps.api import urls as api_urls
+
+    return [
+        pattern.name for pattern in api_urls.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+        and not pattern.pattern.converters and pattern.name not in DYNAMIC_API_NAMES
+    ]
+
+
+def dynamic_api_paths():
+    return [reverse(name) for name in DYNAMIC_API_NAMES]
+
+
+def api_file_paths():
+    # File lists link through File.download_link, so they never hold an
+    # expiring signed URL.
+    return [reverse(name) for name in _api_names() if "file" in name]
+
+
+def api_content_paths():
+    return [reverse(name) for name in _api_names() if "file" not in name]
+
+
+def content_path(slug):
+    return reverse("content_creator:content_detail", kwargs={"slug": slug})
+
+
+def category_path(slug):
+    return reverse("content_creator:category_detail", kwargs={"slug": slug})
+
+
+def all_paths():
+    paths = [reverse(name) for name in STATIC_PAGES]
+    paths += [
+        content_path(slug)
+        for slug in Content.objects.filter(published=True).values_list("slug", flat=True)
+    ]
+    paths += [category_path(slug) for slug in Category.objects.values_list("slug", flat=True)]
+    return paths + api_content_paths() + api_file_paths()
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.content_creator.models import Category, Content
+from apps.edge_cache.signals import previous_row
+from apps.file_manager.models import File
+from . import renderer
+from .tasks import publish_paths
+
+
+def _enabled():
+    return getattr(settings, "STATIC_PUBLISH_ENABLED", False)
+
+
+def _publish_on_commit(write=(), remove=()):
+    publish_paths.delay(list(write), list(remove))
+
+
+@receiver(post_save, sender=Content)
+def publish_content(sender, instance, **kwargs):
+    if not _enabled():
+        return
+    write, remove = [], []
+    previous = previous_row(instance)
+    if previous:
+        old_slug, old_category = previous["slug"], previous["category__slug"]
+        if old_slug != instance.slug or not instance.published:
+            remove.append(renderer.content_path(old_slug))
+        if old_category:
+            write.append(renderer.category_path(old_category))
+    if instance.published:
+        write.append(renderer.content_path(instance.slug))
+    elif not (previous and previous["published"]):
+        return  # a draft that was never public: nothing published changes
+    if instance.category_id:
+        write.append(renderer.category_path(instance.category.slug))
+    _publish_on_commit(write + renderer.api_content_paths(), remove)
+
+
+@receiver(post_delete, sender=Content)
+def unpublish_content(sender, instance, **kwargs):
+    if not _enabled():
+        return
+    write = renderer.api_content_paths()
+    if instance.category_id:
+        category = Category.objects.filter(pk=instance.category_id).first()
+        if category:
+            write.insert(0, renderer.category_path(category.slug))
+    _publish_on_commit(write, [renderer.content_path(instance.slug)])
+
+
+@receiver(post_save, sender=Category)
+def publish_category(sender, instance, **kwargs):
+    if not _enabled():
+        return
+    previous = previous_row(instance)
+    old_slug = previous["slug"] if previous else None
+    remove = [renderer.category_path(old_slug)] if old_slug and old_slug != instance.slug else []
+    _publish_on_commit(
+        [renderer.category_path(instance.slug)] + renderer.api_content_paths(), remove
+    )
+
+
+@receiver(post_delete, sender=Category)
+def unpublish_category(sender, instance, **kwargs):
+    if _enabled():
+        _publish_on_commit(
+            renderer.api_content_paths(), [renderer.category_path(instance.slug)]
+        )
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def publish_file_snapshots(sender, instance, **kwargs):
+    if _enabled():
+        _publish_on_commit(renderer.api_file_paths())
@@ -0,0 +1,10 @@
+from apps.jobs.queue import task
+from . import renderer
+
+
+@task(max_attempts=3)
+def publish_paths(write=(), remove=()):
+    for path in remove:
+        renderer.remove_path(path)
+    for path in dict.fromkeys(write):
+        renderer.write_path(path)
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.audit.models import AuditLog
+from apps.content_creator.models import Content
+from . import renderer
+
+
+class ApiPathTests(SimpleTestCase):
+    def test_query_driven_endpoints_are_not_snapshotted(self):
+        paths = renderer.api_content_paths() + renderer.api_file_paths()
+        for path in renderer.dynamic_api_paths():
+            self.assertNotIn(path, paths)
+        self.assertIn("/api/top-news-contents/", paths)
+
+
+class PublishTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(STATIC_PUBLISH_ENABLED=True, STATIC_PUBLISH_ROOT=root, JOBS_INLINE=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Only the content page matters here; skip the API snapshots.
+        patcher = mock.patch.object(renderer, "api_content_paths", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+
+    def test_published_page_is_written_with_its_headers(self):
+        content = Content(title="Malaria campaign", content_type="news", body="<p>Bed nets</p>", published=True)
+        self.save(content)
+        page = renderer.output_file(renderer.content_path(content.slug), "html")
+        self.assertIn("Bed nets", page.read_text())
+
+        headers = page.with_name("index.html.headers").read_text()
+        self.assertIn("Cache-Control: ", headers)
+        self.assertIn("public", headers)
+        self.assertIn("X-Frame-Options: ", headers)
+        self.assertIn("content:%d" % content.pk, headers)
+        # Pre-render requests are not page views.
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_unpublishing_removes_the_page(self):
+        content = Content(title="Malaria campaign", content_type="news", published=True)
+        self.save(content)
+        page = renderer.output_file(renderer.content_path(content.slug), "html")
+        self.assertTrue(page.exists())
+
+        content.published = False
+        self.save(content)
+        self.assertFalse(page.exists())
+        self.assertFalse(page.with_name("index.html.headers").exists())
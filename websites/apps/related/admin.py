@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from nascp_web.changelist import ScalableAdminMixin
+from .models import RelatedIndex, RelatedItem
+
+@admin.register(RelatedItem)
+class RelatedItemAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ('content', 'rank', 'score', 'related_content', 'related_file')
+    list_select_related = ('content', 'related_content', 'related_file')
+    search_fields = ('content__title',)
+    readonly_fields = ('content', 'rank', 'score', 'related_content', 'related_file')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(RelatedIndex)
+class RelatedIndexAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'built_at', 'updated_at')
+    exclude = ('data',)
+    readonly_fields = ('items', 'terms', 'built_at', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
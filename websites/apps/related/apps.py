@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RelatedConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.related'
+
+    def ready(self):
+        import apps.related.signals  # noqa
@@ -0,0 +1,168 @@
+# apps/related/index.py
+"""
+Builds and maintains RelatedItem from TF-IDF similarity.
+
+Every published Content and every File is a document (titles count
+twice, HTML is stripped). Only Content gets a neighbour list; Files appear
+in those lists as targets.
+
+`rebuild()` fits the vocabulary on the whole corpus and recomputes every
+list; `manage.py build_related` and a nightly JOB_SCHEDULES entry call it.
+`update(keys)` is what saves trigger: it re-vectorises only the changed
+items against the stored model and recomputes the lists they can change,
+i.e. their own, lists that already point at them, and lists they now beat
+the weakest entry of. Terms first seen since the last rebuild are ignored
+until the next one.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from apps.content_creator.models import Content
+from apps.file_manager.models import File
+from .models import RelatedIndex, RelatedItem
+from .vectorize import Model, dumps, loads, tokenize, top_neighbours
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def documents(keys=None):
+    """(key, token Counter) for published Content and all Files; only `keys` if given."""
+    contents = Content.objects.filter(published=True)
+    files = File.objects.all()
+    if keys is not None:
+        contents = contents.filter(pk__in=_pks(keys, "content"))
+        files = files.filter(pk__in=_pks(keys, "file"))
+    for pk, title, body, category in contents.values_list(
+        "pk", "title", "body", "category__name"
+    ).order_by("pk").iterator(chunk_size=500):
+        yield "content:%d" % pk, tokenize(" ".join((title, title, strip_tags(body or ""), category or "")))
+    for pk, title, description, category in files.values_list(
+        "pk", "title", "description", "category"
+    ).order_by("pk").iterator(chunk_size=2000):
+        yield "file:%d" % pk, tokenize(" ".join((title, title, description or "", category or "")))
+
+
+def _pks(keys, kind):
+    return [int(key.split(":", 1)[1]) for key in keys if key.startswith(kind + ":")]
+
+
+def _neighbours(matrix, keys, source_rows):
+    """RelatedItem rows for the Content at `source_rows` of `matrix`."""
+    if not source_rows:
+        return []
+    rows = np.asarray(source_rows)
+    results = top_neighbours(
+        matrix[rows], matrix, _setting("RELATED_ITEMS", 6), exclude=rows,
+        min_score=_setting("RELATED_MIN_SCORE", 0.05),
+        batch_size=_setting("RELATED_BATCH_SIZE", 512),
+    )
+    items = []
+    for row, (columns, scores) in zip(source_rows, results):
+        content_id = int(keys[row].split(":", 1)[1])
+        for rank, (column, score) in enumerate(zip(columns, scores), start=1):
+            kind, pk = keys[column].split(":", 1)
+            items.append(RelatedItem(
+                content_id=content_id, rank=rank, score=float(score),
+                related_content_id=int(pk) if kind == "content" else None,
+                related_file_id=int(pk) if kind == "file" else None,
+            ))
+    return items
+
+
+def _content_rows(keys):
+    return [row for row, key in enumerate(keys) if key.startswith("content:")]
+
+
+@transaction.atomic
+def rebuild():
+    """Refit on every document and replace all lists. Returns (documents, related rows)."""
+    # Held until commit, so saves queued meanwhile apply on top of this build.
+    RelatedIndex.objects.select_for_update().filter(pk=1).first()
+    pairs = list(documents())
+    keys = [key for key, _counts in pairs]
+    counts = [counts for _key, counts in pairs]
+    model = Model.fit(
+        counts, _setting("RELATED_MIN_DF", 2), _setting("RELATED_MAX_DF", 0.5)
+    )
+    matrix = model.transform(counts)
+    del pairs, counts
+
+    items = _neighbours(matrix, keys, _content_rows(keys))
+    RelatedItem.objects.all().delete()
+    RelatedItem.objects.bulk_create(items, batch_size=2000)
+    RelatedIndex.objects.update_or_create(pk=1, defaults={
+        "data": dumps(model, keys, matrix),
+        "items": len(keys),
+        "terms": len(model.terms),
+        "built_at": timezone.now(),
+    })
+    return len(keys), len(items)
+
+
+@transaction.atomic
+def update(keys):
+    """
+    Apply saves/deletes of `keys` ("content:<pk>", "file:<pk>"). Returns the
+    pks of the Content whose lists were recomputed.
+    """
+    index = RelatedIndex.objects.select_for_update().filter(pk=1).first()
+    if index is None:
+        rebuild()
+        return set(Content.objects.filter(published=True).values_list("pk", flat=True))
+    model, stored_keys, matrix = loads(bytes(index.data))
+
+    changed = set(keys)
+    fresh = dict(documents(changed))  # missing keys were deleted or unpublished
+    kept = [row for row, key in enumerate(stored_keys) if key not in changed]
+    all_keys = [stored_keys[row] for row in kept] + list(fresh)
+    fresh_vectors = model.transform(list(fresh.values()))
+    matrix = sparse.vstack([matrix[kept], fresh_vectors], format="csr")
+
+    content_ids, file_ids = _pks(changed, "content"), _pks(changed, "file")
+    affected = set(content_ids)
+    # Lists that point at a changed item: its score moved or it is gone.
+    affected.update(RelatedItem.objects.filter(
+        Q(related_content_id__in=content_ids) | Q(related_file_id__in=file_ids)
+    ).values_list("content_id", flat=True))
+    # Lists a changed item may enter now.
+    content_rows = _content_rows(all_keys)
+    if fresh and content_rows:
+        best = np.asarray(
+            (matrix[content_rows] @ fresh_vectors.T).max(axis=1).todense()
+        ).ravel()
+        candidates = {
+            int(all_keys[row].split(":", 1)[1]): score
+            for row, score in zip(content_rows, best)
+            if score >= _setting("RELATED_MIN_SCORE", 0.05)
+        }
+        floors = {
+            content_id: (floor, size) for content_id, floor, size in
+            RelatedItem.objects.filter(content_id__in=candidates).values("content_id")
+            .annotate(floor=Min("score"), size=Count("id"))
+            .values_list("content_id", "floor", "size")
+        }
+        limit = _setting("RELATED_ITEMS", 6)
+        for content_id, score in candidates.items():
+            floor, size = floors.get(content_id, (0.0, 0))
+            if size < limit or score > floor:
+                affected.add(content_id)
+
+    position = {key: row for row, key in enumerate(all_keys)}
+    source_rows = sorted(
+        position[key] for key in ("content:%d" % pk for pk in affected) if key in position
+    )
+    RelatedItem.objects.filter(content_id__in=affected).delete()
+    RelatedItem.objects.bulk_create(_neighbours(matrix, all_keys, source_rows), batch_size=2000)
+
+    index.data = dumps(model, all_keys, matrix)
+    index.items = len(all_keys)
+    index.save(update_fields=["data", "items", "updated_at"])
+    return affected
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.edge_cache.tasks import purge_surrogate_keys
+from apps.related.index import rebuild
+
+
+class Command(BaseCommand):
+    help = "Refit the TF-IDF model and recompute every related-content list."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        documents, rows = rebuild()
+        purge_surrogate_keys.delay(["related"])
+        self.stdout.write(self.style.SUCCESS(
+            "Indexed %d documents, stored %d related items in %.1fs."
+            % (documents, rows, time.monotonic() - started)
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('content_creator', '0005_content_body_html'),
+        ('file_manager', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('items', models.PositiveIntegerField(default=0)),
+                ('terms', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_items', to='content_creator.content')),
+                ('related_content', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='content_creator.content')),
+                ('related_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='file_manager.file')),
+            ],
+            options={
+                'ordering': ('content', 'rank'),
+                'constraints': [models.UniqueConstraint(fields=('content', 'rank'), name='related_content_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import models
+from django.urls import reverse
+
+from apps.content_creator.models import Content
+from apps.file_manager.models import File
+
+
+class RelatedIndex(models.Model):
+    """
+    The fitted TF-IDF model (vocabulary, idf) and the vector of every
+    indexed item, as one compressed blob (apps/related/vectorize.py), so
+    an incremental update re-reads one row instead of the whole corpus.
+    A single row (pk=1); `manage.py build_related` replaces it.
+    """
+    data = models.BinaryField()
+    items = models.PositiveIntegerField(default=0)
+    terms = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "%d items, %d terms (built %s)" % (self.items, self.terms, self.built_at)
+
+
+class RelatedItemQuerySet(models.QuerySet):
+    def with_targets(self):
+        # Titles and links only; the neighbours' bodies are never shown.
+        return self.select_related('related_content', 'related_file').defer(
+            'related_content__body', 'related_content__body_html',
+        )
+
+    def for_content(self, content_id):
+        return self.filter(content_id=content_id).with_targets()
+
+    def for_slug(self, slug):
+        return self.filter(content__slug=slug, content__published=True).with_targets()
+
+
+class RelatedItem(models.Model):
+    """One precomputed neighbour of a published Content: a Content or a File."""
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='related_items')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    related_content = models.ForeignKey(
+        Content, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    related_file = models.ForeignKey(
+        File, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+
+    objects = RelatedItemQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('content', 'rank')
+        constraints = [
+            # Also the index every lookup uses: WHERE content_id = ? ORDER BY rank.
+            models.UniqueConstraint(fields=('content', 'rank'), name='related_content_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return '%s -> %s (%.2f)' % (self.content_id, self.target, self.score)
+
+    @property
+    def target(self):
+        return self.related_content if self.related_content_id else self.related_file
+
+    @property
+    def kind(self):
+        return 'content' if self.related_content_id else 'file'
+
+    @property
+    def url(self):
+        if self.related_content_id:
+            return self.related_content.get_absolute_url()
+        return reverse('file_download', args=[self.related_file_id])
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.content_creator.models import Content
+from apps.file_manager.models import File
+from .tasks import update_related
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def refresh_content(sender, instance, **kwargs):
+    update_related.delay(["content:%d" % instance.pk])
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def refresh_file(sender, instance, **kwargs):
+    update_related.delay(["file:%d" % instance.pk])
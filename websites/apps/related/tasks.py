@@ -0,0 +1,21 @@
+from apps.edge_cache.tasks import purge_surrogate_keys
+from apps.jobs.queue import task
+
+
+# NumPy/SciPy are imported inside the tasks: web processes only enqueue.
+
+@task(max_attempts=3, priority=5)
+def update_related(keys):
+    from .index import update
+
+    affected = update(keys)
+    if affected:
+        purge_surrogate_keys.delay(sorted("related:%d" % pk for pk in affected))
+
+
+@task(max_attempts=2, priority=10)
+def rebuild_related():
+    from .index import rebuild
+
+    rebuild()
+    purge_surrogate_keys.delay(["related"])
@@ -0,0 +1,170 @@
+import numpy as np
+from django.test import TestCase
+from scipy import sparse
+
+from apps.content_creator.models import Content
+from apps.file_manager.models import File
+from . import index
+from .models import RelatedIndex, RelatedItem
+from .vectorize import loads, top_neighbours
+
+CONTENTS = [
+    ("Malaria vaccine trial", "Malaria vaccine trial results: mosquito nets for children."),
+    ("Malaria nets distribution", "Mosquito nets against malaria reach more districts."),
+    ("HIV testing week", "Free testing and counselling at HIV clinics."),
+    ("HIV treatment guidelines", "HIV treatment guidelines for clinics: antiretroviral therapy."),
+    ("Cholera outbreak response", "Cholera outbreak: water and sanitation in affected districts."),
+    ("Water sanitation campaign", "Water, sanitation and hygiene campaign for children."),
+]
+FILES = [
+    ("Malaria treatment guidelines", "Malaria treatment protocol."),
+    ("Cholera water report", "Cholera outbreak water testing."),
+    ("HIV counselling manual", "Counselling and testing for HIV."),
+]
+
+
+def lists():
+    """{content_id: [(kind, target pk, score), ...]} of the stored RelatedItems."""
+    out = {}
+    for item in RelatedItem.objects.order_by("content_id", "rank"):
+        target = item.related_content_id or item.related_file_id
+        out.setdefault(item.content_id, []).append((item.kind, target, round(item.score, 4)))
+    return out
+
+
+class TopNeighboursTests(TestCase):
+    def test_best_first_without_the_item_itself(self):
+        matrix = sparse.csr_matrix(np.array([
+            [1.0, 0.0, 0.0],
+            [0.8, 0.6, 0.0],
+            [0.6, 0.8, 0.0],
+            [0.0, 0.0, 1.0],
+        ], dtype=np.float32))
+        results = top_neighbours(matrix, matrix, k=2, exclude=np.arange(4), min_score=0.1, batch_size=3)
+        columns = [list(columns) for columns, _scores in results]
+        self.assertEqual(columns, [[1, 2], [2, 0], [1, 0], []])
+        scores = results[1][1]
+        self.assertAlmostEqual(float(scores[0]), 0.96, places=5)
+        self.assertAlmostEqual(float(scores[1]), 0.8, places=5)
+
+    def test_min_score_and_k(self):
+        matrix = sparse.csr_matrix(np.array([[1.0, 0.0], [0.9, 0.1], [0.2, 0.9]], dtype=np.float32))
+        (columns, scores), = top_neighbours(matrix[:1], matrix, k=1, exclude=[0], min_score=0.5)
+        self.assertEqual(list(columns), [1])
+        (columns, _scores), = top_neighbours(matrix[:1], matrix, k=5, exclude=[-1])
+        self.assertEqual(list(columns), [0, 1, 2])
+
+
+class IndexTests(TestCase):
+    def setUp(self):
+        self.contents = [
+            Content.objects.create(title=title, body=body, content_type="news", published=True)
+            for title, body in CONTENTS
+        ]
+        self.draft = Content.objects.create(
+            title="Malaria draft", body="Malaria nets draft.", content_type="news",
+        )
+        self.files = [
+            File.objects.create(title=title, description=description, file="docs/%d.pdf" % n)
+            for n, (title, description) in enumerate(FILES)
+        ]
+        index.rebuild()
+
+    def test_rebuild_lists_neighbours_of_published_content_only(self):
+        stored = lists()
+        malaria, nets = self.contents[0], self.contents[1]
+        self.assertEqual(set(stored), {content.pk for content in self.contents})
+        self.assertEqual(stored[malaria.pk][0][:2], ("content", nets.pk))
+        for content_id, items in stored.items():
+            self.assertNotIn(("content", content_id), [item[:2] for item in items])
+            self.assertNotIn(("content", self.draft.pk), [item[:2] for item in items])
+            scores = [score for _kind, _pk, score in items]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(RelatedIndex.objects.get().items, len(CONTENTS) + len(FILES))
+
+    def test_update_matches_a_rebuild(self):
+        # Swapping two texts keeps every document frequency, so a refit
+        # yields the same vocabulary and the results must agree exactly.
+        malaria, cholera = self.contents[0], self.contents[4]
+        before = lists()
+        Content.objects.filter(pk=malaria.pk).update(title=CONTENTS[4][0], body=CONTENTS[4][1])
+        Content.objects.filter(pk=cholera.pk).update(title=CONTENTS[0][0], body=CONTENTS[0][1])
+
+        affected = index.update(["content:%d" % malaria.pk, "content:%d" % cholera.pk])
+        updated = lists()
+        # The nets article's list pointed at the old malaria text.
+        self.assertIn(self.contents[1].pk, affected)
+        self.assertNotEqual(updated, before)
+
+        index.rebuild()
+        self.assertEqual(updated, lists())
+
+    def test_update_matches_recomputing_every_list(self):
+        added = Content.objects.create(
+            title="Mosquito nets for malaria", body="Malaria nets distribution for children.",
+            content_type="news", published=True,
+        )
+        removed_file = self.files[1]
+        File.objects.filter(pk=removed_file.pk).delete()
+        unpublished = self.contents[2]
+        Content.objects.filter(pk=unpublished.pk).update(published=False)
+
+        index.update([
+            "content:%d" % added.pk, "file:%d" % removed_file.pk, "content:%d" % unpublished.pk,
+        ])
+        updated = lists()
+        self.assertIn(added.pk, updated)
+        self.assertIn(("content", added.pk), [item[:2] for item in updated[self.contents[1].pk]])
+        self.assertNotIn(unpublished.pk, updated)
+        for items in updated.values():
+            self.assertNotIn(("content", unpublished.pk), [item[:2] for item in items])
+            self.assertNotIn(("file", removed_file.pk), [item[:2] for item in items])
+
+        # Same model and vectors, every list recomputed from scratch.
+        _model, keys, matrix = loads(bytes(RelatedIndex.objects.get().data))
+        RelatedItem.objects.all().delete()
+        RelatedItem.objects.bulk_create(index._neighbours(matrix, keys, index._content_rows(keys)))
+        self.assertEqual(updated, lists())
+
+
+class RelatedContentsViewTests(TestCase):
+    def setUp(self):
+        self.contents = [
+            Content.objects.create(title=title, body=body, content_type="news", published=True)
+            for title, body in CONTENTS
+        ]
+        self.file = File.objects.create(title=FILES[0][0], description=FILES[0][1], file="docs/m.pdf")
+        index.rebuild()
+
+    def test_lists_precomputed_neighbours_best_first(self):
+        malaria = self.contents[0]
+        response = self.client.get("/api/related/%s/" % malaria.slug)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        expected = list(RelatedItem.objects.filter(content=malaria).order_by("rank"))
+        self.assertEqual(len(data), len(expected))
+        self.assertEqual(data[0], {
+            "kind": "content", "id": self.contents[1].pk, "title": self.contents[1].title,
+            "slug": self.contents[1].slug, "url": self.contents[1].get_absolute_url(),
+            "score": round(expected[0].score, 4),
+        })
+        files = [item for item in data if item["kind"] == "file"]
+        self.assertEqual(files, [{
+            "kind": "file", "id": self.file.pk, "title": self.file.title, "slug": None,
+            "url": "/api/files/%d/download/" % self.file.pk,
+            "score": files[0]["score"],
+        }])
+        scores = [item["score"] for item in data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertIn("related:%d" % malaria.pk, response["Surrogate-Key"].split())
+
+    def test_published_content_without_neighbours_is_an_empty_list(self):
+        lonely = Content.objects.create(title="Quarterly", content_type="news", published=True)
+        response = self.client.get("/api/related/%s/" % lonely.slug)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_drafts_and_unknown_slugs_are_not_found(self):
+        draft = Content.objects.create(title="Draft", content_type="news")
+        self.assertEqual(self.client.get("/api/related/%s/" % draft.slug).status_code, 404)
+        self.assertEqual(self.client.get("/api/related/nope/").status_code, 404)
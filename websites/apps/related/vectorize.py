@@ -0,0 +1,126 @@
+# apps/related/vectorize.py
+"""
+TF-IDF vectors and top-k cosine neighbours on SciPy sparse matrices.
+
+    model = Model.fit(token_counts)          # vocabulary + idf
+    matrix = model.transform(token_counts)   # CSR, one L2-normalised row per document
+    top_neighbours(matrix[rows], matrix, k)  # batched sparse products
+
+Term frequency is sublinear (1 + log tf) and idf is smoothed
+(log((1 + n) / (1 + df)) + 1), as in scikit-learn's TfidfVectorizer,
+whose output this matches without pulling it in.
+"""
+import io
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_RE = re.compile(r"[^\W\d_]{3,}")
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below
+    between both but can could did does doing down during each few for from further had has
+    have having her here hers herself him himself his how into its itself just more most
+    not now off once only other our ours ourselves out over own same she should some such
+    than that the their theirs them themselves then there these they this those through too
+    under until very was were what when where which while who whom why will with would you
+    your yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    return Counter(
+        token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS
+    )
+
+
+class Model:
+    def __init__(self, terms, idf):
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.vocabulary = {term: column for column, term in enumerate(self.terms)}
+
+    @classmethod
+    def fit(cls, documents, min_df=2, max_df=0.5):
+        """`documents`: token Counters. Keeps terms in at least `min_df` and at most `max_df` of them."""
+        df = Counter()
+        for counts in documents:
+            df.update(counts.keys())
+        n = len(documents)
+        ceiling = max(min_df, max_df * n)
+        terms = sorted(term for term, count in df.items() if min_df <= count <= ceiling)
+        df_values = np.array([df[term] for term in terms], dtype=np.float64)
+        idf = np.log((1 + n) / (1 + df_values)) + 1
+        return cls(terms, idf)
+
+    def transform(self, documents):
+        rows, columns, counts = [], [], []
+        for row, document in enumerate(documents):
+            for term, count in document.items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    counts.append(count)
+        weights = (1 + np.log(np.asarray(counts, dtype=np.float32))) * self.idf[columns]
+        matrix = sparse.csr_matrix(
+            (weights, (rows, columns)), shape=(len(documents), len(self.terms)), dtype=np.float32,
+        )
+        return normalize(matrix)
+
+
+def normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def top_neighbours(queries, matrix, k, exclude=None, min_score=0.0, batch_size=512):
+    """
+    For each row of `queries`, the (columns, scores) of its `k` most similar
+    rows of `matrix`, best first. `exclude[i]` (the query's own row in
+    `matrix`, or -1) is skipped. Similarities come from one sparse product
+    per `batch_size` queries, so memory stays at batch_size x len(matrix).
+    """
+    transposed = matrix.T.tocsr()
+    results = []
+    for start in range(0, queries.shape[0], batch_size):
+        similarities = (queries[start:start + batch_size] @ transposed).tocsr()
+        for offset in range(similarities.shape[0]):
+            low, high = similarities.indptr[offset], similarities.indptr[offset + 1]
+            columns = similarities.indices[low:high]
+            scores = similarities.data[low:high]
+            keep = scores >= min_score
+            if exclude is not None:
+                keep &= columns != exclude[start + offset]
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > k:
+                best = np.argpartition(-scores, k)[:k]
+                columns, scores = columns[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            results.append((columns[order], scores[order]))
+    return results
+
+
+# ---------------------------------------------------------------------
+# Persistence (one compressed .npz blob)
+# ---------------------------------------------------------------------
+def dumps(model, keys, matrix):
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        terms=np.array(model.terms, dtype=str), idf=model.idf, keys=np.array(keys, dtype=str),
+        data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+        shape=np.array(matrix.shape),
+    )
+    return buffer.getvalue()
+
+
+def loads(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as saved:
+        model = Model(saved["terms"].tolist(), saved["idf"])
+        matrix = sparse.csr_matrix(
+            (saved["data"], saved["indices"], saved["indptr"]), shape=tuple(saved["shape"]),
+        )
+        return model, saved["keys"].tolist(), matrix
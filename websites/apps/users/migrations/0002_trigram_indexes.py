@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from nascp_web.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        # Serves `user__username` searches from the audit changelist.
+        trigram_indexes('users_customuser', 'username'),
+    ]
@@ -0,0 +1,11 @@
+"""
+ASGI config for API-only workers (nascp_web.settings_api).
+"""
+
+import os
+
+from nascp_web.handlers import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nascp_web.settings_api')
+
+application = get_asgi_application()
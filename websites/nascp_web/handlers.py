@@ -0,0 +1,147 @@
+# nascp_web/handlers.py
+"""
+Path-aware middleware chains.
+
+Anonymous JSON and media requests do not need sessions, CSRF, auth,
+messages, clickjacking or CSP. Even without a cookie, touching
+`request.user` marks the session as accessed, which adds `Vary: Cookie`
+and defeats shared caches. These entry points build two handlers:
+
+    full    settings.MIDDLEWARE
+    light   settings.LIGHT_MIDDLEWARE
+
+A request whose path starts with one of LIGHT_MIDDLEWARE_PREFIXES and that
+carries no session cookie goes through the light one. Everything else,
+including any signed-in user calling the API, gets the full chain.
+`manage.py bench_middleware` measures the difference.
+"""
+from http.cookies import SimpleCookie
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.utils.module_loading import import_string
+
+
+class LightMiddlewareMixin:
+    """
+    Builds the chain from settings.LIGHT_MIDDLEWARE. Mirrors
+    BaseHandler.load_middleware, which only reads settings.MIDDLEWARE;
+    settings are never modified, so nothing else sees a different chain.
+    """
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        get_response = self._get_response_async if is_async else self._get_response
+        handler = convert_exception_to_response(get_response)
+        handler_is_async = is_async
+        for middleware_path in reversed(settings.LIGHT_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            middleware_can_sync = getattr(middleware, "sync_capable", True)
+            middleware_can_async = getattr(middleware, "async_capable", False)
+            if not middleware_can_sync and not middleware_can_async:
+                raise RuntimeError(
+                    "Middleware %s must have at least one of "
+                    "sync_capable/async_capable set to True." % middleware_path
+                )
+            elif not handler_is_async and middleware_can_sync:
+                middleware_is_async = False
+            else:
+                middleware_is_async = middleware_can_async
+            try:
+                adapted_handler = self.adapt_method_mode(
+                    middleware_is_async, handler, handler_is_async,
+                    debug=settings.DEBUG, name="middleware %s" % middleware_path,
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed:
+                continue
+            handler = adapted_handler
+            if mw_instance is None:
+                raise ImproperlyConfigured("Middleware factory %s returned None." % middleware_path)
+
+            if hasattr(mw_instance, "process_view"):
+                self._view_middleware.insert(0, self.adapt_method_mode(is_async, mw_instance.process_view))
+            if hasattr(mw_instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(is_async, mw_instance.process_template_response)
+                )
+            if hasattr(mw_instance, "process_exception"):
+                # Exception middleware always runs synchronously, as in Django.
+                self._exception_middleware.append(
+                    self.adapt_method_mode(False, mw_instance.process_exception)
+                )
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        handler = self.adapt_method_mode(is_async, handler, handler_is_async)
+        self._middleware_chain = handler
+
+
+class LightWSGIHandler(LightMiddlewareMixin, WSGIHandler):
+    pass
+
+
+class LightASGIHandler(LightMiddlewareMixin, ASGIHandler):
+    pass
+
+
+def use_light_chain(path, cookie_header):
+    if not path.startswith(tuple(getattr(settings, "LIGHT_MIDDLEWARE_PREFIXES", ()))):
+        return False
+    if not cookie_header or settings.SESSION_COOKIE_NAME not in cookie_header:
+        return True
+    # The name appears somewhere in the header; parse to be sure it is a cookie.
+    return settings.SESSION_COOKIE_NAME not in SimpleCookie(cookie_header)
+
+
+class PathAwareWSGIApplication:
+    def __init__(self):
+        self.full = WSGIHandler()
+        self.light = LightWSGIHandler()
+
+    def __call__(self, environ, start_response):
+        handler = self.light if use_light_chain(
+            environ.get("PATH_INFO", ""), environ.get("HTTP_COOKIE", "")
+        ) else self.full
+        return handler(environ, start_response)
+
+
+class PathAwareASGIApplication:
+    def __init__(self):
+        self.full = ASGIHandler()
+        self.light = LightASGIHandler()
+
+    async def __call__(self, scope, receive, send):
+        cookie_header = ""
+        if scope["type"] == "http":
+            cookie_header = b"; ".join(
+                value for name, value in scope.get("headers", ()) if name == b"cookie"
+            ).decode("latin-1")
+        handler = self.light if scope["type"] == "http" and use_light_chain(
+            scope.get("path", ""), cookie_header
+        ) else self.full
+        return await handler(scope, receive, send)
+
+
+def get_wsgi_application():
+    """Like django.core.wsgi.get_wsgi_application, with path-aware chains."""
+    django.setup(set_prefix=False)
+    return PathAwareWSGIApplication()
+
+
+def get_asgi_application():
+    """
+    Like django.core.asgi.get_asgi_application, with path-aware chains and
+    the live change-event stream (apps/live/asgi.py) in front.
+    """
+    django.setup(set_prefix=False)
+    from apps.live.asgi import EventStreamApp
+
+    return EventStreamApp(PathAwareASGIApplication())
@@ -0,0 +1,134 @@
+# nascp_web/search.py
+"""
+Substring search shared by FileFilter and the admin changelists.
+
+On PostgreSQL every searched column carries a pg_trgm GIN index on
+UPPER(column::text) – the exact expression Django emits for `icontains` /
+`istartswith`; UPPER(HOST(column)) for inet columns – so `ILIKE '%term%'` becomes an index scan instead of a
+sequential scan. Terms shorter than a trigram (e.g. "TB", the "01" of
+"Doc 01") still match anywhere in the column; the index cannot narrow
+those and PostgreSQL scans instead. Other databases fall back to plain
+LIKE lookups.
+"""
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.db import migrations, models
+from django.utils.text import smart_split, unescape_string_literal
+
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+
+def substring_lookup(field_name, term):
+    """
+    Return the ORM lookup for one search field.
+    Honours the admin prefixes: '^' (starts with) and '=' (exact match).
+    """
+    if field_name.startswith("^"):
+        return "%s__istartswith" % field_name[1:]
+    if field_name.startswith("="):
+        return "%s__iexact" % field_name[1:]
+    return "%s__icontains" % field_name
+
+
+def substring_q(fields, term):
+    """OR together a substring match of `term` across `fields`."""
+    return models.Q.create(
+        [(substring_lookup(field, term), term) for field in fields],
+        connector=models.Q.OR,
+    )
+
+
+def substring_search(queryset, fields, search_term):
+    """
+    Filter `queryset` so every word of `search_term` appears in at least
+    one of `fields`. Quoted phrases are kept together, like the admin does.
+    """
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            queryset = queryset.filter(substring_q(fields, bit))
+    return queryset
+
+
+class SubstringFilter(django_filters.CharFilter):
+    """CharFilter that searches through `substring_search`."""
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        qs = substring_search(qs, [self.field_name], value)
+        return qs.distinct() if self.distinct else qs
+
+
+class TrigramSearchAdminMixin:
+    """
+    ModelAdmin mixin routing `search_fields` through `substring_search`,
+    so changelist searches hit the trigram indexes.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = [str(field) for field in self.get_search_fields(request)]
+        if not (search_fields and search_term):
+            return queryset, False
+        queryset = substring_search(queryset, search_fields, search_term)
+        may_have_duplicates = any(
+            lookup_spawns_duplicates(self.opts, field.lstrip("^="))
+            for field in search_fields
+        )
+        return queryset, may_have_duplicates
+
+
+# ---------------------------------------------------------------------
+# Migration helper
+# ---------------------------------------------------------------------
+def trigram_index_name(table, column):
+    return ("%s_%s_trgm" % (table, column))[:63]
+
+
+def trigram_indexes(table, *columns, cast='"%s"::text'):
+    """
+    Migration operation creating UPPER(column::text) gin_trgm_ops indexes.
+    Pass cast='HOST("%s")' for GenericIPAddressField (inet) columns, which
+    Django matches through HOST() rather than ::text.
+    It is a no-op on databases other than PostgreSQL.
+    """
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in columns:
+            schema_editor.execute(
+                'CREATE INDEX IF NOT EXISTS "%s" ON "%s" '
+                'USING gin ((UPPER(%s)) gin_trgm_ops)'
+                % (trigram_index_name(table, column), table, cast % column)
+            )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for column in columns:
+            schema_editor.execute(
+                'DROP INDEX IF EXISTS "%s"' % trigram_index_name(table, column)
+            )
+
+    return migrations.RunPython(forwards, backwards)
+
+
+def search_vector_index(table, column):
+    """
+    Migration operation creating a GIN index on a tsvector column
+    (full-text search). It is a no-op on databases other than PostgreSQL.
+    """
+    name = ("%s_%s_gin" % (table, column))[:63]
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(
+                'CREATE INDEX IF NOT EXISTS "%s" ON "%s" USING gin ("%s")' % (name, table, column)
+            )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute('DROP INDEX IF EXISTS "%s"' % name)
+
+    return migrations.RunPython(forwards, backwards)
@@ -74,6 +74,12 @@ INSTALLED_APPS = [
     "apps.api",
     "apps.content_creator",
     "apps.audit.apps.AuditConfig",
+    "apps.feeds",
+    "apps.prerender",
+    "apps.jobs",
+    "apps.edge_cache",
+    "apps.related",
+    "apps.live",
 ]
 
 # Crispy Forms (Bootstrap 5)
@@ -85,6 +91,7 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # ---------------------------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.edge_cache.middleware.EdgeCacheMiddleware",   # before sessions: sees their cookie
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -93,6 +100,19 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "apps.audit.middleware.AuditMiddleware",
     "csp.middleware.CSPMiddleware",          # uses CSP_* settings above
+    "apps.api.middleware.RateLimitHeadersMiddleware",
+]
+
+# Requests under these prefixes that carry no session cookie run the short
+# chain below instead: no session/CSRF/auth/messages/clickjacking/CSP work
+# and no `Vary: Cookie` (nascp_web/handlers.py, used by wsgi.py/asgi.py).
+LIGHT_MIDDLEWARE_PREFIXES = ("/api/", "/media/")
+LIGHT_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "apps.edge_cache.middleware.EdgeCacheMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "apps.audit.middleware.AuditMiddleware",
+    "apps.api.middleware.RateLimitHeadersMiddleware",
 ]
 
 # ---------------------------------------------------------------------
@@ -131,6 +151,20 @@ DATABASES = {
 # ---------------------------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_THROTTLE_CLASSES": ["apps.api.throttling.TokenBucketThrottle"],
+    # Proxies in front of Django. 0 keys clients on REMOTE_ADDR; only with
+    # an explicit count is X-Forwarded-For (client-controlled) trusted.
+    "NUM_PROXIES": int(os.getenv("DJANGO_NUM_PROXIES", "0")),
+}
+
+# Token buckets per scope (apps/api/throttling.py): (capacity, refill per
+# second), per client IP and shared by all clients. "top" covers the small
+# top_*/latest_* endpoints, "browse" the per-click/per-row ones (jstree,
+# related, download/thumbnail redirects), "all" the whole-table ones.
+API_THROTTLE_BUCKETS = {
+    "top": {"ip": (60, 1.0), "global": (1200, 100.0)},
+    "browse": {"ip": (120, 4.0), "global": (2400, 200.0)},
+    "all": {"ip": (10, 0.2), "global": (100, 5.0)},
 }
 
 # ---------------------------------------------------------------------
@@ -144,11 +178,90 @@ STATIC_ROOT = BASE_DIR / "staticfiles"       # collectstatic target
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# ---------------------------------------------------------------------
+# Media storage (nascp_web/storage.py)
+# ---------------------------------------------------------------------
+# Set DJANGO_S3_BUCKET to keep media in an S3-compatible bucket instead of
+# MEDIA_ROOT. "default" (File.file, profile pictures) is private and served
+# through presigned URLs – or CloudFront-signed ones when
+# DJANGO_MEDIA_CDN_DOMAIN and a key pair are set. "public" holds CKEditor
+# uploads under public/, which must be publicly readable (bucket policy)
+# because their URLs are embedded in Content.body. Credentials come from
+# the usual AWS_* environment variables; point DJANGO_S3_ENDPOINT_URL at
+# MinIO or `moto_server` to run against a local stand-in. Browsers post
+# direct uploads to the bucket, so its CORS rules must allow POST from
+# SITE_URL. "streams" holds HLS playlists and segments of video Files
+# (streams/ in the bucket, publicly readable like public/); every name is
+# unique, so objects carry a one-year immutable Cache-Control.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "public": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "streams": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": MEDIA_ROOT / "streams", "base_url": MEDIA_URL + "streams/"},
+    },
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+MEDIA_SIGNED_URL_EXPIRE = 3600               # seconds a signed download URL stays valid
+DIRECT_UPLOAD_EXPIRE = 900                   # seconds a presigned upload policy stays valid
+DIRECT_UPLOAD_MAX_BYTES = 2 * 1024 ** 3
+
+if os.getenv("DJANGO_S3_BUCKET"):
+    _s3_options = {
+        "bucket_name": os.getenv("DJANGO_S3_BUCKET"),
+        "endpoint_url": os.getenv("DJANGO_S3_ENDPOINT_URL") or None,
+        "region_name": os.getenv("DJANGO_S3_REGION") or None,
+        "custom_domain": os.getenv("DJANGO_MEDIA_CDN_DOMAIN") or None,
+        "file_overwrite": False,
+        "default_acl": None,
+    }
+    _cdn_key_file = os.getenv("DJANGO_CLOUDFRONT_KEY_FILE")
+    STORAGES["default"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            **_s3_options,
+            "querystring_auth": True,
+            "querystring_expire": MEDIA_SIGNED_URL_EXPIRE,
+            "cloudfront_key_id": os.getenv("DJANGO_CLOUDFRONT_KEY_ID") or None,
+            "cloudfront_key": Path(_cdn_key_file).read_bytes() if _cdn_key_file else None,
+        },
+    }
+    STORAGES["public"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            **_s3_options, "location": "public", "querystring_auth": False,
+            # Served straight from the bucket/CDN, so the header lives on the object.
+            "object_parameters": {"CacheControl": "public, max-age=86400, stale-while-revalidate=86400"},
+        },
+    }
+    STORAGES["streams"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            **_s3_options, "location": "streams", "querystring_auth": False,
+            "object_parameters": {"CacheControl": "public, max-age=31536000, immutable"},
+        },
+    }
+    _media_origin = (
+        "https://%s" % _s3_options["custom_domain"] if _s3_options["custom_domain"]
+        else _s3_options["endpoint_url"] or "https://*.amazonaws.com"
+    )
+    CSP_IMG_SRC += (_media_origin,)
+
 # ---------------------------------------------------------------------
 # CKEditor configuration
 # ---------------------------------------------------------------------
 CKEDITOR_UPLOAD_PATH = "uploads/"            # ▶ CKEDITOR: adds /media/uploads/...
-CKEDITOR_IMAGE_BACKEND = "pillow"            # ▶ CKEDITOR
+CKEDITOR_STORAGE_BACKEND = "nascp_web.storage.PublicMediaStorage"  # ▶ CKEDITOR: STORAGES["public"]
+CKEDITOR_IMAGE_BACKEND = "apps.content_creator.images.OptimizingImageBackend"  # ▶ CKEDITOR: EXIF strip + resize + WebP/AVIF
+CKEDITOR_IMAGE_MAX_DIMENSION = 1920          # longest side of the embedded image
+CKEDITOR_IMAGE_QUALITY = 80
+CKEDITOR_IMAGE_FORMATS = ("webp", "avif")    # derivatives, skipped if Pillow lacks the codec
+CKEDITOR_ORIGINALS_PATH = "originals/"       # untouched uploads
+CKEDITOR_DERIVATIVES_PATH = "derivatives/"   # kept out of the CKEditor file browser
+
+# Content.body_html rewrite (apps/content_creator/richtext.py)
+CONTENT_IMAGE_WIDTHS = (480, 960, 1440)      # srcset widths generated under derivatives/
+CONTENT_IMAGE_SIZES = "(max-width: 960px) 100vw, 960px"
 
 CKEDITOR_CONFIGS = {                         # ▶ CKEDITOR: toolbar/features
     "default": {
@@ -162,6 +275,201 @@ CKEDITOR_CONFIGS = {                         # ▶ CKEDITOR: toolbar/features
     }
 }
 
+# ---------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------
+# Set DJANGO_REDIS_URL in production so every worker shares invalidations;
+# the local-memory fallback is per process.
+if os.getenv("DJANGO_REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("DJANGO_REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+CONTENT_FRAGMENT_CACHE_TIMEOUT = 600         # seconds; content_creator list/category fragments
+
+# ---------------------------------------------------------------------
+# Sitemaps & feeds (apps.feeds)
+# ---------------------------------------------------------------------
+SITE_URL = os.getenv("DJANGO_SITE_URL", "http://localhost:8000")  # absolute links in feeds; prerender host
+FEED_ITEM_LIMIT = 50                         # items per RSS/Atom feed
+FEEDS_CACHE_TIMEOUT = 60                     # seconds; artifacts also live in the DB
+
+# ---------------------------------------------------------------------
+# Static pre-rendering (apps.prerender)
+# ---------------------------------------------------------------------
+# When enabled, saving Content/Category/File re-writes the affected pages
+# and API snapshots; `manage.py prerender_site` does a full rebuild.
+STATIC_PUBLISH_ENABLED = os.getenv("DJANGO_STATIC_PUBLISH", "0") == "1"
+STATIC_PUBLISH_ROOT = BASE_DIR / "published"
+
+# ---------------------------------------------------------------------
+# Edge caching (apps.edge_cache)
+# ---------------------------------------------------------------------
+# Cache-Control for anonymous GET/HEAD by path prefix; first match wins and
+# None leaves the response alone. Shared caches (s-maxage) keep pages long
+# because saves purge them by surrogate key; browsers revalidate sooner.
+_EDGE_PAGES = {"max_age": 60, "s_maxage": 86400, "stale_while_revalidate": 300, "stale_if_error": 86400}
+EDGE_CACHE_ROUTES = (
+    ("/api/uploads/", None),
+    ("/api/", _EDGE_PAGES),
+    ("/media/streams/", {"max_age": 31536000, "immutable": True}),   # names are never reused
+    ("/media/", {"max_age": 86400, "stale_while_revalidate": 86400, "stale_if_error": 604800}),
+    ("/sitemap", {"max_age": 300, "s_maxage": 86400, "stale_if_error": 86400}),
+    ("/feeds/", {"max_age": 300, "s_maxage": 86400, "stale_if_error": 86400}),
+    ("/admin/", None),
+    ("/accounts/", None),
+    ("/audit/", None),
+    ("/ckeditor/", None),
+    ("/", _EDGE_PAGES),                      # content pages and the SPA shell
+)
+# Where purges go. DJANGO_EDGE_PURGE_URL=http://127.0.0.1:8765/ talks to
+# `manage.py edge_cache_standin`; without any of these, purges are no-ops.
+EDGE_CACHE_PURGER = {"BACKEND": "apps.edge_cache.purgers.NullPurger"}
+if os.getenv("DJANGO_EDGE_PURGE_URL"):
+    EDGE_CACHE_PURGER = {
+        "BACKEND": "apps.edge_cache.purgers.HTTPPurger",
+        "OPTIONS": {"url": os.getenv("DJANGO_EDGE_PURGE_URL"), "token": os.getenv("DJANGO_EDGE_PURGE_TOKEN")},
+    }
+elif os.getenv("DJANGO_FASTLY_SERVICE_ID"):
+    EDGE_CACHE_PURGER = {
+        "BACKEND": "apps.edge_cache.purgers.FastlyPurger",
+        "OPTIONS": {"service_id": os.getenv("DJANGO_FASTLY_SERVICE_ID"), "token": os.getenv("FASTLY_API_TOKEN")},
+    }
+elif os.getenv("DJANGO_CLOUDFLARE_ZONE_ID"):
+    EDGE_CACHE_PURGER = {
+        "BACKEND": "apps.edge_cache.purgers.CloudflarePurger",
+        "OPTIONS": {"zone_id": os.getenv("DJANGO_CLOUDFLARE_ZONE_ID"), "token": os.getenv("CLOUDFLARE_API_TOKEN")},
+    }
+
+# ---------------------------------------------------------------------
+# Background jobs (apps.jobs)
+# ---------------------------------------------------------------------
+# Signals queue feed rebuilds and pre-rendering as Job rows; run
+# `manage.py run_worker` next to the web processes. JOBS_INLINE runs them
+# in the request process on commit instead (development without a worker).
+JOBS_INLINE = os.getenv("DJANGO_JOBS_INLINE", "0") == "1"
+JOBS_RETRY_BASE_SECONDS = 10                 # first retry delay, doubled per attempt
+JOBS_RETRY_MAX_SECONDS = 3600
+JOBS_HEARTBEAT_SECONDS = 60                  # running jobs refresh their lock this often
+JOBS_LOCK_TIMEOUT = 600                      # no heartbeat for this long = worker died
+JOBS_KEEP_FINISHED_DAYS = 14
+JOB_SCHEDULES = {
+    "purge-finished-jobs": {"task": "apps.jobs.tasks.purge_finished", "cron": "30 3 * * *"},
+    "rebuild-related": {"task": "apps.related.tasks.rebuild_related", "cron": "15 4 * * *"},
+}
+
+# ---------------------------------------------------------------------
+# Live change events (apps.live)
+# ---------------------------------------------------------------------
+# Surrogate keys are pushed as Server-Sent Events on LIVE_EVENTS_PATH by
+# the ASGI app (nascp_web/asgi.py) once their edge purge has run; the SPA
+# refreshes only the lists an event names. With DJANGO_REDIS_URL events
+# cross processes (worker purges reach ASGI streams); without it only
+# streams in the purging process see them (JOBS_INLINE development).
+LIVE_EVENTS_PATH = "/api/events/"
+LIVE_BROADCASTER = {"BACKEND": "apps.live.broadcast.LocalBroadcaster"}
+if os.getenv("DJANGO_REDIS_URL"):
+    LIVE_BROADCASTER = {
+        "BACKEND": "apps.live.broadcast.RedisBroadcaster",
+        "OPTIONS": {"url": os.getenv("DJANGO_REDIS_URL"), "channel": "live:changes"},
+    }
+LIVE_HEARTBEAT_SECONDS = 20                  # comment line on idle streams (proxy timeouts)
+LIVE_HISTORY = 500                           # events kept per process for Last-Event-ID
+LIVE_QUEUE_SIZE = 100                        # a stream further behind gets a reset
+LIVE_MAX_STREAMS = 10000                     # per process; beyond it: 503 + Retry-After
+
+# ---------------------------------------------------------------------
+# Document text (apps/file_manager/extract.py)
+# ---------------------------------------------------------------------
+# Saved document Files are queued for extraction; `manage.py
+# extract_file_text` backfills. Search: FileFilter's `q` (PostgreSQL FTS).
+FILE_TEXT_MAX_BYTES = 100 * 1024 ** 2        # larger uploads are not read
+FILE_TEXT_MAX_CHARS = 2_000_000              # text stored (compressed) per File
+FILE_TEXT_INDEX_CHARS = 500_000              # text fed to the tsvector (1 MB limit)
+FILE_TEXT_SEARCH_CONFIG = "english"
+
+# ---------------------------------------------------------------------
+# File browser (apps/file_manager/views.py, browse.py, thumbnails.py)
+# ---------------------------------------------------------------------
+# /files/ pages by keyset over the indexed sort columns; image rows show a
+# derivative thumbnail (`manage.py make_thumbnails` backfills).
+FILE_BROWSER_PAGE_SIZE = 50
+FILE_BROWSER_ESTIMATED_COUNT_THRESHOLD = 10_000  # above this the total is the planner's estimate
+FILE_BROWSER_COUNT_TIMEOUT = 600             # seconds a total is cached (until a File changes)
+FILE_THUMBNAIL_WIDTH = 160                   # px; also the API's thumbnail_url
+
+# /api/jstree/ (apps/file_manager/folders.py): category -> year -> month
+# nodes with file counts, kept current on File save/delete. `manage.py
+# rebuild_folder_tree` builds it for existing Files and prunes empty nodes.
+FOLDER_TREE_MAX_FILES = 200                  # Files listed under one month node
+FOLDER_TREE_UNCATEGORISED = "Uncategorised"  # label of Files without a category
+
+# ---------------------------------------------------------------------
+# Video streaming (apps/file_manager/stream.py)
+# ---------------------------------------------------------------------
+# Saved video Files are packaged as HLS by the worker with a local ffmpeg
+# into STORAGES["streams"]; the API returns the master playlist as
+# `stream_url` next to `url`. `manage.py package_videos` backfills.
+FFMPEG_BINARY = os.getenv("DJANGO_FFMPEG", "ffmpeg")
+FFPROBE_BINARY = os.getenv("DJANGO_FFPROBE", "ffprobe")
+HLS_LADDER = ((720, 2500), (480, 1200), (360, 600))  # (short side px, video kbps); larger than the source are skipped
+HLS_AUDIO_KBPS = 96
+HLS_SEGMENT_SECONDS = 6
+HLS_PRESET = "veryfast"                      # x264 speed/size trade-off
+HLS_TIMEOUT = 4 * 3600                       # seconds one ffmpeg run may take
+HLS_UPLOAD_THREADS = 8                       # parallel segment uploads
+
+# ---------------------------------------------------------------------
+# Related content (apps.related)
+# ---------------------------------------------------------------------
+# TF-IDF neighbours of each published Content, precomputed by the worker:
+# saves update the lists they touch, a nightly rebuild refits the vocabulary.
+RELATED_ITEMS = 6                            # neighbours stored per Content
+RELATED_MIN_SCORE = 0.05                     # cosine similarity below this is not "related"
+RELATED_MIN_DF = 2                           # terms in fewer documents are dropped...
+RELATED_MAX_DF = 0.5                         # ...and so are terms in more than this share
+RELATED_BATCH_SIZE = 512                     # rows per sparse matrix product
+
+# ---------------------------------------------------------------------
+# Audit sampling (apps/audit/classify.py)
+# ---------------------------------------------------------------------
+# First matching prefix sets the traffic class; "skip" is neither logged
+# nor counted. Bot/monitor user agents override the path class.
+AUDIT_PATH_RULES = (
+    ("/static/", "skip"),
+    ("/sitemap", "feed"),
+    ("/feeds/", "feed"),
+    ("/media/", "asset"),
+    ("/favicon.ico", "asset"),
+    ("/robots.txt", "bot"),
+    ("/api/", "api"),
+)
+# Share of each class written to AuditLog (rate stored per row); 0 means
+# counted in AuditTrafficCount only.
+AUDIT_SAMPLE_RATES = {
+    "human": 1.0,
+    "api": 0.1,
+    "asset": 0.01,
+    "feed": 0.0,
+    "bot": 0.05,
+    "monitor": 0.0,
+}
+AUDIT_COUNT_FLUSH_SECONDS = 60               # per-process count buffer
+
+# ---------------------------------------------------------------------
+# Admin
+# ---------------------------------------------------------------------
+# Changelists above this many (planner-estimated) rows show an estimated
+# total instead of running COUNT(*) – see nascp_web/changelist.py.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10_000
+
 # ---------------------------------------------------------------------
 # Internationalisation
 # ---------------------------------------------------------------------
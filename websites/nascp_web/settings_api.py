@@ -0,0 +1,49 @@
+"""
+nascp_web/settings_api.py
+Lean profile for processes that only serve /api/ JSON.
+
+    gunicorn nascp_web.wsgi_api:application
+    uvicorn nascp_web.asgi_api:application
+
+Same database, cache, storage and API settings as nascp_web.settings, minus
+the admin, forms/tables/CKEditor apps, templates and the HTML-only
+middleware. `manage.py bench_startup` compares the two profiles.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = "nascp_web.urls_api"
+WSGI_APPLICATION = "nascp_web.wsgi_api.application"
+
+# Apps whose models or signals the API touches. feeds/prerender stay so a
+# File registered through /api/uploads/ still refreshes feeds and snapshots.
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",               # staff session auth for uploads
+    "rest_framework",
+    "apps.users",
+    "apps.file_manager",
+    "apps.api",
+    "apps.content_creator",
+    "apps.audit.apps.AuditConfig",
+    "apps.feeds",
+    "apps.prerender",
+    "apps.jobs",
+    "apps.edge_cache",
+    "apps.related",
+    "apps.live",
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "apps.edge_cache.middleware.EdgeCacheMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.audit.middleware.AuditMiddleware",
+    "apps.api.middleware.RateLimitHeadersMiddleware",
+]
+
+# JSON only: no template engine, no static files.
+TEMPLATES = []
@@ -0,0 +1,111 @@
+# nascp_web/storage.py
+"""
+Media storage helpers.
+
+settings.STORAGES decides where media bytes live:
+
+    default   File.file, profile pictures   private bucket objects served
+                                             through presigned (or
+                                             CloudFront-signed) URLs
+    public    CKEditor uploads              unsigned URLs, because they are
+                                             embedded in Content.body
+
+Without DJANGO_S3_BUCKET both aliases are FileSystemStorage on MEDIA_ROOT
+and URLs are plain MEDIA_URL paths, exactly as before.
+
+With a bucket, browsers upload File bytes straight to it: the API hands
+out a short-lived POST policy (`presigned_upload`) for a fresh key and
+the File row is created from that key afterwards, so Django never proxies
+the upload.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage, storages
+from django.utils.functional import LazyObject
+
+CACHE_PREFIX = "media-url:"
+
+
+class PublicMediaStorage(LazyObject):
+    """The "public" STORAGES alias, importable as a class (CKEDITOR_STORAGE_BACKEND)."""
+
+    def _setup(self):
+        self._wrapped = storages["public"]
+
+
+def signed_url_expire():
+    return getattr(settings, "MEDIA_SIGNED_URL_EXPIRE", 3600)
+
+
+def signs_urls(storage=None):
+    """True when `storage.url()` returns expiring, per-object signed URLs."""
+    return bool(getattr(storage or default_storage, "querystring_auth", False))
+
+
+def direct_uploads_enabled(storage=None):
+    """Presigned uploads need an S3-compatible bucket behind `storage`."""
+    return bool(getattr(storage or default_storage, "bucket_name", None))
+
+
+def _cache_key(name):
+    return CACHE_PREFIX + hashlib.md5(name.encode()).hexdigest()
+
+
+def download_urls(names, storage=None):
+    """
+    Map each stored name in `names` to its download URL.
+
+    Unsigned storages build the URL from the name alone. Signed URLs are
+    kept in the cache for half their lifetime, so a page of rows costs one
+    get_many rather than a signature per row, and repeat requests get the
+    same (browser-cacheable) URL.
+    """
+    storage = storage or default_storage
+    names = [name for name in dict.fromkeys(names) if name]
+    if not signs_urls(storage):
+        return {name: storage.url(name) for name in names}
+
+    keys = {_cache_key(name): name for name in names}
+    urls = {keys[key]: url for key, url in cache.get_many(list(keys)).items()}
+    signed = {
+        key: storage.url(name, expire=signed_url_expire())
+        for key, name in keys.items() if name not in urls
+    }
+    if signed:
+        cache.set_many(signed, signed_url_expire() // 2)
+        urls.update((keys[key], url) for key, url in signed.items())
+    return urls
+
+
+def download_url(name, storage=None):
+    return download_urls([name], storage).get(name, "") if name else ""
+
+
+def presigned_upload(key, content_type, storage=None):
+    """
+    POST policy that lets a browser store one object at `key`.
+
+    Returns {"key", "url", "fields"}: the client sends `fields` plus a
+    `file` part to `url` as multipart/form-data. The policy pins the
+    content type and caps the size at DIRECT_UPLOAD_MAX_BYTES.
+    """
+    storage = storage or default_storage
+    fields = {"Content-Type": content_type}
+    conditions = [
+        {"Content-Type": content_type},
+        ["content-length-range", 1, getattr(settings, "DIRECT_UPLOAD_MAX_BYTES", 2 * 1024 ** 3)],
+    ]
+    if storage.default_acl:
+        fields["acl"] = storage.default_acl
+        conditions.append({"acl": storage.default_acl})
+    post = storage.connection.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        # Objects live under the storage's `location` prefix, as save() puts them.
+        Key=storage._normalize_name(key),
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=getattr(settings, "DIRECT_UPLOAD_EXPIRE", 900),
+    )
+    return {"key": key, "url": post["url"], "fields": post["fields"]}
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.content_creator.models import Category, Content
+from .changelist import EstimatedCountPaginator
+from .handlers import LightWSGIHandler, PathAwareWSGIApplication
+
+
+@override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.bulk_create(Category(name="c%d" % n, slug="c%d" % n) for n in range(3))
+
+    def count(self, queryset, estimate):
+        with mock.patch("nascp_web.changelist.estimated_count", return_value=estimate):
+            return EstimatedCountPaginator(queryset, 10).count
+
+    def test_large_unfiltered_table_uses_the_estimate(self):
+        self.assertEqual(self.count(Category.objects.order_by("name"), 50_000), 50_000)
+
+    def test_small_estimate_gets_an_exact_count(self):
+        self.assertEqual(self.count(Category.objects.all(), 99), 3)
+
+    def test_filtered_queryset_gets_an_exact_count(self):
+        self.assertEqual(self.count(Category.objects.filter(name__startswith="c"), 50_000), 3)
+        self.assertEqual(self.count(Category.objects.exclude(name="c0"), 50_000), 2)
+
+
+class AutocompleteFilterTests(TestCase):
+    url = "/admin/content_creator/content/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reports = Category.objects.create(name="Reports", slug="reports")
+        cls.guides = Category.objects.create(name="Guides", slug="guides")
+        Content.objects.create(title="Annual report", content_type="news", category=cls.reports)
+        Content.objects.create(title="Field guide", content_type="news", category=cls.guides)
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_filters_by_the_selected_category(self):
+        response = self.client.get(self.url, {"category__id__exact": self.reports.pk})
+        self.assertContains(response, "Annual report")
+        self.assertNotContains(response, "Field guide")
+        # The widget labels the selection only; other categories are not listed.
+        self.assertContains(response, '<option value="%d" selected>Reports</option>' % self.reports.pk, html=True)
+        self.assertNotContains(response, '<option value="%d">' % self.guides.pk)
+
+    def test_autocomplete_assets_are_loaded(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'id="autocomplete_filter_category"')
+        self.assertContains(response, "admin/js/autocomplete.js")
+
+
+class RecordingMiddleware:
+    """Notes the MIDDLEWARE setting visible while the light chain is built."""
+    seen = []
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.seen.append(list(settings.MIDDLEWARE))
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+
+class MiddlewareChainTests(TestCase):
+    def call(self, path, cookie=""):
+        environ = RequestFactory()._base_environ(PATH_INFO=path, HTTP_COOKIE=cookie)
+        started = {}
+
+        def start_response(status, headers):
+            started.update(headers)
+
+        b"".join(self.app(environ, start_response))
+        return started
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.app = PathAwareWSGIApplication()
+
+    def assertLight(self, headers):
+        self.assertNotIn("X-Frame-Options", headers)
+        self.assertNotIn("Cookie", headers.get("Vary", ""))
+
+    def test_anonymous_api_and_media_get_the_light_chain(self):
+        self.assertLight(self.call("/api/top-news-contents/"))
+        self.assertLight(self.call("/media/uploads/missing.png"))
+
+    def test_pages_and_signed_in_api_calls_get_the_full_chain(self):
+        self.assertIn("X-Frame-Options", self.call("/"))
+        cookie = "%s=abc" % settings.SESSION_COOKIE_NAME
+        self.assertIn("X-Frame-Options", self.call("/api/top-news-contents/", cookie))
+        # Other cookies do not count as a session.
+        self.assertLight(self.call("/api/top-news-contents/", "theme=dark"))
+
+    @override_settings(LIGHT_MIDDLEWARE=["nascp_web.tests.RecordingMiddleware"])
+    def test_building_the_light_chain_leaves_settings_alone(self):
+        RecordingMiddleware.seen.clear()
+        LightWSGIHandler()
+        self.assertEqual(RecordingMiddleware.seen, [list(settings.MIDDLEWARE)])
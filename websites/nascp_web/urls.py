@@ -6,10 +6,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import render
 import nascp_web.views as views
+from apps.edge_cache.keys import surrogate_keys
 
 # from websites import nascp_web
 
 
+@surrogate_keys("spa")
 def spa_view(request):
     return render(request, "index.html")
 
@@ -22,9 +24,11 @@ urlpatterns = [
     # path("summernote/", include("django_summernote.urls")),  # ← REQUIRED
     path("ckeditor/", include("ckeditor_uploader.urls")),  # if using uploader
     path("", include("apps.content_creator.urls", namespace="content_creator")),
+    path("", include("apps.file_manager.urls", namespace="file_manager")),   # files/
     path("accounts/", include("django.contrib.auth.urls")),
     path("api/",     include("apps.api.urls")),
     path("audit/",   include("apps.audit.urls")),
+    path("", include("apps.feeds.urls", namespace="feeds")),   # sitemap.xml, feeds/
     # path("summernote/", include("django_summernote.urls")),
     # Catch-all for the SPA — keep this LAST 
     re_path(r"^.*$", spa_view, name="spa"),
@@ -0,0 +1,7 @@
+# nascp_web/urls_api.py
+# URLconf of the lean API profile (nascp_web.settings_api).
+from django.urls import include, path
+
+urlpatterns = [
+    path("api/", include("apps.api.urls")),
+]
@@ -0,0 +1,13 @@
+"""
+WSGI config for API-only workers (nascp_web.settings_api).
+
+    gunicorn nascp_web.wsgi_api:application
+"""
+
+import os
+
+from nascp_web.handlers import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'nascp_web.settings_api')
+
+application = get_wsgi_application()
@@ -17,16 +17,22 @@ document.addEventListener("DOMContentLoaded", () => {
   };
 
   // JSON fetch with retries + basic caching
+  // `fresh` skips both caches (after a change event, which is only sent
+  // once the edge purge went through; the browser may still hold the
+  // previous response)
   const memoryCache = new Map(); // url -> {ts, data}
-  async function getJSON(url, { retries = 1, cacheTtlMs = 60_000 } = {}) {
+  async function getJSON(url, { retries = 1, cacheTtlMs = 60_000, fresh = false } = {}) {
     const cached = memoryCache.get(url);
     const now = Date.now();
-    if (cached && now - cached.ts < cacheTtlMs) return cached.data;
+    if (!fresh && cached && now - cached.ts < cacheTtlMs) return cached.data;
 
     let lastErr;
     for (let attempt = 0; attempt <= retries; attempt++) {
       try {
-        const res = await fetchWithTimeout(url, { headers: { "Accept": "application/json" } });
+        const res = await fetchWithTimeout(url, {
+          headers: { "Accept": "application/json" },
+          cache: fresh ? "no-cache" : "default",
+        });
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const data = await res.json();
         memoryCache.set(url, { ts: now, data });
@@ -63,28 +69,32 @@ document.addEventListener("DOMContentLoaded", () => {
 
   /**
    * Generic fetch + render
+   * refresh: re-render in place after a change event (no skeleton; the
+   * current list stays if the refetch fails)
    */
-  async function fetchAndRender(url, containerId, renderFn) {
+  async function fetchAndRender(url, containerId, renderFn, { refresh = false } = {}) {
     const container = $$(containerId);
     if (!container) {
-      console.error(`Container #${containerId} not found`);
+      if (!refresh) console.error(`Container #${containerId} not found`);
       return;
     }
     setBusy(container, true);
-    // Lightweight skeleton
-    container.innerHTML = "";
-    const skel = document.createElement("div");
-    skel.className = "w-100 text-center py-3";
-    skel.textContent = "Loading…";
-    container.appendChild(skel);
+    if (!refresh) {
+      // Lightweight skeleton
+      container.innerHTML = "";
+      const skel = document.createElement("div");
+      skel.className = "w-100 text-center py-3";
+      skel.textContent = "Loading…";
+      container.appendChild(skel);
+    }
 
     try {
-      const data = await getJSON(url, { retries: 2, cacheTtlMs: 90_000 });
+      const data = await getJSON(url, { retries: 2, cacheTtlMs: 90_000, fresh: refresh });
       container.innerHTML = "";
       renderFn(container, data);
     } catch (err) {
       console.error(`Error fetching ${url}:`, err);
-      setMessage(container, "Sorry, this section failed to load.");
+      if (!refresh) setMessage(container, "Sorry, this section failed to load.");
     } finally {
       setBusy(container, false);
     }
@@ -316,31 +326,33 @@ document.addEventListener("DOMContentLoaded", () => {
 
   /**
    * Endpoints map
+   * keys: the surrogate keys the endpoint's responses carry (apps/api/views.py);
+   * a change event naming one of them refreshes that section
    */
   const endpoints = [
     // Files
-    { url: "/api/files/",                         containerId: "file-list",                     render: renderFileList },
-    { url: "/api/top-reports-files/",             containerId: "top-reports-files-list",        render: renderFileList },
-    { url: "/api/top-publications-files/",        containerId: "top-publications-files-list",   render: renderFileList },
-    { url: "/api/top-resources-files/",           containerId: "top-resources-files-list",      render: renderFileList },
-    { url: "/api/top-analysis-files/",            containerId: "top-analysis-files-list",       render: renderFileList },
-    { url: "/api/all-reports-files-by-slug/",     containerId: "all-reports-files-list",        render: renderFileList },
-    { url: "/api/all-publications-files/",        containerId: "all-publications-files-list",   render: renderFileList },
-    { url: "/api/all-resources-files/",           containerId: "all-resources-files-list",      render: renderFileList },
-    { url: "/api/top-video-files/",               containerId: "top-video-files-list",          render: renderFileList },
-    { url: "/api/top-image-files/",               containerId: "top-image-files-list",          render: renderFileList },
-    { url: "/api/all-video-files/",               containerId: "all-video-files-list",          render: renderFileList },
-    { url: "/api/all-image-files/",               containerId: "all-image-files-list",          render: renderFileList },
+    { url: "/api/files/",                         containerId: "file-list",                     render: renderFileList, keys: ["files"] },
+    { url: "/api/top-reports-files/",             containerId: "top-reports-files-list",        render: renderFileList, keys: ["files:category:reports"] },
+    { url: "/api/top-publications-files/",        containerId: "top-publications-files-list",   render: renderFileList, keys: ["files:category:publications"] },
+    { url: "/api/top-resources-files/",           containerId: "top-resources-files-list",      render: renderFileList, keys: ["files:category:resources"] },
+    { url: "/api/top-analysis-files/",            containerId: "top-analysis-files-list",       render: renderFileList, keys: ["files:category:analysis"] },
+    { url: "/api/all-reports-files-by-slug/",     containerId: "all-reports-files-list",        render: renderFileList, keys: ["files:category:reports"] },
+    { url: "/api/all-publications-files/",        containerId: "all-publications-files-list",   render: renderFileList, keys: ["files:category:publications"] },
+    { url: "/api/all-resources-files/",           containerId: "all-resources-files-list",      render: renderFileList, keys: ["files:category:resources"] },
+    { url: "/api/top-video-files/",               containerId: "top-video-files-list",          render: renderFileList, keys: ["files:type:video"] },
+    { url: "/api/top-image-files/",               containerId: "top-image-files-list",          render: renderFileList, keys: ["files:type:image"] },
+    { url: "/api/all-video-files/",               containerId: "all-video-files-list",          render: renderFileList, keys: ["files:type:video"] },
+    { url: "/api/all-image-files/",               containerId: "all-image-files-list",          render: renderFileList, keys: ["files:type:image"] },
 
     // Content
-    { url: "/api/latest-news-events/",            containerId: "latest-news-events-list",       render: renderContentList },
-    { url: "/api/department-contents/",           containerId: "department-contents-list",      render: renderDepartmentComponents },
-    { url: "/api/top-blogs-contents/",            containerId: "top-blogs-contents-list",       render: renderContentList },
-    { url: "/api/top-projects-contents/",         containerId: "top-projects-contents-list",    render: renderContentList },
-    { url: "/api/all-news-contents/",             containerId: "all-news-contents-list",        render: renderContentList },
-    { url: "/api/all-events-contents/",           containerId: "all-events-contents-list",      render: renderContentList },
-    { url: "/api/all-blogs-contents/",            containerId: "all-blogs-contents-list",       render: renderContentList },
-    { url: "/api/all-projects-contents/",         containerId: "all-projects-contents-list",    render: renderContentList },
+    { url: "/api/latest-news-events/",            containerId: "latest-news-events-list",       render: renderContentList, keys: ["contents:type:news", "contents:type:event"] },
+    { url: "/api/department-contents/",           containerId: "department-contents-list",      render: renderDepartmentComponents, keys: ["contents:type:department"] },
+    { url: "/api/top-blogs-contents/",            containerId: "top-blogs-contents-list",       render: renderContentList, keys: ["contents:type:blog"] },
+    { url: "/api/top-projects-contents/",         containerId: "top-projects-contents-list",    render: renderContentList, keys: ["contents:category:projects"] },
+    { url: "/api/all-news-contents/",             containerId: "all-news-contents-list",        render: renderContentList, keys: ["contents:type:news"] },
+    { url: "/api/all-events-contents/",           containerId: "all-events-contents-list",      render: renderContentList, keys: ["contents:type:event"] },
+    { url: "/api/all-blogs-contents/",            containerId: "all-blogs-contents-list",       render: renderContentList, keys: ["contents:type:blog"] },
+    { url: "/api/all-projects-contents/",         containerId: "all-projects-contents-list",    render: renderContentList, keys: ["contents:category:projects"] },
   ];
 
   // Fire requests
@@ -349,16 +361,18 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   // News + Events merged carousel
-  (async function fetchAndRenderNewsEvents() {
+  const newsEventsKeys = ["contents:type:news", "contents:type:event"];
+  async function fetchAndRenderNewsEvents({ refresh = false } = {}) {
     try {
       const [newsData, eventsData] = await Promise.all([
-        getJSON("/api/top-news-contents/",  { retries: 2, cacheTtlMs: 60_000 }),
-        getJSON("/api/top-events-contents/", { retries: 2, cacheTtlMs: 60_000 }),
+        getJSON("/api/top-news-contents/",  { retries: 2, cacheTtlMs: 60_000, fresh: refresh }),
+        getJSON("/api/top-events-contents/", { retries: 2, cacheTtlMs: 60_000, fresh: refresh }),
       ]);
       const merged = [...(newsData || []), ...(eventsData || [])];
       renderNewsEventsCarousel(merged);
     } catch (err) {
       console.error("Error fetching merged news/events:", err);
+      if (refresh) return; // keep what is shown
       // Optional: fall back to latest combined endpoint if you have one
       try {
         const combined = await getJSON("/api/latest-news-events/", { retries: 1, cacheTtlMs: 60_000 });
@@ -370,5 +384,41 @@ document.addEventListener("DOMContentLoaded", () => {
         }
       }
     }
-  })();
+  }
+  fetchAndRenderNewsEvents();
+
+  /**
+   * Live updates (Server-Sent Events, apps/live): instead of re-polling,
+   * refresh only the sections whose keys a change names. Changes arriving
+   * together (e.g. a bulk import) are refreshed once.
+   */
+  if (window.EventSource) {
+    const pending = new Set();
+    let timer = null;
+    const refreshPending = () => {
+      timer = null;
+      const all = pending.has("*");
+      const touched = (keys) => all || keys.some((key) => pending.has(key));
+      endpoints.filter(({ keys }) => touched(keys)).forEach(({ url, containerId, render }) => {
+        fetchAndRender(url, containerId, render, { refresh: true });
+      });
+      if (touched(newsEventsKeys)) fetchAndRenderNewsEvents({ refresh: true });
+      pending.clear();
+    };
+    const schedule = (keys) => {
+      keys.forEach((key) => pending.add(key));
+      if (!timer) timer = setTimeout(refreshPending, 500);
+    };
+
+    const source = new EventSource("/api/events/");
+    source.addEventListener("change", (event) => {
+      try {
+        schedule(JSON.parse(event.data).keys || []);
+      } catch (err) {
+        console.error("Bad change event:", err);
+      }
+    });
+    // Events were missed: refresh everything once.
+    source.addEventListener("reset", () => schedule(["*"]));
+  }
 });
@@ -13,7 +13,7 @@ var KTJSTreeAjax = function() {
                 "check_callback": true,
                 'data': {
                     'url': function(node) {
-                        return 'https://preview.keenthemes.com/api/jstree/ajax_data.php'; // Demo API endpoint -- Replace this URL with your set endpoint
+                        return '/api/jstree/'; // apps/api/views.py jstree: children of `parent`, one level per request
                     },
                     'data': function(node) {
                         return {